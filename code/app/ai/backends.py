@@ -0,0 +1,436 @@
+import hashlib
+import json
+import os
+import re
+import threading
+from typing import TYPE_CHECKING, Any, Callable, Dict, Type
+
+from .prompt_layout import PromptParts, prompt_text
+
+if TYPE_CHECKING:  # pragma: no cover - typing only
+    from .nemotron_client import NemotronStream
+    from .routing import ModelRoute
+
+LLM_BACKEND = os.getenv("LLM_BACKEND", "nim").strip().lower() or "nim"
+LLM_REPLAY_PATH = os.getenv("LLM_REPLAY_PATH", "")
+# What the replay backend does for prompts it has no recording of: "template" or "error".
+LLM_REPLAY_MISS = os.getenv("LLM_REPLAY_MISS", "template").strip().lower()
+# When set, the NIM backend appends every completion here for later replay.
+LLM_RECORD_PATH = os.getenv("LLM_RECORD_PATH", "")
+
+_LINE_RE = re.compile(r"^- ([^:]+):\s*(.+)$", re.MULTILINE)
+
+
+def prompt_hash(prompt: "str | PromptParts") -> str:
+    return hashlib.sha256(prompt_text(prompt).encode("utf-8")).hexdigest()
+
+
+def _completion(text: str, prompt: str, model: str, max_tokens: int | None = None) -> Dict[str, Any]:
+    words = text.split(" ")
+    finish_reason = "stop"
+    if max_tokens is not None and 0 < max_tokens < len(words):
+        text = " ".join(words[:max_tokens])
+        finish_reason = "length"
+    completion_tokens = len(text.split())
+    prompt_tokens = max(1, len(prompt) // 4)
+    return {
+        "object": "chat.completion",
+        "model": model,
+        "choices": [
+            {"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": finish_reason}
+        ],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        },
+    }
+
+
+def _within(response: Dict[str, Any], max_tokens: int | None) -> Dict[str, Any]:
+    # A recording made with a larger budget is cut to this call's max_tokens
+    # the way the endpoint would cut it, counting words as tokens like
+    # _completion does.
+    choice = (response.get("choices") or [{}])[0]
+    message = choice.get("message") if isinstance(choice, dict) else None
+    content = message.get("content") if isinstance(message, dict) else None
+    if max_tokens is None or max_tokens <= 0 or not isinstance(content, str):
+        return response
+    words = content.split(" ")
+    if len(words) <= max_tokens:
+        return response
+    usage = dict(response.get("usage") or {})
+    usage["completion_tokens"] = max_tokens
+    usage["total_tokens"] = int(usage.get("prompt_tokens") or 0) + max_tokens
+    truncated = {**choice, "message": {**message, "content": " ".join(words[:max_tokens])}, "finish_reason": "length"}
+    return {**response, "choices": [truncated, *response["choices"][1:]], "usage": usage}
+
+
+class LLMBackend:
+    # Interface every backend implements. Responses are OpenAI-shaped
+    # chat.completion dicts so extract_text and the guardrails work unchanged.
+    name = "base"
+
+    def available(self, timeout: float | None = None) -> bool:
+        return True
+
+    async def available_async(self, timeout: float | None = None) -> bool:
+        return self.available(timeout)
+
+    def complete(
+        self,
+        prompt: "str | PromptParts",
+        max_tokens: int | None = None,
+        temperature: float | None = None,
+        use_cache: bool = True,
+        reasoning_budget: int | None = None,
+        json_schema: Dict[str, Any] | None = None,
+        route: "ModelRoute | None" = None,
+        accept: Callable[[str], bool] | None = None,
+    ) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    async def complete_async(
+        self,
+        prompt: "str | PromptParts",
+        max_tokens: int | None = None,
+        temperature: float | None = None,
+        use_cache: bool = True,
+        reasoning_budget: int | None = None,
+        json_schema: Dict[str, Any] | None = None,
+        route: "ModelRoute | None" = None,
+        accept: Callable[[str], bool] | None = None,
+    ) -> Dict[str, Any]:
+        return self.complete(
+            prompt,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            use_cache=use_cache,
+            reasoning_budget=reasoning_budget,
+            json_schema=json_schema,
+            route=route,
+            accept=accept,
+        )
+
+    def stream(
+        self,
+        prompt: "str | PromptParts",
+        max_tokens: int | None = None,
+        temperature: float | None = None,
+        use_cache: bool = True,
+        reasoning_budget: int | None = None,
+        json_schema: Dict[str, Any] | None = None,
+        route: "ModelRoute | None" = None,
+        accept: Callable[[str], bool] | None = None,
+    ) -> "NemotronStream":
+        from .nemotron_client import NemotronStream
+
+        return NemotronStream.from_response(
+            self.complete(
+                prompt,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                use_cache=use_cache,
+                reasoning_budget=reasoning_budget,
+                json_schema=json_schema,
+                route=route,
+                accept=accept,
+            ),
+            cached=False,
+        )
+
+
+class NIMBackend(LLMBackend):
+    name = "nim"
+
+    def __init__(self, record_path: str = LLM_RECORD_PATH) -> None:
+        self.record_path = record_path
+        self._lock = threading.Lock()
+
+    def _record(self, prompt: "str | PromptParts", response: Dict[str, Any]) -> None:
+        if not self.record_path:
+            return
+        text = prompt_text(prompt)
+        line = json.dumps({"prompt_sha256": prompt_hash(text), "prompt": text, "response": response}, default=str)
+        with self._lock:
+            with open(self.record_path, "a", encoding="utf-8") as handle:
+                handle.write(line + "\n")
+
+    def available(self, timeout: float | None = None) -> bool:
+        from .nemotron_client import check_nim_online
+
+        return check_nim_online(timeout)
+
+    async def available_async(self, timeout: float | None = None) -> bool:
+        from .nemotron_client import check_nim_online_async
+
+        return await check_nim_online_async(timeout)
+
+    def complete(
+        self,
+        prompt: "str | PromptParts",
+        max_tokens: int | None = None,
+        temperature: float | None = None,
+        use_cache: bool = True,
+        reasoning_budget: int | None = None,
+        json_schema: Dict[str, Any] | None = None,
+        route: "ModelRoute | None" = None,
+        accept: Callable[[str], bool] | None = None,
+    ) -> Dict[str, Any]:
+        from .nemotron_client import query_nim
+
+        response = query_nim(
+            prompt,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            use_cache=use_cache,
+            reasoning_budget=reasoning_budget,
+            json_schema=json_schema,
+            route=route,
+            accept=accept,
+        )
+        self._record(prompt, response)
+        return response
+
+    async def complete_async(
+        self,
+        prompt: "str | PromptParts",
+        max_tokens: int | None = None,
+        temperature: float | None = None,
+        use_cache: bool = True,
+        reasoning_budget: int | None = None,
+        json_schema: Dict[str, Any] | None = None,
+        route: "ModelRoute | None" = None,
+        accept: Callable[[str], bool] | None = None,
+    ) -> Dict[str, Any]:
+        from .nemotron_client import query_nim_async
+
+        response = await query_nim_async(
+            prompt,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            use_cache=use_cache,
+            reasoning_budget=reasoning_budget,
+            json_schema=json_schema,
+            route=route,
+            accept=accept,
+        )
+        self._record(prompt, response)
+        return response
+
+    def stream(
+        self,
+        prompt: "str | PromptParts",
+        max_tokens: int | None = None,
+        temperature: float | None = None,
+        use_cache: bool = True,
+        reasoning_budget: int | None = None,
+        json_schema: Dict[str, Any] | None = None,
+        route: "ModelRoute | None" = None,
+        accept: Callable[[str], bool] | None = None,
+    ) -> "NemotronStream":
+        from .nemotron_client import stream_nim
+
+        return stream_nim(
+            prompt,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            use_cache=use_cache,
+            reasoning_budget=reasoning_budget,
+            json_schema=json_schema,
+            route=route,
+            accept=accept,
+        )
+
+
+class TemplateBackend(LLMBackend):
+    # Builds answers in-process from the numbers already embedded in the
+    # prompt, at CPU speed. Used for benchmarks and as a degraded mode.
+    name = "template"
+    model = "risearc/template"
+
+    def complete(
+        self,
+        prompt: "str | PromptParts",
+        max_tokens: int | None = None,
+        temperature: float | None = None,
+        use_cache: bool = True,
+        reasoning_budget: int | None = None,
+        json_schema: Dict[str, Any] | None = None,
+        route: "ModelRoute | None" = None,
+        accept: Callable[[str], bool] | None = None,
+    ) -> Dict[str, Any]:
+        text = prompt_text(prompt)
+        return _completion(self.render(text), text, self.model, max_tokens)
+
+    def render(self, prompt: str) -> str:
+        if "Return ONLY a JSON object" in prompt:
+            # Scenario extraction: an empty object lets the regex extractor take over.
+            return "{}"
+        if "Return ONLY valid JSON" in prompt:
+            return json.dumps(self._structured(_json_block(prompt, "DATA:")), indent=2)
+        if "NEW MESSAGES:" in prompt:
+            # Rolling chat-history summary: the user's side of the new messages.
+            asked = [line[6:] for line in prompt.split("NEW MESSAGES:", 1)[1].splitlines() if line.startswith("User: ")]
+            return " ".join(asked)
+        if "Summary:" in prompt and "Computed Metrics:" in prompt:
+            return self._summary(dict(_LINE_RE.findall(prompt)), prompt)
+        context = _json_block(prompt, "CONTEXT:")
+        if context:
+            return self._chat(context)
+        return "I can help with your cash flow, runway, or debt. Which would you like to look at first?"
+
+    def _summary(self, lines: Dict[str, str], prompt: str) -> str:
+        runway = lines.get("Runway (months)", "0")
+        burn = lines.get("Net monthly burn", "$0")
+        risk = lines.get("Adjusted risk score (0-100)", lines.get("Risk score (0-100)", "0"))
+        support = lines.get("Monthly support", "$0")
+        expenses = lines.get("Monthly expenses after cut", "$0")
+        leaks = lines.get("Estimated savings leaks (monthly)", "$0")
+        cut = lines.get("Expense cut", "0%")
+        alert = prompt.split("Alert Context:", 1)[-1].strip().splitlines()
+        alert_line = alert[0].strip() if alert and alert[0].strip() else "Review the plan if the scenario changes."
+        return "\n".join(
+            [
+                "Summary:",
+                f"- Net monthly burn is {burn} against expenses of {expenses} after cuts.",
+                f"- Savings cover about {runway} months in this scenario.",
+                f"- Adjusted risk score is {risk}/100, with {support} in monthly support.",
+                "Actions:",
+                f"- Cancel unused subscriptions to recover up to {leaks}/mo.",
+                f"- Hold the planned {cut} expense cut for the full scenario.",
+                "- Line up income support early to stretch the runway.",
+                "Warnings:",
+                f"- {alert_line}",
+            ]
+        )
+
+    def _structured(self, context: Dict[str, Any]) -> Dict[str, Any]:
+        current = context.get("current_metrics") or {}
+        scenario = context.get("scenario") or {}
+        profile = context.get("profile") or {}
+        facts = []
+        if scenario:
+            facts.append(f"Net cash flow: {scenario.get('net_cash_flow', '$0/mo')}")
+            if scenario.get("scenario_runway"):
+                facts.append(f"Runway: {scenario['scenario_runway']}")
+            facts.append(f"Risk score: {scenario.get('risk_score', '0/100')}")
+        else:
+            facts.append(f"Net cash flow: {current.get('monthly_net', '$0')}/mo")
+            if current.get("runway"):
+                facts.append(f"Runway: {current['runway']}")
+            facts.append(f"Risk score: {current.get('risk_score', '0/100')}")
+        facts.append(f"Savings: {profile.get('savings', '$0')}")
+        return {
+            "summary": f"You have {profile.get('savings', '$0')} in savings and {facts[0].lower()}.",
+            "key_facts": facts,
+            "meaning": "Your savings and monthly cash flow set how long you can absorb a disruption.",
+            "actions": [
+                f"Keep monthly expenses at or below {profile.get('monthly_expenses', '$0')}.",
+                "Set up an automatic transfer into emergency savings each payday.",
+            ],
+            "warnings": ["Recheck your runway if income or expenses change."],
+            "followup": "" if context.get("mode") in {"scenario", "overview"} else "Do you want to focus on runway or debt first?",
+        }
+
+    def _chat(self, context: Dict[str, Any]) -> str:
+        current = context.get("current_metrics") or {}
+        profile = context.get("profile") or {}
+        net = current.get("monthly_net", "$0")
+        label = current.get("cash_flow_label", "surplus")
+        reply = f"Your net cash flow is {net}/mo, a monthly {label}, with {profile.get('savings', '$0')} in savings."
+        if current.get("runway"):
+            reply += f" At this pace your savings last about {current['runway']}."
+        return reply + " Do you want to focus on cash flow, runway, or risk first?"
+
+
+class ReplayBackend(LLMBackend):
+    # Answers from recordings made with LLM_RECORD_PATH (one JSON object per
+    # line with "prompt_sha256" or "prompt", plus "response").
+    name = "replay"
+
+    def __init__(self, path: str = LLM_REPLAY_PATH, miss: str = LLM_REPLAY_MISS) -> None:
+        self.path = path
+        self.miss = miss
+        self._responses: Dict[str, Dict[str, Any]] = {}
+        self._template = TemplateBackend()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        if path:
+            self.load(path)
+
+    def load(self, path: str) -> None:
+        with open(path, encoding="utf-8") as handle:
+            for line in handle:
+                line = line.strip()
+                if not line:
+                    continue
+                record = json.loads(line)
+                key = record.get("prompt_sha256") or prompt_hash(record.get("prompt", ""))
+                self._responses[key] = record["response"]
+
+    def available(self, timeout: float | None = None) -> bool:
+        return bool(self._responses) or self.miss == "template"
+
+    def complete(
+        self,
+        prompt: "str | PromptParts",
+        max_tokens: int | None = None,
+        temperature: float | None = None,
+        use_cache: bool = True,
+        reasoning_budget: int | None = None,
+        json_schema: Dict[str, Any] | None = None,
+        route: "ModelRoute | None" = None,
+        accept: Callable[[str], bool] | None = None,
+    ) -> Dict[str, Any]:
+        response = self._responses.get(prompt_hash(prompt))
+        with self._lock:
+            if response is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+        if response is not None:
+            return _within(response, max_tokens)
+        if self.miss == "template":
+            return self._template.complete(prompt, max_tokens=max_tokens)
+        raise LookupError(f"No recorded response for prompt {prompt_hash(prompt)[:12]} in {self.path or '(none)'}.")
+
+
+def _json_block(prompt: str, marker: str) -> Dict[str, Any]:
+    if marker not in prompt:
+        return {}
+    tail = prompt.split(marker, 1)[1]
+    start = tail.find("{")
+    if start < 0:
+        return {}
+    try:
+        value, _ = json.JSONDecoder().raw_decode(tail[start:])
+    except ValueError:
+        return {}
+    return value if isinstance(value, dict) else {}
+
+
+BACKENDS: Dict[str, Type[LLMBackend]] = {
+    "nim": NIMBackend,
+    "replay": ReplayBackend,
+    "template": TemplateBackend,
+}
+
+_INSTANCES: Dict[str, LLMBackend] = {}
+_INSTANCES_LOCK = threading.Lock()
+
+
+def get_backend(name: str | None = None) -> LLMBackend:
+    key = (name or LLM_BACKEND).lower()
+    backend = _INSTANCES.get(key)
+    if backend is not None:
+        return backend
+    with _INSTANCES_LOCK:
+        backend = _INSTANCES.get(key)
+        if backend is None:
+            if key not in BACKENDS:
+                raise ValueError(f"Unknown LLM_BACKEND '{key}'. Choose from: {', '.join(sorted(BACKENDS))}.")
+            backend = BACKENDS[key]()
+            _INSTANCES[key] = backend
+    return backend
@@ -0,0 +1,102 @@
+import contextvars
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, List, Tuple
+
+# Completions per answer when the caller opts in; 1 keeps the single call.
+LLM_BEST_OF_N = max(1, int(os.getenv("LLM_BEST_OF_N", "1")))
+# Each extra candidate runs this much hotter than the one before it.
+LLM_BEST_OF_TEMPERATURE_STEP = max(0.0, float(os.getenv("LLM_BEST_OF_TEMPERATURE_STEP", "0.25")))
+LLM_BEST_OF_MAX_TEMPERATURE = max(0.0, float(os.getenv("LLM_BEST_OF_MAX_TEMPERATURE", "1.0")))
+LLM_BEST_OF_WORKERS = max(1, int(os.getenv("LLM_BEST_OF_WORKERS", "8")))
+
+_POOL_LOCK = threading.Lock()
+_POOL: ThreadPoolExecutor | None = None
+
+
+def _get_pool() -> ThreadPoolExecutor:
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = ThreadPoolExecutor(max_workers=LLM_BEST_OF_WORKERS, thread_name_prefix="llm-best-of")
+        return _POOL
+
+
+def candidate_temperatures(
+    temperature: float,
+    n: int,
+    step: float = LLM_BEST_OF_TEMPERATURE_STEP,
+    ceiling: float = LLM_BEST_OF_MAX_TEMPERATURE,
+) -> List[float]:
+    return [round(min(ceiling, temperature + index * step), 3) if index else temperature for index in range(n)]
+
+
+# How often the first candidate was already clean, a spare rescued the answer,
+# or nothing passed.
+class BestOfStats:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._counts: Dict[str, int] = {"primary_clean": 0, "rescued": 0, "unrescued": 0}
+
+    def record(self, outcome: str) -> None:
+        with self._lock:
+            self._counts[outcome] += 1
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return {"calls": sum(self._counts.values()), **self._counts}
+
+
+LLM_BEST_OF_STATS = BestOfStats()
+
+
+def best_of(
+    generate: Callable[[float, bool], str],
+    accept: Callable[[str], bool],
+    temperature: float,
+    n: int = LLM_BEST_OF_N,
+) -> Tuple[str, bool]:
+    # generate(temperature, primary) returns one completion's text. The primary
+    # candidate runs first on the calling thread; only when accept rejects it
+    # do the spares run, together, at higher temperatures. A clean answer thus
+    # costs one call. With n > 1 the caller must not stream the primary: a
+    # spare may replace it. Returns (text, accepted): the primary if it passes
+    # accept, else the first spare to finish that does, else the primary (or
+    # any spare) as it is.
+    temperatures = candidate_temperatures(temperature, n)
+    if len(temperatures) == 1:
+        text = generate(temperature, True)
+        return text, bool(text) and accept(text)
+
+    error: BaseException | None = None
+    primary = ""
+    try:
+        primary = generate(temperatures[0], True)
+    except Exception as exc:
+        error = exc
+    if primary and accept(primary):
+        LLM_BEST_OF_STATS.record("primary_clean")
+        return primary, True
+
+    pool = _get_pool()
+    spares: List[Future] = [
+        pool.submit(contextvars.copy_context().run, generate, value, False) for value in temperatures[1:]
+    ]
+    fallback = primary
+    for future in as_completed(spares):
+        try:
+            text = future.result()
+        except Exception as exc:
+            error = error or exc
+            continue
+        if text and accept(text):
+            for other in spares:
+                other.cancel()
+            LLM_BEST_OF_STATS.record("rescued")
+            return text, True
+        fallback = fallback or text
+    if not fallback and error is not None:
+        raise error
+    LLM_BEST_OF_STATS.record("unrescued")
+    return fallback, False
@@ -0,0 +1,155 @@
+import math
+import os
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, Tuple
+
+from .telemetry import percentile
+
+LLM_ADAPTIVE_BUDGETS = os.getenv("LLM_ADAPTIVE_BUDGETS", "1").lower() in {"1", "true", "yes"}
+# Completions per call site to see before the caller's max_tokens is tightened.
+LLM_BUDGET_MIN_SAMPLES = max(1, int(os.getenv("LLM_BUDGET_MIN_SAMPLES", "20")))
+LLM_BUDGET_PERCENTILE = min(1.0, max(0.5, float(os.getenv("LLM_BUDGET_PERCENTILE", "0.95"))))
+LLM_BUDGET_HEADROOM = max(1.0, float(os.getenv("LLM_BUDGET_HEADROOM", "1.25")))
+LLM_BUDGET_MIN_TOKENS = max(1, int(os.getenv("LLM_BUDGET_MIN_TOKENS", "96")))
+# Budgets are rounded up to this step so the response cache keys stay stable.
+LLM_BUDGET_STEP = max(1, int(os.getenv("LLM_BUDGET_STEP", "32")))
+# End-to-end latency a single completion should fit in; 0 disables the cap.
+LLM_LATENCY_SLO_S = max(0.0, float(os.getenv("LLM_LATENCY_SLO_S", "10")))
+# Share of max_tokens the model may spend thinking when thinking is enabled.
+LLM_REASONING_SHARE = min(1.0, max(0.0, float(os.getenv("LLM_REASONING_SHARE", "0.5"))))
+
+_WINDOW = 200
+# A truncated completion only says the answer wanted more than it got; count it
+# as this many times longer so the learned budget grows past the cut.
+_TRUNCATION_GROWTH = 2.0
+
+
+def _round_up(tokens: float) -> int:
+    return int(math.ceil(tokens / LLM_BUDGET_STEP) * LLM_BUDGET_STEP)
+
+
+def _budget_key(mode: str, call_site: str) -> Tuple[str, str]:
+    return mode or "other", call_site or ""
+
+
+class _BudgetStats:
+    def __init__(self) -> None:
+        self.lengths: Deque[float] = deque(maxlen=_WINDOW)
+        self.rates: Deque[float] = deque(maxlen=_WINDOW)
+        self.truncated: Deque[bool] = deque(maxlen=_WINDOW)
+        self.calls = 0
+        self.truncated_total = 0
+
+
+# Learns how long each call site's answers really are and sizes max_tokens to
+# that, instead of the fixed ceilings the call sites pass. Stats are kept per
+# (mode, call_site): call sites sharing a mode can want very different lengths,
+# e.g. short prose chat replies and structured JSON answers. The caller's value
+# stays the hard upper bound; the learned budget only ever lowers it.
+class BudgetManager:
+    def __init__(
+        self,
+        enabled: bool = LLM_ADAPTIVE_BUDGETS,
+        min_samples: int = LLM_BUDGET_MIN_SAMPLES,
+        percentile: float = LLM_BUDGET_PERCENTILE,
+        headroom: float = LLM_BUDGET_HEADROOM,
+        min_tokens: int = LLM_BUDGET_MIN_TOKENS,
+        latency_slo_s: float = LLM_LATENCY_SLO_S,
+        reasoning_share: float = LLM_REASONING_SHARE,
+    ) -> None:
+        self.enabled = enabled
+        self.min_samples = min_samples
+        self.percentile = percentile
+        self.headroom = headroom
+        self.min_tokens = min_tokens
+        self.latency_slo_s = latency_slo_s
+        self.reasoning_share = reasoning_share
+        self._lock = threading.Lock()
+        self._stats: Dict[Tuple[str, str], _BudgetStats] = {}
+
+    def observe(
+        self,
+        mode: str,
+        completion_tokens: int,
+        latency_s: float,
+        finish_reason: str | None = None,
+        cached: bool = False,
+        call_site: str = "",
+    ) -> None:
+        # Cached answers cost no generation time and would skew the token rate.
+        if cached or completion_tokens <= 0:
+            return
+        truncated = finish_reason == "length"
+        length = completion_tokens * (_TRUNCATION_GROWTH if truncated else 1.0)
+        with self._lock:
+            stats = self._stats.setdefault(_budget_key(mode, call_site), _BudgetStats())
+            stats.calls += 1
+            stats.lengths.append(float(length))
+            stats.truncated.append(truncated)
+            if truncated:
+                stats.truncated_total += 1
+            if latency_s > 0:
+                stats.rates.append(completion_tokens / latency_s)
+
+    def _slo_tokens_locked(self, stats: _BudgetStats) -> float | None:
+        if not self.latency_slo_s or len(stats.rates) < self.min_samples:
+            return None
+        # Rates are measured end to end, so they already include time to first token.
+        return percentile(stats.rates, 0.5) * self.latency_slo_s
+
+    def plan(
+        self,
+        mode: str,
+        max_tokens: int,
+        reasoning_budget: int | None = None,
+        call_site: str = "",
+    ) -> Tuple[int, int | None]:
+        # Returns (max_tokens, reasoning_budget) for the next call from this call site.
+        # reasoning_budget is None when thinking is off and the default applies.
+        cap = max(1, int(max_tokens))
+        budget = cap
+        if self.enabled:
+            with self._lock:
+                stats = self._stats.get(_budget_key(mode, call_site))
+                if stats is not None and len(stats.lengths) >= self.min_samples:
+                    learned = percentile(stats.lengths, self.percentile) * self.headroom
+                    slo_tokens = self._slo_tokens_locked(stats)
+                    if slo_tokens is not None:
+                        learned = min(learned, slo_tokens)
+                    budget = min(cap, max(self.min_tokens, _round_up(learned)))
+        if reasoning_budget is None:
+            return budget, None
+        share = int(budget * self.reasoning_share)
+        return budget, min(reasoning_budget, share) if reasoning_budget > 0 else share
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        result: Dict[str, Dict[str, Any]] = {}
+        with self._lock:
+            for (mode, call_site), stats in self._stats.items():
+                samples = len(stats.lengths)
+                slo_tokens = self._slo_tokens_locked(stats)
+                result[f"{mode}:{call_site}" if call_site else mode] = {
+                    "mode": mode,
+                    "call_site": call_site,
+                    "calls": stats.calls,
+                    "samples": samples,
+                    "p50_tokens": round(percentile(stats.lengths, 0.5), 1) if samples else None,
+                    "learned_tokens": (
+                        _round_up(percentile(stats.lengths, self.percentile) * self.headroom)
+                        if samples >= self.min_samples
+                        else None
+                    ),
+                    "slo_tokens": int(slo_tokens) if slo_tokens is not None else None,
+                    "tokens_per_s": round(percentile(stats.rates, 0.5), 1) if stats.rates else None,
+                    "truncation_rate": round(sum(stats.truncated) / samples, 3) if samples else 0.0,
+                    "truncated_total": stats.truncated_total,
+                }
+        return result
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+
+
+LLM_BUDGETS = BudgetManager()
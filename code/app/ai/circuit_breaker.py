@@ -0,0 +1,132 @@
+import os
+import threading
+import time
+from typing import Dict
+
+NEMOTRON_BREAKER_FAILURES = max(1, int(os.getenv("NEMOTRON_BREAKER_FAILURES", "3")))
+NEMOTRON_BREAKER_SLOW_CALL_S = float(os.getenv("NEMOTRON_BREAKER_SLOW_CALL_S", "20"))
+NEMOTRON_BREAKER_OPEN_S = max(0.0, float(os.getenv("NEMOTRON_BREAKER_OPEN_S", "30")))
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+_STATE_CODES = {CLOSED: 0.0, HALF_OPEN: 1.0, OPEN: 2.0}
+
+
+class CircuitOpenError(RuntimeError):
+    pass
+
+
+# Process-wide view of endpoint health built from real call outcomes.
+# Consecutive failures (or calls slower than slow_call_s) open the circuit;
+# after open_s a single caller is let through as the half-open probe and its
+# outcome either closes the circuit or re-opens it for another open_s.
+class CircuitBreaker:
+    def __init__(
+        self,
+        failure_threshold: int = NEMOTRON_BREAKER_FAILURES,
+        slow_call_s: float = NEMOTRON_BREAKER_SLOW_CALL_S,
+        open_s: float = NEMOTRON_BREAKER_OPEN_S,
+    ) -> None:
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.slow_call_s = float(slow_call_s)
+        self.open_s = float(open_s)
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_started = 0.0
+        self._probe_in_flight = False
+        self._last_latency_s = 0.0
+        self._total_opened = 0
+        self._total_rejected = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state
+
+    def _probe_due(self, now: float) -> bool:
+        if self._state == OPEN:
+            return now - self._opened_at >= self.open_s
+        if self._state == HALF_OPEN:
+            # A probe that never reported back (caller crashed) must not wedge the breaker.
+            return not self._probe_in_flight or now - self._probe_started >= self.open_s
+        return False
+
+    def allow_request(self) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            if self._state == CLOSED:
+                return True
+            if self._probe_due(now):
+                self._state = HALF_OPEN
+                self._probe_in_flight = True
+                self._probe_started = now
+                return True
+            self._total_rejected += 1
+            return False
+
+    def probe_due(self) -> bool:
+        with self._lock:
+            return self._probe_due(time.monotonic())
+
+    def _open(self, now: float) -> None:
+        self._state = OPEN
+        self._opened_at = now
+        self._probe_in_flight = False
+        self._total_opened += 1
+
+    def record_success(self, latency_s: float = 0.0) -> None:
+        with self._lock:
+            self._last_latency_s = float(latency_s)
+            if self.slow_call_s > 0 and latency_s > self.slow_call_s:
+                self._record_failure_locked()
+                return
+            self._state = CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self, latency_s: float = 0.0) -> None:
+        with self._lock:
+            self._last_latency_s = float(latency_s)
+            self._record_failure_locked()
+
+    def _record_failure_locked(self) -> None:
+        now = time.monotonic()
+        self._failures += 1
+        if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+            self._open(now)
+
+    def release_probe(self) -> None:
+        with self._lock:
+            self._probe_in_flight = False
+
+    def available(self) -> bool:
+        # Cheap status read for the UI and health checks: no I/O, no probe claimed.
+        with self._lock:
+            return self._state == CLOSED or self._probe_due(time.monotonic())
+
+    def reset(self) -> None:
+        with self._lock:
+            self._state = CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            retry_in = 0.0
+            if self._state == OPEN:
+                retry_in = max(0.0, self.open_s - (time.monotonic() - self._opened_at))
+            return {
+                "state": _STATE_CODES[self._state],
+                "consecutive_failures": float(self._failures),
+                "last_latency_s": self._last_latency_s,
+                "retry_in_s": retry_in,
+                "opened_total": float(self._total_opened),
+                "rejected_total": float(self._total_rejected),
+            }
+
+
+NEMOTRON_BREAKER = CircuitBreaker()
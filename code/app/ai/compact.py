@@ -0,0 +1,83 @@
+import json
+import os
+import re
+from typing import Any, Dict, Iterable
+
+# Minified, zero-pruned DATA/CONTEXT blocks and summary lines instead of the
+# indented JSON and full bullet lists. Prefill time grows with prompt length,
+# but the saving is small on these prompts, so it is opt-in.
+LLM_COMPACT_CONTEXT = os.getenv("LLM_COMPACT_CONTEXT", "").lower() in {"1", "true", "yes"}
+
+COMPACT_NOTE = "Fields and lines with a zero or empty value are left out; treat missing ones as zero."
+
+# Kept even when zero: without them the model cannot tell "none" from "unknown".
+ALWAYS_KEEP = {"savings", "debt", "monthly_income", "monthly_expenses", "monthly_net", "net_cash_flow", "risk_score"}
+SUMMARY_ALWAYS_KEEP = {
+    "Monthly income",
+    "Savings",
+    "Total debt",
+    "Months unemployed",
+    "Runway (months)",
+    "Risk score (0-100)",
+    "Adjusted risk score (0-100)",
+    "Net monthly burn",
+}
+
+_ZERO_RE = re.compile(r"^[+-]?\$?0+(?:\.0+)?(?:%|/mo)?$")
+_BULLET_RE = re.compile(r"^- ([^:]+): (.*)$")
+_TOKEN_RE = re.compile(r"[A-Za-z]+|\d{1,3}|[^\sA-Za-z\d]")
+
+
+def is_empty(value: Any) -> bool:
+    if value is None:
+        return True
+    if isinstance(value, bool):
+        return False
+    if isinstance(value, (int, float)):
+        return value == 0
+    if isinstance(value, str):
+        return not value.strip() or bool(_ZERO_RE.match(value.strip()))
+    if isinstance(value, (list, tuple, dict)):
+        return not value
+    return False
+
+
+def compact_context(value: Any, keep: Iterable[str] = ALWAYS_KEEP) -> Any:
+    keep = set(keep)
+    if isinstance(value, dict):
+        result: Dict[str, Any] = {}
+        for key, item in value.items():
+            item = compact_context(item, keep)
+            if is_empty(item) and key not in keep:
+                continue
+            result[key] = item
+        return result
+    if isinstance(value, list):
+        return [compact_context(item, keep) for item in value if not is_empty(item)]
+    return value
+
+
+def encode_context(context: Dict[str, Any], compact: bool = LLM_COMPACT_CONTEXT) -> str:
+    if not compact:
+        return json.dumps(context, indent=2)
+    return json.dumps(compact_context(context), separators=(",", ":"), ensure_ascii=False)
+
+
+def compact_lines(text: str, keep: Iterable[str] = SUMMARY_ALWAYS_KEEP) -> str:
+    # Drops "- Label: value" bullets whose value is zero, e.g. the scenario
+    # add-ons nobody filled in.
+    keep = set(keep)
+    lines = []
+    for line in text.splitlines():
+        match = _BULLET_RE.match(line)
+        if match and match.group(1) not in keep and is_empty(match.group(2)):
+            continue
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def estimate_tokens(text: str) -> int:
+    # BPE tokenizers keep common words whole, split digits into groups of up to
+    # three and give most punctuation its own token; close enough to compare
+    # prompt variants without the model's tokenizer.
+    return len(_TOKEN_RE.findall(text or ""))
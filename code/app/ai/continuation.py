@@ -0,0 +1,167 @@
+import json
+import os
+from typing import Any, Callable, Dict, List, Tuple
+
+from . import deadline as llm_deadline
+from .nemotron_client import extract_text, query_nemotron
+from .prompt_layout import PromptParts
+
+# Follow-up requests allowed after a completion stops at max_tokens; 0 disables.
+NEMOTRON_CONTINUATION_ROUNDS = max(0, int(os.getenv("NEMOTRON_CONTINUATION_ROUNDS", "1")))
+NEMOTRON_CONTINUATION_MAX_TOKENS = max(1, int(os.getenv("NEMOTRON_CONTINUATION_MAX_TOKENS", "256")))
+
+# A continuation that restates the end of the partial answer is trimmed; shorter
+# matches than _MIN_OVERLAP are treated as coincidence.
+_MIN_OVERLAP = 8
+_MAX_OVERLAP = 200
+_CLOSERS = {"{": "}", "[": "]"}
+
+
+def is_truncated(response: Dict[str, Any] | None) -> bool:
+    choices = response.get("choices") if isinstance(response, dict) else None
+    return bool(choices) and isinstance(choices[0], dict) and choices[0].get("finish_reason") == "length"
+
+
+def _content(response: Dict[str, Any]) -> str:
+    # Only the answer itself can be continued; a reply that ran out while still
+    # reasoning has nothing to append to.
+    choices = response.get("choices") or []
+    message = choices[0].get("message") if choices and isinstance(choices[0], dict) else None
+    content = message.get("content") if isinstance(message, dict) else None
+    return content if isinstance(content, str) else ""
+
+
+def continuation_prompt(prompt: "str | PromptParts", partial: str) -> "str | PromptParts":
+    if isinstance(prompt, PromptParts):
+        # Only the variable part grows, so the cached prefix is reused.
+        return prompt._replace(suffix=continuation_prompt(prompt.suffix, partial))
+    return f"""
+{prompt}
+
+Your previous answer was cut off. This is what you wrote so far:
+<<<
+{partial}
+>>>
+Continue exactly where it stops. Do not repeat anything already written and do not start over.
+Output only the missing remainder.
+""".strip()
+
+
+def join_continuation(partial: str, addition: str) -> str:
+    # Models often restate the last few words; drop the longest repeated overlap.
+    if not addition:
+        return partial
+    limit = min(len(partial), len(addition), _MAX_OVERLAP)
+    for size in range(limit, _MIN_OVERLAP - 1, -1):
+        if partial.endswith(addition[:size]):
+            return partial + addition[size:]
+    return partial + addition
+
+
+def query_with_continuation(
+    prompt: "str | PromptParts",
+    max_tokens: int | None = None,
+    temperature: float | None = None,
+    use_cache: bool = True,
+    mode: str = "other",
+    call_site: str = "",
+    rounds: int = NEMOTRON_CONTINUATION_ROUNDS,
+    json_schema: Dict[str, Any] | None = None,
+    accept: Callable[[str], bool] | None = None,
+) -> Tuple[str, bool]:
+    # Returns (text, still_truncated). Errors on the first call propagate; a
+    # failed continuation just keeps the partial text for salvage_json. The
+    # schema only applies to the first call: a remainder is not a whole object.
+    response = query_nemotron(
+        prompt,
+        max_tokens=max_tokens,
+        temperature=temperature,
+        use_cache=use_cache,
+        mode=mode,
+        call_site=call_site,
+        json_schema=json_schema,
+        accept=accept,
+    )
+    text = _content(response)
+    truncated = is_truncated(response)
+    if not text:
+        return extract_text(response), truncated
+    for _ in range(rounds):
+        if not truncated:
+            break
+        try:
+            llm_deadline.check("continuation")
+            response = query_nemotron(
+                continuation_prompt(prompt, text),
+                max_tokens=NEMOTRON_CONTINUATION_MAX_TOKENS,
+                temperature=temperature,
+                use_cache=False,
+                mode="continuation",
+                call_site=call_site,
+            )
+        except Exception:
+            break
+        text = join_continuation(text, _content(response))
+        truncated = is_truncated(response)
+    return text, truncated
+
+
+def _cut_points(text: str) -> List[Tuple[int, str]]:
+    # Positions where the JSON seen so far ends on a complete value, with the
+    # brackets that would close it there, latest last.
+    points: List[Tuple[int, str]] = []
+    stack: List[str] = []
+    expect_value: List[bool] = []
+    in_string = False
+    escaped = False
+    for index, char in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+                if stack and (stack[-1] == "[" or expect_value[-1]):
+                    points.append((index + 1, "".join(_CLOSERS[c] for c in reversed(stack))))
+            continue
+        if char == '"':
+            in_string = True
+        elif char in "{[":
+            stack.append(char)
+            expect_value.append(False)
+        elif char in "}]":
+            if not stack:
+                break
+            stack.pop()
+            expect_value.pop()
+            if not stack:
+                points.append((index + 1, ""))
+                break
+            points.append((index + 1, "".join(_CLOSERS[c] for c in reversed(stack))))
+        elif char == ":" and stack:
+            expect_value[-1] = True
+        elif char == "," and stack:
+            # Everything before a separator is complete; this also covers numbers and literals.
+            expect_value[-1] = False
+            points.append((index, "".join(_CLOSERS[c] for c in reversed(stack))))
+    return points
+
+
+def salvage_json(text: str) -> Dict[str, Any] | None:
+    # Recovers the complete fields of a JSON object whose tail is missing,
+    # e.g. a completion that stopped at max_tokens mid-string.
+    if not text:
+        return None
+    start = text.find("{")
+    if start == -1:
+        return None
+    body = text[start:]
+    for end, closers in reversed(_cut_points(body)):
+        try:
+            value = json.loads(body[:end] + closers)
+        except ValueError:
+            continue
+        if isinstance(value, dict) and value:
+            return value
+    return None
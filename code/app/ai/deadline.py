@@ -0,0 +1,60 @@
+import os
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator
+
+NEMOTRON_BACKOFF_BASE_S = max(0.0, float(os.getenv("NEMOTRON_BACKOFF_BASE_S", "0.25")))
+NEMOTRON_BACKOFF_MAX_S = max(0.0, float(os.getenv("NEMOTRON_BACKOFF_MAX_S", "4")))
+# An attempt with less budget than this left is not worth starting.
+NEMOTRON_MIN_ATTEMPT_S = max(0.0, float(os.getenv("NEMOTRON_MIN_ATTEMPT_S", "0.5")))
+
+# Absolute time.monotonic() by which the current request's model work must finish.
+_DEADLINE: ContextVar[float | None] = ContextVar("risearc_llm_deadline", default=None)
+
+
+class DeadlineExceeded(TimeoutError):
+    pass
+
+
+@contextmanager
+def deadline(seconds: float | None) -> Iterator[float | None]:
+    # Nested deadlines can only tighten the budget, never extend it.
+    if seconds is None or seconds <= 0:
+        yield _DEADLINE.get()
+        return
+    candidate = time.monotonic() + float(seconds)
+    current = _DEADLINE.get()
+    effective = candidate if current is None else min(current, candidate)
+    token = _DEADLINE.set(effective)
+    try:
+        yield effective
+    finally:
+        _DEADLINE.reset(token)
+
+
+def remaining() -> float | None:
+    current = _DEADLINE.get()
+    if current is None:
+        return None
+    return current - time.monotonic()
+
+
+def budget(default_s: float) -> float:
+    # Time the next call may take: the request deadline if one is set, capped by default_s.
+    left = remaining()
+    return default_s if left is None else min(default_s, left)
+
+
+def check(what: str = "model call") -> float:
+    left = remaining()
+    if left is not None and left <= 0:
+        raise DeadlineExceeded(f"Deadline exceeded: the timeout budget for this {what} is spent.")
+    return left if left is not None else float("inf")
+
+
+def backoff_delay(attempt: int) -> float:
+    # Full jitter: uniform over [0, min(cap, base * 2^attempt)].
+    ceiling = min(NEMOTRON_BACKOFF_MAX_S, NEMOTRON_BACKOFF_BASE_S * (2 ** attempt))
+    return random.uniform(0.0, ceiling)
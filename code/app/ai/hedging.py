@@ -0,0 +1,236 @@
+import asyncio
+import contextvars
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Awaitable, Callable, Deque, Dict
+
+from .telemetry import percentile
+
+NEMOTRON_HEDGE = os.getenv("NEMOTRON_HEDGE", "").lower() in {"1", "true", "yes"}
+NEMOTRON_HEDGE_PERCENTILE = min(0.999, max(0.5, float(os.getenv("NEMOTRON_HEDGE_PERCENTILE", "0.95"))))
+NEMOTRON_HEDGE_MIN_DELAY_S = max(0.0, float(os.getenv("NEMOTRON_HEDGE_MIN_DELAY_S", "0.5")))
+NEMOTRON_HEDGE_MIN_SAMPLES = max(1, int(os.getenv("NEMOTRON_HEDGE_MIN_SAMPLES", "20")))
+NEMOTRON_HEDGE_MAX_RATE = min(1.0, max(0.0, float(os.getenv("NEMOTRON_HEDGE_MAX_RATE", "0.1"))))
+NEMOTRON_HEDGE_RATE_WINDOW_S = max(1.0, float(os.getenv("NEMOTRON_HEDGE_RATE_WINDOW_S", "60")))
+NEMOTRON_HEDGE_WORKERS = max(2, int(os.getenv("NEMOTRON_HEDGE_WORKERS", "8")))
+
+_LATENCY_WINDOW = 256
+
+
+# Decides when a slow call gets a duplicate: after the configured percentile
+# of recent latencies, and only while hedges stay under max_rate of calls in
+# the rate window, so an endpoint that is slow for everyone is not doubled.
+class HedgePolicy:
+    def __init__(
+        self,
+        enabled: bool = NEMOTRON_HEDGE,
+        percentile: float = NEMOTRON_HEDGE_PERCENTILE,
+        min_delay_s: float = NEMOTRON_HEDGE_MIN_DELAY_S,
+        min_samples: int = NEMOTRON_HEDGE_MIN_SAMPLES,
+        max_rate: float = NEMOTRON_HEDGE_MAX_RATE,
+        rate_window_s: float = NEMOTRON_HEDGE_RATE_WINDOW_S,
+    ) -> None:
+        self.enabled = enabled
+        self.percentile = percentile
+        self.min_delay_s = min_delay_s
+        self.min_samples = min_samples
+        self.max_rate = max_rate
+        self.rate_window_s = rate_window_s
+        self._lock = threading.Lock()
+        self._latencies: Deque[float] = deque(maxlen=_LATENCY_WINDOW)
+        self._calls: Deque[float] = deque()
+        self._hedges: Deque[float] = deque()
+        self._calls_total = 0
+        self._issued_total = 0
+        self._won_total = 0
+        self._denied_total = 0
+
+    def observe(self, latency_s: float) -> None:
+        with self._lock:
+            self._latencies.append(float(latency_s))
+
+    def _trim(self, now: float) -> None:
+        cutoff = now - self.rate_window_s
+        while self._calls and self._calls[0] < cutoff:
+            self._calls.popleft()
+        while self._hedges and self._hedges[0] < cutoff:
+            self._hedges.popleft()
+
+    def _delay_locked(self) -> float | None:
+        if len(self._latencies) < self.min_samples:
+            return None
+        return max(self.min_delay_s, percentile(self._latencies, self.percentile))
+
+    def begin_call(self) -> float | None:
+        # Returns how long to wait before hedging, or None when this call must not hedge.
+        if not self.enabled:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            self._trim(now)
+            self._calls.append(now)
+            self._calls_total += 1
+            return self._delay_locked()
+
+    def try_hedge(self) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            self._trim(now)
+            if len(self._hedges) + 1 > self.max_rate * max(1, len(self._calls)):
+                self._denied_total += 1
+                return False
+            self._hedges.append(now)
+            self._issued_total += 1
+            return True
+
+    def record_win(self) -> None:
+        with self._lock:
+            self._won_total += 1
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            delay = self._delay_locked()
+            return {
+                "enabled": 1.0 if self.enabled else 0.0,
+                "delay_s": delay if delay is not None else 0.0,
+                "calls_total": float(self._calls_total),
+                "hedges_issued_total": float(self._issued_total),
+                "hedges_won_total": float(self._won_total),
+                "hedges_denied_total": float(self._denied_total),
+            }
+
+
+_POOL_LOCK = threading.Lock()
+_POOL: ThreadPoolExecutor | None = None
+
+
+def _get_pool() -> ThreadPoolExecutor:
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = ThreadPoolExecutor(max_workers=NEMOTRON_HEDGE_WORKERS, thread_name_prefix="llm-hedge")
+        return _POOL
+
+
+# Handed to each attempt of a hedged call. The attempt registers how to abort
+# its request (e.g. closing the response it is reading) once it has one;
+# cancelling the loser runs that from the winner's thread, so the loser gives
+# back its connection and hedge thread instead of reading an unwanted answer.
+class HedgeAttempt:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._cancelled = False
+        self._abort: Callable[[], None] | None = None
+
+    def on_cancel(self, abort: Callable[[], None]) -> None:
+        with self._lock:
+            self._abort = abort
+            cancelled = self._cancelled
+        if cancelled:
+            abort()
+
+    def cancel(self) -> None:
+        with self._lock:
+            self._cancelled = True
+            abort = self._abort
+        if abort is not None:
+            try:
+                abort()
+            except Exception:
+                pass
+
+    def cancelled(self) -> bool:
+        with self._lock:
+            return self._cancelled
+
+
+def _timed(fn: Callable[[HedgeAttempt | None], Any], attempt: HedgeAttempt | None, policy: HedgePolicy) -> Any:
+    started = time.perf_counter()
+    result = fn(attempt)
+    if attempt is None or not attempt.cancelled():
+        # A cut-short loser says nothing about how long the endpoint takes.
+        policy.observe(time.perf_counter() - started)
+    return result
+
+
+def _submit(fn: Callable[[HedgeAttempt | None], Any], attempt: HedgeAttempt, policy: HedgePolicy) -> Future:
+    return _get_pool().submit(contextvars.copy_context().run, _timed, fn, attempt, policy)
+
+
+def run_hedged(fn: Callable[[HedgeAttempt | None], Any], policy: HedgePolicy) -> Any:
+    # fn(attempt) makes the call; attempt is None when this call cannot hedge,
+    # so it can skip whatever it does to stay cancellable.
+    delay = policy.begin_call()
+    if delay is None:
+        return _timed(fn, None, policy)
+    primary_attempt = HedgeAttempt()
+    primary = _submit(fn, primary_attempt, policy)
+    try:
+        return primary.result(timeout=delay)
+    except FutureTimeoutError:
+        pass
+    if not policy.try_hedge():
+        return primary.result()
+    hedge_attempt = HedgeAttempt()
+    hedge = _submit(fn, hedge_attempt, policy)
+    attempts = {primary: primary_attempt, hedge: hedge_attempt}
+    pending = {primary, hedge}
+    error: BaseException | None = None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is None:
+                if future is hedge:
+                    policy.record_win()
+                for other in pending:
+                    other.cancel()
+                    attempts[other].cancel()
+                return future.result()
+            error = future.exception()
+    assert error is not None
+    raise error
+
+
+async def _timed_async(fn: Callable[[], Awaitable[Any]], policy: HedgePolicy) -> Any:
+    started = time.perf_counter()
+    result = await fn()
+    policy.observe(time.perf_counter() - started)
+    return result
+
+
+async def run_hedged_async(fn: Callable[[], Awaitable[Any]], policy: HedgePolicy) -> Any:
+    delay = policy.begin_call()
+    if delay is None:
+        return await _timed_async(fn, policy)
+    primary = asyncio.ensure_future(_timed_async(fn, policy))
+    tasks = {primary}
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=delay)
+        if done or not policy.try_hedge():
+            return await primary
+        hedge = asyncio.ensure_future(_timed_async(fn, policy))
+        tasks.add(hedge)
+        pending = set(tasks)
+        error: BaseException | None = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    if task is hedge:
+                        policy.record_win()
+                    return task.result()
+                error = task.exception()
+        assert error is not None
+        raise error
+    finally:
+        # Cancelling the loser closes its connection instead of letting it run on.
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+
+
+NEMOTRON_HEDGE_POLICY = HedgePolicy()
@@ -1,13 +1,25 @@
+import asyncio
 import os
-from typing import Any, Dict
+import threading
+import time
+import weakref
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, Iterator, List, Tuple
 from urllib.parse import urlparse, urlunparse
 
-import requests
+from . import deadline as llm_deadline
+from .backends import get_backend
+from .budgets import LLM_BUDGETS
+from .circuit_breaker import CLOSED, NEMOTRON_BREAKER, CircuitOpenError
+from .hedging import NEMOTRON_HEDGE_POLICY, HedgeAttempt, run_hedged, run_hedged_async
+from .prompt_layout import PromptParts, build_messages
+from .response_cache import RESPONSE_CACHE, cache_key
+from .routing import NEMOTRON_ROUTES, ModelRoute, RouteTable, route_from_env
+from .telemetry import LLM_TELEMETRY, usage_tokens
+from .telemetry import finish_reason as telemetry_finish_reason
 
-try:
-    from openai import OpenAI
-except Exception:  # pragma: no cover - handled at runtime
-    OpenAI = None
+if TYPE_CHECKING:  # pragma: no cover - typing only
+    from openai import AsyncOpenAI, OpenAI
 
 NIM_BASE_URL = os.getenv("NIM_BASE_URL", "https://integrate.api.nvidia.com/v1")
 NEMOTRON_MODEL = os.getenv("NEMOTRON_MODEL", "nvidia/nemotron-3-nano-30b-a3b")
@@ -16,10 +28,48 @@ NEMOTRON_HEALTH_TIMEOUT = float(os.getenv("NEMOTRON_HEALTH_TIMEOUT", "1.0"))
 NEMOTRON_MAX_RETRIES = max(0, int(os.getenv("NEMOTRON_MAX_RETRIES", "0")))
 NEMOTRON_API_KEY = os.getenv("NVIDIA_API_KEY") or os.getenv("NEMOTRON_API_KEY") or os.getenv("OPENAI_API_KEY")
 NEMOTRON_DEFAULT_MAX_TOKENS = int(os.getenv("NEMOTRON_DEFAULT_MAX_TOKENS", "800"))
+NEMOTRON_POOL_SIZE = max(1, int(os.getenv("NEMOTRON_POOL_SIZE", "20")))
+NEMOTRON_KEEPALIVE_EXPIRY = float(os.getenv("NEMOTRON_KEEPALIVE_EXPIRY", "120"))
+NEMOTRON_CONNECT_TIMEOUT = float(os.getenv("NEMOTRON_CONNECT_TIMEOUT", "5"))
+NEMOTRON_HTTP2 = os.getenv("NEMOTRON_HTTP2", "").lower() in {"1", "true", "yes"}
+_REASONING_BUDGET_ENV = os.getenv("NEMOTRON_REASONING_BUDGET")
+NEMOTRON_REASONING_BUDGET = int(_REASONING_BUDGET_ENV) if _REASONING_BUDGET_ENV else 0
+NEMOTRON_ENABLE_THINKING = os.getenv("NEMOTRON_ENABLE_THINKING", "").lower() in {"1", "true", "yes"}
+# How JSON schemas are sent for structured calls: "response_format" (OpenAI
+# json_schema), "guided_json" (NIM/vLLM guided decoding) or "off".
+NEMOTRON_GUIDED_DECODING = os.getenv("NEMOTRON_GUIDED_DECODING", "response_format").strip().lower()
+NEMOTRON_EXTRA_BODY: Dict[str, Any] = {
+    "reasoning_budget": NEMOTRON_REASONING_BUDGET,
+    "chat_template_kwargs": {"enable_thinking": NEMOTRON_ENABLE_THINKING},
+}
 
+# The main model. Extra routes (app.ai.routing) send chosen modes or call
+# sites to other models or endpoints and inherit whatever they do not set.
+DEFAULT_ROUTE = ModelRoute(
+    name="default",
+    model=NEMOTRON_MODEL,
+    base_url=NIM_BASE_URL,
+    api_key=NEMOTRON_API_KEY,
+    timeout=NEMOTRON_TIMEOUT,
+    max_tokens=NEMOTRON_DEFAULT_MAX_TOKENS,
+    pool_size=NEMOTRON_POOL_SIZE,
+    breaker=NEMOTRON_BREAKER,
+    hedge_policy=NEMOTRON_HEDGE_POLICY,
+)
+NEMOTRON_ROUTER = RouteTable(DEFAULT_ROUTE, [route_from_env(name, DEFAULT_ROUTE) for name in NEMOTRON_ROUTES])
 
-def _base_url() -> str:
-    parsed = urlparse(NIM_BASE_URL)
+_CLIENT_LOCK = threading.Lock()
+# Set once the endpoint rejects a schema, so later calls skip it instead of failing twice.
+_GUIDED_REJECTED = False
+# Clients and connection pools are per route, keyed by route name.
+_HTTP_CLIENTS: Dict[str, Any] = {}
+_CLIENTS: "Dict[str, OpenAI]" = {}
+# Async clients hold loop-bound connections, so keep one (client, pool) pair per event loop.
+_ASYNC_CLIENTS: "Dict[str, weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Tuple[AsyncOpenAI, Any]]]" = {}
+
+
+def _base_url(url: str = NIM_BASE_URL) -> str:
+    parsed = urlparse(url)
     path = parsed.path.rstrip("/")
     if path.endswith("/chat/completions"):
         path = path[: -len("/chat/completions")]
@@ -29,65 +79,859 @@ def _base_url() -> str:
     return urlunparse(base)
 
 
-def _get_client() -> OpenAI | None:
-    if OpenAI is None:
+# openai (and httpx under it) take most of the API's import time, so they are
+# loaded on first use (or by warmup() at startup) instead of at module import.
+@lru_cache(maxsize=1)
+def _openai_class() -> Any:
+    try:
+        from openai import OpenAI
+    except Exception:  # pragma: no cover - handled at runtime
         return None
-    return OpenAI(base_url=_base_url(), api_key=NEMOTRON_API_KEY, max_retries=NEMOTRON_MAX_RETRIES)
+    return OpenAI
 
 
-def check_nemotron_online(timeout: float | None = None) -> bool:
-    base = _base_url().rstrip("/")
-    health_timeout = timeout if timeout is not None else NEMOTRON_HEALTH_TIMEOUT
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except Exception:
+        return False
+    return True
+
+
+def _get_http_client(route: ModelRoute = DEFAULT_ROUTE) -> Any:
+    # One keep-alive connection pool per route and process, shared by completions
+    # and health probes, so calls skip TCP/TLS setup after the first request.
+    http_client = _HTTP_CLIENTS.get(route.name)
+    if http_client is not None:
+        return http_client
+    from openai import DefaultHttpxClient
+
+    with _CLIENT_LOCK:
+        if route.name not in _HTTP_CLIENTS:
+            _HTTP_CLIENTS[route.name] = DefaultHttpxClient(**_httpx_settings(route))
+    return _HTTP_CLIENTS[route.name]
+
+
+def _httpx_settings(route: ModelRoute = DEFAULT_ROUTE) -> Dict[str, Any]:
+    import httpx
+
+    return {
+        "limits": httpx.Limits(
+            max_connections=route.pool_size,
+            max_keepalive_connections=route.pool_size,
+            keepalive_expiry=NEMOTRON_KEEPALIVE_EXPIRY,
+        ),
+        "timeout": httpx.Timeout(route.timeout, connect=NEMOTRON_CONNECT_TIMEOUT),
+        "http2": NEMOTRON_HTTP2 and _http2_available(),
+    }
+
+
+def _get_client(route: ModelRoute = DEFAULT_ROUTE) -> "OpenAI | None":
+    client = _CLIENTS.get(route.name)
+    if client is not None:
+        return client
+    openai_class = _openai_class()
+    if openai_class is None:
+        return None
+    http_client = _get_http_client(route)
+    with _CLIENT_LOCK:
+        if route.name not in _CLIENTS:
+            _CLIENTS[route.name] = openai_class(
+                base_url=_base_url(route.base_url),
+                api_key=route.api_key,
+                # Retries are handled here so they can respect the caller's deadline.
+                max_retries=0,
+                http_client=http_client,
+            )
+    return _CLIENTS[route.name]
+
+
+def _get_async_clients(route: ModelRoute = DEFAULT_ROUTE) -> "Tuple[AsyncOpenAI, Any] | None":
+    if _openai_class() is None:
+        return None
+    loop = asyncio.get_running_loop()
+    clients = _ASYNC_CLIENTS.get(route.name, {}).get(loop)
+    if clients is not None:
+        return clients
+    from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+    with _CLIENT_LOCK:
+        per_loop = _ASYNC_CLIENTS.setdefault(route.name, weakref.WeakKeyDictionary())
+        clients = per_loop.get(loop)
+        if clients is None:
+            http_client = DefaultAsyncHttpxClient(**_httpx_settings(route))
+            client = AsyncOpenAI(
+                base_url=_base_url(route.base_url),
+                api_key=route.api_key,
+                # Retries are handled here so they can respect the caller's deadline.
+                max_retries=0,
+                http_client=http_client,
+            )
+            clients = (client, http_client)
+            per_loop[loop] = clients
+    return clients
+
+
+def warmup() -> None:
+    if _openai_class() is None:
+        return
+    for route in [DEFAULT_ROUTE, *NEMOTRON_ROUTER.routes]:
+        _get_http_client(route)
+        if route.api_key:
+            _get_client(route)
+
+
+def _health_request() -> Tuple[str, Dict[str, str]]:
     headers = {"Authorization": f"Bearer {NEMOTRON_API_KEY}"} if NEMOTRON_API_KEY else {}
-    # Check likely model listing endpoints first to keep status checks fast.
-    paths = []
-    for path in ("/models", "/v1/models", "/health"):
-        if path not in paths:
-            paths.append(path)
-    for path in paths:
-        try:
-            resp = requests.get(f"{base}{path}", timeout=health_timeout, headers=headers)
-            # Any non-5xx HTTP response means the endpoint is reachable.
-            if resp.ok or resp.status_code < 500:
-                return True
-        except Exception:
-            continue
-    return False
+    return f"{_base_url().rstrip('/')}/models", headers
 
 
-def query_nemotron(
-    prompt: str,
+def _is_endpoint_failure(exc: BaseException) -> bool:
+    # 4xx answers mean the endpoint is up and rejected this request; only
+    # transport errors, timeouts, overload and 5xx count against the breaker.
+    status = getattr(exc, "status_code", None)
+    if isinstance(status, int):
+        return status >= 500 or status == 429
+    return True
+
+
+def _is_timeout(exc: BaseException) -> bool:
+    return isinstance(exc, TimeoutError) or "timeout" in type(exc).__name__.lower()
+
+
+def _cut_short_by_caller(exc: BaseException, latency: float, route: ModelRoute, caller_bound: bool) -> bool:
+    # A timeout that only happened because the caller's own deadline was
+    # tighter than the route's timeout (or DeadlineExceeded, which only the
+    # caller's deadline raises) says nothing about the endpoint, unless the
+    # attempt already ran longer than the breaker's slow-call threshold.
+    if isinstance(exc, llm_deadline.DeadlineExceeded):
+        caller_bound = True
+    if not caller_bound or not _is_timeout(exc):
+        return False
+    slow_call_s = route.breaker.slow_call_s
+    return slow_call_s <= 0 or latency <= slow_call_s
+
+
+def _caller_bound(route: ModelRoute) -> bool:
+    left = llm_deadline.remaining()
+    return left is not None and left < route.timeout
+
+
+def _before_call(route: ModelRoute = DEFAULT_ROUTE) -> float:
+    if not route.breaker.allow_request():
+        raise CircuitOpenError("Nemotron endpoint is unavailable (circuit open). Retrying shortly.")
+    return time.perf_counter()
+
+
+def _after_call(
+    started: float,
+    exc: BaseException | None = None,
+    route: ModelRoute = DEFAULT_ROUTE,
+    caller_bound: bool = False,
+) -> None:
+    latency = time.perf_counter() - started
+    if exc is None or not _is_endpoint_failure(exc):
+        route.breaker.record_success(latency)
+    elif _cut_short_by_caller(exc, latency, route, caller_bound):
+        # Neither outcome is known; let the next caller probe instead.
+        route.breaker.release_probe()
+    else:
+        route.breaker.record_failure(latency)
+
+
+def _should_retry(exc: BaseException, attempt: int) -> float | None:
+    # Returns the backoff before the next attempt, or None to give up. Only
+    # transient endpoint failures are retried, and only while the remaining
+    # budget still covers the backoff plus a useful attempt.
+    if attempt >= NEMOTRON_MAX_RETRIES or not _is_endpoint_failure(exc):
+        return None
+    delay = llm_deadline.backoff_delay(attempt)
+    left = llm_deadline.remaining()
+    if left is not None and left - delay < llm_deadline.NEMOTRON_MIN_ATTEMPT_S:
+        return None
+    return delay
+
+
+def _call_with_retries(call: Callable[[float], Any], route: ModelRoute = DEFAULT_ROUTE) -> Any:
+    # Without a caller deadline the whole call, retries included, gets the route's timeout.
+    caller_bound = _caller_bound(route)
+    with llm_deadline.deadline(route.timeout):
+        attempt = 0
+        while True:
+            timeout = llm_deadline.check()
+            started = _before_call(route)
+            try:
+                response = call(timeout)
+            except Exception as exc:
+                _after_call(started, exc, route, caller_bound)
+                delay = _should_retry(exc, attempt)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                attempt += 1
+                continue
+            _after_call(started, route=route)
+            return response
+
+
+async def _call_with_retries_async(call: Callable[[float], Awaitable[Any]], route: ModelRoute = DEFAULT_ROUTE) -> Any:
+    caller_bound = _caller_bound(route)
+    with llm_deadline.deadline(route.timeout):
+        attempt = 0
+        while True:
+            timeout = llm_deadline.check()
+            started = _before_call(route)
+            try:
+                response = await call(timeout)
+            except asyncio.CancelledError:
+                # A cancelled call says nothing about the endpoint.
+                route.breaker.release_probe()
+                raise
+            except Exception as exc:
+                _after_call(started, exc, route, caller_bound)
+                delay = _should_retry(exc, attempt)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                attempt += 1
+                continue
+            _after_call(started, route=route)
+            return response
+
+
+def _record_probe(started: float, status_code: int | None) -> bool:
+    online = status_code is not None and status_code < 500
+    if online:
+        NEMOTRON_BREAKER.record_success(time.perf_counter() - started)
+    else:
+        NEMOTRON_BREAKER.record_failure(time.perf_counter() - started)
+    return online
+
+
+def _claim_probe() -> bool | None:
+    # Closed: trust the outcomes of real calls, no I/O. Open: fail fast until the
+    # cool-down ends, then let exactly one caller through as the half-open probe.
+    if NEMOTRON_BREAKER.state == CLOSED:
+        return True
+    if not NEMOTRON_BREAKER.probe_due() or not NEMOTRON_BREAKER.allow_request():
+        return False
+    return None
+
+
+def check_nim_online(timeout: float | None = None) -> bool:
+    if _openai_class() is None:
+        return False
+    claimed = _claim_probe()
+    if claimed is not None:
+        return claimed
+    url, headers = _health_request()
+    started = time.perf_counter()
+    try:
+        resp = _get_http_client().get(
+            url, timeout=timeout if timeout is not None else NEMOTRON_HEALTH_TIMEOUT, headers=headers
+        )
+    except Exception:
+        return _record_probe(started, None)
+    return _record_probe(started, resp.status_code)
+
+
+async def check_nim_online_async(timeout: float | None = None) -> bool:
+    clients = _get_async_clients()
+    if clients is None:
+        return False
+    claimed = _claim_probe()
+    if claimed is not None:
+        return claimed
+    url, headers = _health_request()
+    started = time.perf_counter()
+    try:
+        resp = await clients[1].get(
+            url, timeout=timeout if timeout is not None else NEMOTRON_HEALTH_TIMEOUT, headers=headers
+        )
+    except Exception:
+        return _record_probe(started, None)
+    return _record_probe(started, resp.status_code)
+
+
+def _completion_kwargs(
+    prompt: "str | PromptParts",
+    max_tokens: int | None,
+    temperature: float | None,
+    reasoning_budget: int | None = None,
+    json_schema: Dict[str, Any] | None = None,
+    route: ModelRoute = DEFAULT_ROUTE,
+) -> Dict[str, Any]:
+    token_limit = int(max_tokens) if max_tokens is not None else route.max_tokens
+    extra_body = NEMOTRON_EXTRA_BODY
+    if reasoning_budget is not None:
+        extra_body = {**NEMOTRON_EXTRA_BODY, "reasoning_budget": int(reasoning_budget)}
+    if json_schema is not None and _guided_enabled():
+        extra_body = {**extra_body, **_guided_body(json_schema)}
+    return {
+        "model": route.model,
+        "messages": build_messages(prompt),
+        "temperature": 0.2 if temperature is None else float(temperature),
+        "max_tokens": token_limit,
+        "extra_body": extra_body,
+        "timeout": route.timeout,
+    }
+
+
+def _guided_enabled() -> bool:
+    return NEMOTRON_GUIDED_DECODING in {"response_format", "guided_json"} and not _GUIDED_REJECTED
+
+
+def _guided_body(json_schema: Dict[str, Any]) -> Dict[str, Any]:
+    # Sent through extra_body either way, so the response cache key covers the schema.
+    if NEMOTRON_GUIDED_DECODING == "guided_json":
+        return {"guided_json": json_schema}
+    name = str(json_schema.get("title") or "response")
+    return {"response_format": {"type": "json_schema", "json_schema": {"name": name, "schema": json_schema}}}
+
+
+def _guided_rejected(kwargs: Dict[str, Any], exc: BaseException) -> bool:
+    # An endpoint without structured-output support answers 400/422; drop the
+    # schema for this process and let the caller resend the plain request.
+    global _GUIDED_REJECTED
+    extra_body = kwargs.get("extra_body") or {}
+    if "guided_json" not in extra_body and "response_format" not in extra_body:
+        return False
+    if getattr(exc, "status_code", None) not in {400, 422}:
+        return False
+    _GUIDED_REJECTED = True
+    return True
+
+
+def _response_dict(response: Any) -> Dict[str, Any]:
+    try:
+        return response.model_dump()
+    except AttributeError:
+        return response  # type: ignore[return-value]
+
+
+def _cacheable(response: Dict[str, Any], accept: Callable[[str], bool] | None = None) -> bool:
+    # Only keep complete answers; empty or truncated ones, and ones the caller's
+    # guardrail would throw away, should be retried next time.
+    choices = response.get("choices") or []
+    if not choices or choices[0].get("finish_reason") == "length":
+        return False
+    text = extract_text(response)
+    return bool(text) and (accept is None or accept(text))
+
+
+def _cache_key_for(kwargs: Dict[str, Any], use_cache: bool) -> str | None:
+    return cache_key(kwargs) if use_cache and RESPONSE_CACHE.enabled else None
+
+
+def _until_cancelled(chunks: Any, attempt: HedgeAttempt) -> Iterator[Any]:
+    try:
+        for chunk in chunks:
+            if attempt.cancelled():
+                return
+            yield chunk
+    finally:
+        chunks.close()
+
+
+def _create_completion(client: Any, request: Dict[str, Any], route: ModelRoute, attempt: HedgeAttempt | None) -> Any:
+    if attempt is None:
+        return client.chat.completions.create(**request)
+    # A hedged attempt streams: the open response is a handle the winner can
+    # close, and the loser also stops at its next chunk. _call_with_retries
+    # already records breaker outcomes for the whole call. The stream's
+    # timings (TTFT from the request being sent) stay on the response.
+    started = time.perf_counter()
+    chunks = client.chat.completions.create(**request, stream=True, stream_options={"include_usage": True})
+    attempt.on_cancel(chunks.close)
+    stream = NemotronStream(_until_cancelled(chunks, attempt), started, route=route, record_failures=False)
+    return stream.consume().response()
+
+
+def query_nim(
+    prompt: "str | PromptParts",
     max_tokens: int | None = None,
     temperature: float | None = None,
+    use_cache: bool = True,
+    reasoning_budget: int | None = None,
+    json_schema: Dict[str, Any] | None = None,
+    route: ModelRoute | None = None,
+    accept: Callable[[str], bool] | None = None,
 ) -> Dict[str, Any]:
-    client = _get_client()
+    route = route or DEFAULT_ROUTE
+    if not route.api_key:
+        raise RuntimeError("Missing NVIDIA_API_KEY. Set the environment variable and restart the app.")
+    client = _get_client(route)
     if client is None:
         raise RuntimeError("OpenAI client is unavailable. Install the openai package.")
-    if not NEMOTRON_API_KEY:
+
+    kwargs = _completion_kwargs(prompt, max_tokens, temperature, reasoning_budget, json_schema, route)
+    key = _cache_key_for(kwargs, use_cache)
+    if key is not None:
+        cached = RESPONSE_CACHE.get(key)
+        if cached is not None:
+            cached["cached"] = True
+            return cached
+
+    def send(request: Dict[str, Any]) -> Any:
+        return _call_with_retries(
+            lambda timeout: run_hedged(
+                lambda attempt: _create_completion(client, {**request, "timeout": timeout}, route, attempt),
+                route.hedge_policy,
+            ),
+            route,
+        )
+
+    try:
+        response = send(kwargs)
+    except Exception as exc:
+        if not _guided_rejected(kwargs, exc):
+            raise
+        response = send(_completion_kwargs(prompt, max_tokens, temperature, reasoning_budget, route=route))
+    result = _response_dict(response)
+    # Only a hedged (streamed) attempt has timings; they describe this call, not a replay.
+    timings = result.pop("timings", None)
+    if key is not None and _cacheable(result, accept):
+        RESPONSE_CACHE.put(key, result)
+    if timings is not None:
+        result["timings"] = timings
+    return result
+
+
+async def query_nim_async(
+    prompt: "str | PromptParts",
+    max_tokens: int | None = None,
+    temperature: float | None = None,
+    use_cache: bool = True,
+    reasoning_budget: int | None = None,
+    json_schema: Dict[str, Any] | None = None,
+    route: ModelRoute | None = None,
+    accept: Callable[[str], bool] | None = None,
+) -> Dict[str, Any]:
+    route = route or DEFAULT_ROUTE
+    if not route.api_key:
         raise RuntimeError("Missing NVIDIA_API_KEY. Set the environment variable and restart the app.")
+    clients = _get_async_clients(route)
+    if clients is None:
+        raise RuntimeError("OpenAI client is unavailable. Install the openai package.")
 
-    extra_body: Dict[str, Any] = {}
-    reasoning_budget = os.getenv("NEMOTRON_REASONING_BUDGET")
-    if reasoning_budget is None or reasoning_budget == "":
-        extra_body["reasoning_budget"] = 0
-    else:
-        extra_body["reasoning_budget"] = int(reasoning_budget)
-    enable_thinking = os.getenv("NEMOTRON_ENABLE_THINKING", "").lower() in {"1", "true", "yes"}
-    extra_body["chat_template_kwargs"] = {"enable_thinking": enable_thinking}
-
-    token_limit = int(max_tokens) if max_tokens is not None else NEMOTRON_DEFAULT_MAX_TOKENS
-    response = client.chat.completions.create(
-        model=NEMOTRON_MODEL,
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.2 if temperature is None else float(temperature),
-        max_tokens=token_limit,
-        extra_body=extra_body,
-        timeout=NEMOTRON_TIMEOUT,
+    kwargs = _completion_kwargs(prompt, max_tokens, temperature, reasoning_budget, json_schema, route)
+    key = _cache_key_for(kwargs, use_cache)
+    if key is not None:
+        cached = await asyncio.to_thread(RESPONSE_CACHE.get, key)
+        if cached is not None:
+            cached["cached"] = True
+            return cached
+
+    async def send(request: Dict[str, Any]) -> Any:
+        return await _call_with_retries_async(
+            lambda timeout: run_hedged_async(
+                lambda: clients[0].chat.completions.create(**{**request, "timeout": timeout}), route.hedge_policy
+            ),
+            route,
+        )
+
+    try:
+        response = await send(kwargs)
+    except Exception as exc:
+        if not _guided_rejected(kwargs, exc):
+            raise
+        response = await send(_completion_kwargs(prompt, max_tokens, temperature, reasoning_budget, route=route))
+    result = _response_dict(response)
+    if key is not None and _cacheable(result, accept):
+        await asyncio.to_thread(RESPONSE_CACHE.put, key, result)
+    return result
+
+
+class NemotronStream:
+    # Iterating yields text deltas as they arrive; afterwards ttft_s, total_s,
+    # tokens_per_s and response() describe the finished completion.
+    def __init__(
+        self,
+        chunks: Any,
+        started: float,
+        cache_key: str | None = None,
+        deadline_s: float | None = None,
+        route: ModelRoute | None = None,
+        accept: Callable[[str], bool] | None = None,
+        record_failures: bool = True,
+    ) -> None:
+        self._chunks = chunks
+        self._started = started
+        self._route = route or DEFAULT_ROUTE
+        self._deadline = None if deadline_s is None else time.perf_counter() + deadline_s
+        self._caller_bound = deadline_s is not None and deadline_s < self._route.timeout
+        self._cache_key = cache_key
+        self._accept = accept
+        self._record_failures = record_failures
+        self.cached = False
+        self._parts: List[str] = []
+        self._reasoning_parts: List[str] = []
+        self.ttft_s: float | None = None
+        self.total_s: float | None = None
+        self.finish_reason: str | None = None
+        self.usage: Dict[str, Any] | None = None
+        self.chunk_count = 0
+        self.model = self._route.model
+        self.error: BaseException | None = None
+        self._done_callbacks: List[Callable[["NemotronStream"], None]] = []
+
+    def add_done_callback(self, callback: Callable[["NemotronStream"], None]) -> None:
+        self._done_callbacks.append(callback)
+
+    def __iter__(self) -> Iterator[str]:
+        try:
+            for chunk in self._chunks:
+                if self._deadline is not None and time.perf_counter() > self._deadline:
+                    self.finish_reason = "deadline"
+                    raise llm_deadline.DeadlineExceeded(
+                        "Deadline exceeded: the timeout budget for this streamed completion is spent."
+                    )
+                data = _response_dict(chunk)
+                if data.get("model"):
+                    self.model = data["model"]
+                if data.get("usage"):
+                    self.usage = data["usage"]
+                for choice in data.get("choices") or []:
+                    delta = choice.get("delta") or {}
+                    if choice.get("finish_reason"):
+                        self.finish_reason = choice["finish_reason"]
+                    reasoning = delta.get("reasoning_content") or delta.get("reasoning")
+                    if isinstance(reasoning, str) and reasoning:
+                        self._reasoning_parts.append(reasoning)
+                    content = delta.get("content")
+                    if isinstance(content, str) and content:
+                        if self.ttft_s is None:
+                            self.ttft_s = time.perf_counter() - self._started
+                        self.chunk_count += 1
+                        self._parts.append(content)
+                        yield content
+            if self._cache_key is not None and not self.cached:
+                response = self.response()
+                if _cacheable(response, self._accept):
+                    response.pop("timings", None)
+                    RESPONSE_CACHE.put(self._cache_key, response)
+        except Exception as exc:
+            self.error = exc
+            if self._record_failures and _is_endpoint_failure(exc):
+                latency = time.perf_counter() - self._started
+                if _cut_short_by_caller(exc, latency, self._route, self._caller_bound):
+                    self._route.breaker.release_probe()
+                else:
+                    self._route.breaker.record_failure(latency)
+            raise
+        finally:
+            self.total_s = time.perf_counter() - self._started
+            close = getattr(self._chunks, "close", None)
+            if callable(close):
+                close()
+            for callback in self._done_callbacks:
+                callback(self)
+
+    @classmethod
+    def from_response(cls, response: Dict[str, Any], cached: bool = True) -> "NemotronStream":
+        # Replays a finished completion (cached, or from an in-process backend)
+        # as a single chunk so callers keep one code path.
+        choice = (response.get("choices") or [{}])[0]
+        chunk = {
+            "model": response.get("model"),
+            "usage": response.get("usage"),
+            "choices": [
+                {
+                    "index": 0,
+                    "delta": dict(choice.get("message") or {}),
+                    "finish_reason": choice.get("finish_reason"),
+                }
+            ],
+        }
+        stream = cls([chunk], time.perf_counter())
+        stream.cached = cached
+        return stream
+
+    def consume(self) -> "NemotronStream":
+        for _ in self:
+            pass
+        return self
+
+    @property
+    def text(self) -> str:
+        return "".join(self._parts)
+
+    @property
+    def completion_tokens(self) -> int:
+        if self.usage and self.usage.get("completion_tokens"):
+            return int(self.usage["completion_tokens"])
+        # Without usage from the server, one content chunk is roughly one token.
+        return self.chunk_count
+
+    @property
+    def tokens_per_s(self) -> float:
+        if self.total_s is None or self.ttft_s is None:
+            return 0.0
+        generation_s = self.total_s - self.ttft_s
+        if generation_s <= 0:
+            return 0.0
+        return self.completion_tokens / generation_s
+
+    def response(self) -> Dict[str, Any]:
+        message: Dict[str, Any] = {"role": "assistant", "content": self.text}
+        if self._reasoning_parts:
+            message["reasoning_content"] = "".join(self._reasoning_parts)
+        return {
+            "object": "chat.completion",
+            "model": self.model,
+            "choices": [{"index": 0, "message": message, "finish_reason": self.finish_reason}],
+            "usage": self.usage,
+            **({"cached": True} if self.cached else {}),
+            "timings": {
+                "ttft_s": self.ttft_s,
+                "total_s": self.total_s,
+                "tokens_per_s": self.tokens_per_s,
+            },
+        }
+
+
+def stream_nim(
+    prompt: "str | PromptParts",
+    max_tokens: int | None = None,
+    temperature: float | None = None,
+    use_cache: bool = True,
+    reasoning_budget: int | None = None,
+    json_schema: Dict[str, Any] | None = None,
+    route: ModelRoute | None = None,
+    accept: Callable[[str], bool] | None = None,
+) -> NemotronStream:
+    route = route or DEFAULT_ROUTE
+    if not route.api_key:
+        raise RuntimeError("Missing NVIDIA_API_KEY. Set the environment variable and restart the app.")
+    client = _get_client(route)
+    if client is None:
+        raise RuntimeError("OpenAI client is unavailable. Install the openai package.")
+
+    kwargs = _completion_kwargs(prompt, max_tokens, temperature, reasoning_budget, json_schema, route)
+    key = _cache_key_for(kwargs, use_cache)
+    if key is not None:
+        cached = RESPONSE_CACHE.get(key)
+        if cached is not None:
+            return NemotronStream.from_response(cached)
+
+    # The request deadline (if any) also bounds the token stream; the per-read
+    # timeout on each attempt keeps the route's timeout cap.
+    stream_deadline = llm_deadline.remaining()
+    started = time.perf_counter()
+    # Headers arrived once create() returns; mid-stream drops are recorded while iterating.
+    def send(request: Dict[str, Any]) -> Any:
+        return _call_with_retries(
+            lambda timeout: client.chat.completions.create(
+                **{**request, "timeout": timeout},
+                stream=True,
+                stream_options={"include_usage": True},
+            ),
+            route,
+        )
+
+    try:
+        chunks = send(kwargs)
+    except Exception as exc:
+        if not _guided_rejected(kwargs, exc):
+            raise
+        chunks = send(_completion_kwargs(prompt, max_tokens, temperature, reasoning_budget, route=route))
+    return NemotronStream(chunks, started, cache_key=key, deadline_s=stream_deadline, route=route, accept=accept)
+
+
+# Public entry points: route to the backend selected by LLM_BACKEND (see
+# app.ai.backends), and log every call to LLM_TELEMETRY. mode and call_site
+# pick the model route (app.ai.routing) and the learned token budget
+# (app.ai.budgets), and both label the telemetry; accept(text) keeps answers the
+# caller would reject out of the response cache. The *_nim functions above are
+# the HTTP path.
+def check_nemotron_online(timeout: float | None = None) -> bool:
+    return get_backend().available(timeout)
+
+
+async def check_nemotron_online_async(timeout: float | None = None) -> bool:
+    return await get_backend().available_async(timeout)
+
+
+def _record_call(
+    mode: str,
+    call_site: str,
+    backend: str,
+    started: float,
+    response: Dict[str, Any] | None = None,
+    error: BaseException | None = None,
+) -> None:
+    latency_s = time.perf_counter() - started
+    cached = bool(response and response.get("cached"))
+    tokens = usage_tokens(response)
+    LLM_TELEMETRY.record(
+        mode=mode,
+        call_site=call_site,
+        backend=backend,
+        latency_s=latency_s,
+        finish_reason=telemetry_finish_reason(response),
+        cached=cached,
+        error=type(error).__name__ if error is not None else None,
+        # A cache hit replays the stored usage but spends no tokens.
+        **(usage_tokens(None) if cached else tokens),
     )
+    if response is not None:
+        LLM_BUDGETS.observe(
+            mode,
+            tokens["completion_tokens"],
+            latency_s,
+            finish_reason=telemetry_finish_reason(response),
+            cached=cached,
+            call_site=call_site,
+        )
+
+
+def _record_stream(mode: str, call_site: str, backend: str, stream: "NemotronStream") -> None:
+    LLM_TELEMETRY.record(
+        mode=mode,
+        call_site=call_site,
+        backend=backend,
+        latency_s=stream.total_s or 0.0,
+        ttft_s=stream.ttft_s,
+        prompt_tokens=0 if stream.cached else int((stream.usage or {}).get("prompt_tokens") or 0),
+        completion_tokens=0 if stream.cached else stream.completion_tokens,
+        finish_reason=stream.finish_reason,
+        cached=stream.cached,
+        streamed=True,
+        error=type(stream.error).__name__ if stream.error is not None else None,
+    )
+    if stream.error is None:
+        LLM_BUDGETS.observe(
+            mode,
+            stream.completion_tokens,
+            stream.total_s or 0.0,
+            finish_reason=stream.finish_reason,
+            cached=stream.cached,
+            call_site=call_site,
+        )
+
+
+def _backend_label(backend: str, route: ModelRoute) -> str:
+    return backend if route is DEFAULT_ROUTE else f"{backend}:{route.name}"
+
+
+def _plan_budget(
+    mode: str,
+    call_site: str,
+    max_tokens: int | None,
+    route: ModelRoute = DEFAULT_ROUTE,
+) -> Tuple[int, int | None]:
+    # max_tokens from the caller is the ceiling; LLM_BUDGETS trims it to what
+    # this call site's answers actually need and what fits the latency SLO. A
+    # non-default route's own max_tokens caps it further.
+    cap = int(max_tokens) if max_tokens is not None else route.max_tokens
+    if route is not DEFAULT_ROUTE:
+        cap = min(cap, route.max_tokens)
+    return LLM_BUDGETS.plan(
+        mode,
+        cap,
+        NEMOTRON_REASONING_BUDGET if NEMOTRON_ENABLE_THINKING else None,
+        call_site=call_site,
+    )
+
+
+def query_nemotron(
+    prompt: "str | PromptParts",
+    max_tokens: int | None = None,
+    temperature: float | None = None,
+    use_cache: bool = True,
+    mode: str = "other",
+    call_site: str = "",
+    json_schema: Dict[str, Any] | None = None,
+    accept: Callable[[str], bool] | None = None,
+) -> Dict[str, Any]:
+    backend = get_backend()
+    route = NEMOTRON_ROUTER.resolve(mode, call_site)
+    label = _backend_label(backend.name, route)
+    max_tokens, reasoning_budget = _plan_budget(mode, call_site, max_tokens, route)
+    started = time.perf_counter()
     try:
-        return response.model_dump()
-    except AttributeError:
-        return response  # type: ignore[return-value]
+        response = backend.complete(
+            prompt,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            use_cache=use_cache,
+            reasoning_budget=reasoning_budget,
+            json_schema=json_schema,
+            route=route,
+            accept=accept,
+        )
+    except Exception as exc:
+        _record_call(mode, call_site, label, started, error=exc)
+        raise
+    _record_call(mode, call_site, label, started, response)
+    return response
+
+
+async def query_nemotron_async(
+    prompt: "str | PromptParts",
+    max_tokens: int | None = None,
+    temperature: float | None = None,
+    use_cache: bool = True,
+    mode: str = "other",
+    call_site: str = "",
+    json_schema: Dict[str, Any] | None = None,
+    accept: Callable[[str], bool] | None = None,
+) -> Dict[str, Any]:
+    backend = get_backend()
+    route = NEMOTRON_ROUTER.resolve(mode, call_site)
+    label = _backend_label(backend.name, route)
+    max_tokens, reasoning_budget = _plan_budget(mode, call_site, max_tokens, route)
+    started = time.perf_counter()
+    try:
+        response = await backend.complete_async(
+            prompt,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            use_cache=use_cache,
+            reasoning_budget=reasoning_budget,
+            json_schema=json_schema,
+            route=route,
+            accept=accept,
+        )
+    except Exception as exc:
+        _record_call(mode, call_site, label, started, error=exc)
+        raise
+    _record_call(mode, call_site, label, started, response)
+    return response
+
+
+def stream_nemotron(
+    prompt: "str | PromptParts",
+    max_tokens: int | None = None,
+    temperature: float | None = None,
+    use_cache: bool = True,
+    mode: str = "other",
+    call_site: str = "",
+    json_schema: Dict[str, Any] | None = None,
+    accept: Callable[[str], bool] | None = None,
+) -> NemotronStream:
+    backend = get_backend()
+    route = NEMOTRON_ROUTER.resolve(mode, call_site)
+    label = _backend_label(backend.name, route)
+    max_tokens, reasoning_budget = _plan_budget(mode, call_site, max_tokens, route)
+    started = time.perf_counter()
+    try:
+        stream = backend.stream(
+            prompt,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            use_cache=use_cache,
+            reasoning_budget=reasoning_budget,
+            json_schema=json_schema,
+            route=route,
+            accept=accept,
+        )
+    except Exception as exc:
+        _record_call(mode, call_site, label, started, error=exc)
+        raise
+    # Recorded once the caller has drained (or abandoned) the stream.
+    stream.add_done_callback(lambda done: _record_stream(mode, call_site, label, done))
+    return stream
 
 
 def extract_text(response: Dict[str, Any]) -> str:
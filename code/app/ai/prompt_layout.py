@@ -0,0 +1,29 @@
+from typing import Dict, List, NamedTuple
+
+
+# A prompt split for server-side prefix (KV) caching: a system message shared
+# by every call site, the template's fixed instructions, then the per-request
+# data. NIM/vLLM can skip prefill for any leading run of tokens it has seen,
+# so everything that varies goes last.
+class PromptParts(NamedTuple):
+    system: str
+    prefix: str
+    suffix: str
+
+
+def prompt_text(prompt: "str | PromptParts") -> str:
+    # Flat form, for backends and tools that key on or parse the prompt text.
+    if isinstance(prompt, str):
+        return prompt
+    return "\n\n".join(part for part in prompt if part)
+
+
+def build_messages(prompt: "str | PromptParts") -> List[Dict[str, str]]:
+    if isinstance(prompt, str):
+        return [{"role": "user", "content": prompt}]
+    messages = []
+    if prompt.system:
+        messages.append({"role": "system", "content": prompt.system})
+    user = "\n\n".join(part for part in (prompt.prefix, prompt.suffix) if part)
+    messages.append({"role": "user", "content": user})
+    return messages
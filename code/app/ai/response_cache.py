@@ -0,0 +1,161 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict
+
+# Outside the checkout, so running the app or scraping /metrics never writes
+# into the repository.
+_DEFAULT_CACHE_PATH = Path(os.getenv("XDG_CACHE_HOME") or Path.home() / ".cache") / "risearc" / "nemotron_cache.sqlite3"
+
+# Opt-in: a cached answer is replayed verbatim for NEMOTRON_CACHE_TTL_S.
+NEMOTRON_CACHE_ENABLED = os.getenv("NEMOTRON_CACHE", "0").lower() in {"1", "true", "yes"}
+NEMOTRON_CACHE_PATH = os.getenv("NEMOTRON_CACHE_PATH", str(_DEFAULT_CACHE_PATH))
+NEMOTRON_CACHE_TTL_S = float(os.getenv("NEMOTRON_CACHE_TTL_S", "86400"))
+NEMOTRON_CACHE_MAX_ENTRIES = max(1, int(os.getenv("NEMOTRON_CACHE_MAX_ENTRIES", "2000")))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    response TEXT NOT NULL,
+    created REAL NOT NULL,
+    last_used REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0
+)
+"""
+
+
+def cache_key(completion_kwargs: Dict[str, Any]) -> str:
+    # Everything that changes the completion: model, prompt, sampling and
+    # reasoning settings. Transport options such as timeouts are left out.
+    material = {
+        name: completion_kwargs.get(name)
+        for name in ("model", "messages", "temperature", "max_tokens", "extra_body")
+    }
+    blob = json.dumps(material, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+# SQLite in WAL mode so API workers and Streamlit sessions on the same host
+# share one cache file. Any database error degrades to a miss: the cache must
+# never be the reason a model call fails.
+class ResponseCache:
+    def __init__(
+        self,
+        path: str = NEMOTRON_CACHE_PATH,
+        ttl_s: float = NEMOTRON_CACHE_TTL_S,
+        max_entries: int = NEMOTRON_CACHE_MAX_ENTRIES,
+        enabled: bool = NEMOTRON_CACHE_ENABLED,
+    ) -> None:
+        self.path = path
+        self.ttl_s = float(ttl_s)
+        self.max_entries = max(1, int(max_entries))
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+        self._hits = 0
+        self._misses = 0
+        self._writes = 0
+        self._evictions = 0
+        self._errors = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=2.0, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(_SCHEMA)
+            conn.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+            self._conn = conn
+        return self._conn
+
+    def get(self, key: str) -> Dict[str, Any] | None:
+        if not self.enabled:
+            return None
+        now = time.time()
+        with self._lock:
+            try:
+                conn = self._connection()
+                row = conn.execute(
+                    "SELECT response FROM responses WHERE key = ? AND created >= ?",
+                    (key, now - self.ttl_s),
+                ).fetchone()
+                if row is not None:
+                    conn.execute(
+                        "UPDATE responses SET last_used = ?, hits = hits + 1 WHERE key = ?",
+                        (now, key),
+                    )
+                    response = json.loads(row[0])
+                    self._hits += 1
+                    return response
+            except (sqlite3.Error, OSError, ValueError):
+                self._errors += 1
+            self._misses += 1
+            return None
+
+    def put(self, key: str, response: Dict[str, Any]) -> None:
+        if not self.enabled:
+            return
+        now = time.time()
+        try:
+            blob = json.dumps(response, default=str)
+        except (TypeError, ValueError):
+            return
+        with self._lock:
+            try:
+                conn = self._connection()
+                conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, response, created, last_used, hits) VALUES (?, ?, ?, ?, 0)",
+                    (key, blob, now, now),
+                )
+                self._writes += 1
+                self._evict(conn, now)
+            except (sqlite3.Error, OSError):
+                self._errors += 1
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        expired = conn.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl_s,)).rowcount
+        count = conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        excess = count - self.max_entries
+        evicted = 0
+        if excess > 0:
+            # Least recently used first.
+            evicted = conn.execute(
+                "DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY last_used ASC LIMIT ?)",
+                (excess,),
+            ).rowcount
+        self._evictions += max(0, expired) + max(0, evicted)
+
+    def clear(self) -> None:
+        with self._lock:
+            try:
+                self._connection().execute("DELETE FROM responses")
+            except (sqlite3.Error, OSError):
+                self._errors += 1
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            entries = 0
+            if self.enabled:
+                try:
+                    entries = self._connection().execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+                except (sqlite3.Error, OSError):
+                    self._errors += 1
+            lookups = self._hits + self._misses
+            return {
+                "enabled": 1.0 if self.enabled else 0.0,
+                "entries": float(entries),
+                "hits": float(self._hits),
+                "misses": float(self._misses),
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+                "writes": float(self._writes),
+                "evictions": float(self._evictions),
+                "errors": float(self._errors),
+            }
+
+
+RESPONSE_CACHE = ResponseCache()
@@ -0,0 +1,99 @@
+import os
+from typing import Any, Dict, List, Sequence
+
+from .circuit_breaker import CircuitBreaker
+from .hedging import HedgePolicy
+
+# Extra model routes, e.g. NEMOTRON_ROUTES=fast. Each route is configured with
+# NEMOTRON_ROUTE_<NAME>_* variables; anything unset is inherited from the
+# default NEMOTRON_* settings:
+#   _MODEL, _BASE_URL, _API_KEY, _TIMEOUT, _MAX_TOKENS, _POOL_SIZE
+#   _MODES       comma-separated modes it serves (small_talk, extraction, ...)
+#   _CALL_SITES  comma-separated call sites; these win over mode matches
+NEMOTRON_ROUTES = [name.strip().lower() for name in os.getenv("NEMOTRON_ROUTES", "").split(",") if name.strip()]
+
+
+def _csv(value: str) -> List[str]:
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+# One model endpoint. Every route has its own breaker and hedge statistics, so
+# a slow or failing small model never trips the main one, and its own client
+# pool (kept in nemotron_client, keyed by route name).
+class ModelRoute:
+    def __init__(
+        self,
+        name: str,
+        model: str,
+        base_url: str,
+        api_key: str | None,
+        timeout: float,
+        max_tokens: int,
+        pool_size: int,
+        modes: Sequence[str] = (),
+        call_sites: Sequence[str] = (),
+        breaker: CircuitBreaker | None = None,
+        hedge_policy: HedgePolicy | None = None,
+    ) -> None:
+        self.name = name
+        self.model = model
+        self.base_url = base_url
+        self.api_key = api_key
+        self.timeout = timeout
+        self.max_tokens = max_tokens
+        self.pool_size = pool_size
+        self.modes = tuple(modes)
+        self.call_sites = tuple(call_sites)
+        self.breaker = breaker if breaker is not None else CircuitBreaker()
+        self.hedge_policy = hedge_policy if hedge_policy is not None else HedgePolicy()
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "model": self.model,
+            "base_url": self.base_url,
+            "timeout_s": self.timeout,
+            "max_tokens": self.max_tokens,
+            "pool_size": self.pool_size,
+            "modes": list(self.modes),
+            "call_sites": list(self.call_sites),
+            "breaker": self.breaker.state,
+        }
+
+
+def route_from_env(name: str, default: ModelRoute) -> ModelRoute:
+    prefix = f"NEMOTRON_ROUTE_{name.upper()}_"
+
+    def env(key: str) -> str:
+        return os.getenv(prefix + key, "").strip()
+
+    return ModelRoute(
+        name=name,
+        model=env("MODEL") or default.model,
+        base_url=env("BASE_URL") or default.base_url,
+        api_key=env("API_KEY") or default.api_key,
+        timeout=float(env("TIMEOUT") or default.timeout),
+        max_tokens=int(env("MAX_TOKENS") or default.max_tokens),
+        pool_size=max(1, int(env("POOL_SIZE") or default.pool_size)),
+        modes=_csv(env("MODES")),
+        call_sites=_csv(env("CALL_SITES")),
+    )
+
+
+class RouteTable:
+    def __init__(self, default: ModelRoute, routes: Sequence[ModelRoute] = ()) -> None:
+        self.default = default
+        self.routes = list(routes)
+        self._by_call_site: Dict[str, ModelRoute] = {}
+        self._by_mode: Dict[str, ModelRoute] = {}
+        # First declared route wins when two claim the same mode or call site.
+        for route in reversed(self.routes):
+            for call_site in route.call_sites:
+                self._by_call_site[call_site] = route
+            for mode in route.modes:
+                self._by_mode[mode] = route
+
+    def resolve(self, mode: str = "", call_site: str = "") -> ModelRoute:
+        return self._by_call_site.get(call_site) or self._by_mode.get(mode) or self.default
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        return {route.name: route.describe() for route in [self.default, *self.routes]}
@@ -0,0 +1,23 @@
+from functools import lru_cache
+from typing import Any, Dict, Type, TypeVar
+
+from pydantic import BaseModel, ValidationError
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+
+@lru_cache(maxsize=None)
+def json_schema(model: Type[BaseModel]) -> Dict[str, Any]:
+    return model.model_json_schema()
+
+
+def parse_model(raw: str, model: Type[ModelT]) -> ModelT | None:
+    # Fast path for guided replies, which are bare JSON: validate the string in
+    # one pass. Anything else returns None and goes through the lenient parsers.
+    text = (raw or "").strip()
+    if not text.startswith("{"):
+        return None
+    try:
+        return model.model_validate_json(text)
+    except ValidationError:
+        return None
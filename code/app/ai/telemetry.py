@@ -0,0 +1,143 @@
+import math
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, List, Sequence
+
+LLM_TELEMETRY_CAPACITY = max(1, int(os.getenv("LLM_TELEMETRY_CAPACITY", "1000")))
+
+
+def percentile(values: Iterable[float], fraction: float) -> float:
+    # Nearest-rank percentile of a non-empty sample.
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(math.ceil(fraction * len(ordered))) - 1))]
+
+
+def _distribution(values: List[float]) -> Dict[str, float | None]:
+    if not values:
+        return {"p50": None, "p95": None, "p99": None, "max": None}
+    return {
+        "p50": round(percentile(values, 0.50), 4),
+        "p95": round(percentile(values, 0.95), 4),
+        "p99": round(percentile(values, 0.99), 4),
+        "max": round(max(values), 4),
+    }
+
+
+def usage_tokens(response: Dict[str, Any] | None) -> Dict[str, int]:
+    usage = response.get("usage") if isinstance(response, dict) else None
+    if not isinstance(usage, dict):
+        return {"prompt_tokens": 0, "completion_tokens": 0}
+    return {
+        "prompt_tokens": int(usage.get("prompt_tokens") or 0),
+        "completion_tokens": int(usage.get("completion_tokens") or 0),
+    }
+
+
+def finish_reason(response: Dict[str, Any] | None) -> str | None:
+    choices = response.get("choices") if isinstance(response, dict) else None
+    if not choices or not isinstance(choices[0], dict):
+        return None
+    return choices[0].get("finish_reason")
+
+
+# Fixed-size, in-memory record of recent model calls: what each call site
+# spends in tokens and time. Old records fall off the end.
+class TelemetryBuffer:
+    def __init__(self, capacity: int = LLM_TELEMETRY_CAPACITY) -> None:
+        self.capacity = max(1, int(capacity))
+        self._lock = threading.Lock()
+        self._records: Deque[Dict[str, Any]] = deque(maxlen=self.capacity)
+        self._total = 0
+
+    def record(
+        self,
+        mode: str,
+        call_site: str,
+        latency_s: float,
+        backend: str = "",
+        prompt_tokens: int = 0,
+        completion_tokens: int = 0,
+        ttft_s: float | None = None,
+        finish_reason: str | None = None,
+        cached: bool = False,
+        streamed: bool = False,
+        error: str | None = None,
+    ) -> None:
+        entry = {
+            "ts": time.time(),
+            "mode": mode or "other",
+            "call_site": call_site or "unknown",
+            "backend": backend,
+            "prompt_tokens": int(prompt_tokens),
+            "completion_tokens": int(completion_tokens),
+            "ttft_s": None if ttft_s is None else round(float(ttft_s), 4),
+            "latency_s": round(float(latency_s), 4),
+            "finish_reason": finish_reason,
+            "cached": bool(cached),
+            "streamed": bool(streamed),
+            "error": error,
+        }
+        with self._lock:
+            self._records.append(entry)
+            self._total += 1
+
+    def records(self, limit: int | None = None) -> List[Dict[str, Any]]:
+        with self._lock:
+            items = list(self._records)
+        if limit is not None:
+            items = items[-max(0, int(limit)) :] if limit else []
+        return [dict(item) for item in reversed(items)]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._records.clear()
+
+    def summary(self, group_by: Sequence[str] = ("mode", "call_site")) -> List[Dict[str, Any]]:
+        with self._lock:
+            items = list(self._records)
+        groups: Dict[tuple, List[Dict[str, Any]]] = {}
+        for item in items:
+            groups.setdefault(tuple(item[name] for name in group_by), []).append(item)
+
+        rows = []
+        for key, members in groups.items():
+            calls = len(members)
+            ok = [item for item in members if not item["error"]]
+            prompt_tokens = sum(item["prompt_tokens"] for item in members)
+            completion_tokens = sum(item["completion_tokens"] for item in members)
+            row: Dict[str, Any] = dict(zip(group_by, key))
+            row.update(
+                {
+                    "calls": calls,
+                    "errors": calls - len(ok),
+                    "cached": sum(1 for item in members if item["cached"]),
+                    "truncated": sum(1 for item in members if item["finish_reason"] == "length"),
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": completion_tokens,
+                    "avg_completion_tokens": round(completion_tokens / calls, 1),
+                    "latency_s": _distribution([item["latency_s"] for item in ok]),
+                    "ttft_s": _distribution([item["ttft_s"] for item in ok if item["ttft_s"] is not None]),
+                    "total_latency_s": round(sum(item["latency_s"] for item in members), 3),
+                }
+            )
+            rows.append(row)
+        # Biggest spenders first.
+        rows.sort(key=lambda row: (row["total_latency_s"], row["completion_tokens"]), reverse=True)
+        return rows
+
+    def snapshot(self, limit: int = 50) -> Dict[str, Any]:
+        with self._lock:
+            total = self._total
+            size = len(self._records)
+        return {
+            "capacity": self.capacity,
+            "buffered": size,
+            "recorded_total": total,
+            "summary": self.summary(),
+            "recent": self.records(limit),
+        }
+
+
+LLM_TELEMETRY = TelemetryBuffer()
@@ -0,0 +1,86 @@
+import os
+import threading
+from concurrent.futures import Future
+from typing import Callable, Dict
+
+from .llm_executor import LLM_EXECUTOR, LLMExecutor
+from .metrics import REGISTRY
+
+LLM_MAX_INFLIGHT = max(1, int(os.getenv("LLM_MAX_INFLIGHT", "4")))
+LLM_MAX_QUEUE = max(0, int(os.getenv("LLM_MAX_QUEUE", "8")))
+LLM_MAX_QUEUE_WAIT = max(0.0, float(os.getenv("LLM_MAX_QUEUE_WAIT", "2.0")))
+
+
+# Queue depth and call latency come from the executor that runs the calls,
+# which may have fewer workers than max_inflight admitted calls.
+class AdmissionController:
+    def __init__(self, max_inflight: int, max_queue: int, max_queue_wait: float, executor: LLMExecutor) -> None:
+        self.max_inflight = max(1, int(max_inflight))
+        self.max_queue = max(0, int(max_queue))
+        self.max_queue_wait = max(0.0, float(max_queue_wait))
+        self.executor = executor
+        self._lock = threading.Lock()
+        self._inflight = 0
+        self._admitted_total = 0
+        self._rejected_total = 0
+
+    def _expected_wait(self, queued: int) -> float:
+        # Rough time until a worker frees up for the next queued call. The
+        # executor measures calls from when a worker picks them up, so queue
+        # wait is only counted once, here.
+        run_s = self.executor.run_time_ewma()
+        if run_s is None:
+            return 0.0
+        return run_s * (queued + 1) / self.executor.max_workers
+
+    def _acquire(self) -> bool:
+        # Never blocks: calls beyond the executor's workers wait in its queue,
+        # so admission only decides whether that queue is still worth joining.
+        queued, active = self.executor.load()
+        must_queue = queued + active >= self.executor.max_workers
+        with self._lock:
+            if self._inflight >= self.max_inflight + self.max_queue or (
+                must_queue and (queued >= self.max_queue or self._expected_wait(queued) > self.max_queue_wait)
+            ):
+                self._rejected_total += 1
+                return False
+            self._inflight += 1
+            self._admitted_total += 1
+            return True
+
+    def _release(self) -> None:
+        with self._lock:
+            self._inflight -= 1
+
+    def submit(self, start: Callable[[], Future]) -> Future | None:
+        # Returns None when shed. The slot is held until the submitted work
+        # finishes, not until the caller stops waiting: a call the caller gave
+        # up on still occupies an executor worker and an upstream connection.
+        if not self._acquire():
+            return None
+        try:
+            future = start()
+        except BaseException:
+            self._release()
+            raise
+        future.add_done_callback(lambda _: self._release())
+        return future
+
+    def snapshot(self) -> Dict[str, float]:
+        queued, _ = self.executor.load()
+        with self._lock:
+            return {
+                "inflight": float(self._inflight),
+                "queued": float(queued),
+                "admitted_total": float(self._admitted_total),
+                "rejected_total": float(self._rejected_total),
+                "latency_ewma_s": float(self.executor.run_time_ewma() or 0.0),
+            }
+
+
+LLM_ADMISSION = AdmissionController(LLM_MAX_INFLIGHT, LLM_MAX_QUEUE, LLM_MAX_QUEUE_WAIT, LLM_EXECUTOR)
+REGISTRY.gauge_callback(
+    "risearc_llm_admission",
+    "LLM admission controller state.",
+    LLM_ADMISSION.snapshot,
+)
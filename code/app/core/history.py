@@ -0,0 +1,173 @@
+import os
+import re
+from typing import Any, Callable, Dict, Iterable, List
+
+from app.ai.compact import estimate_tokens
+
+# Token budget for the RECENT CONVERSATION block of a chat prompt; 0 falls back
+# to the last LLM_HISTORY_MAX_MESSAGES messages verbatim.
+LLM_HISTORY_TOKENS = max(0, int(os.getenv("LLM_HISTORY_TOKENS", "480")))
+LLM_HISTORY_MAX_MESSAGES = max(1, int(os.getenv("LLM_HISTORY_MAX_MESSAGES", "8")))
+# Newest messages that always stay verbatim (clipped if one alone is too long).
+LLM_HISTORY_MIN_RECENT = max(1, int(os.getenv("LLM_HISTORY_MIN_RECENT", "2")))
+LLM_HISTORY_SUMMARY_TOKENS = max(16, int(os.getenv("LLM_HISTORY_SUMMARY_TOKENS", "120")))
+# Messages leaving the window are folded into the summary at least this many
+# at a time, so the summarizer runs every few turns rather than every turn.
+LLM_HISTORY_FOLD_BATCH = max(1, int(os.getenv("LLM_HISTORY_FOLD_BATCH", "4")))
+
+# (previous_summary, transcript) -> new summary
+Summarizer = Callable[[str, str], str]
+
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
+_FACT_RE = re.compile(r"[+-]?\$[\d,]+(?:\.\d+)?|\d+(?:\.\d+)?\s*(?:%|/100|months?)")
+
+
+def new_history_state() -> Dict[str, Any]:
+    # Lives in the caller's session: the rolling summary and how many of the
+    # oldest messages it already covers.
+    return {"summary": "", "covered": 0}
+
+
+def _normalize_fact(fact: str) -> str:
+    return re.sub(r"[\s,+-]", "", fact).rstrip("s")
+
+
+def context_facts(context: Any) -> set:
+    # Every figure the structured context already gives the model.
+    facts: set = set()
+    if isinstance(context, dict):
+        for value in context.values():
+            facts |= context_facts(value)
+    elif isinstance(context, (list, tuple)):
+        for value in context:
+            facts |= context_facts(value)
+    elif isinstance(context, str):
+        facts.update(_normalize_fact(fact) for fact in _FACT_RE.findall(context))
+    return facts
+
+
+def drop_known_facts(text: str, facts: Iterable[str]) -> str:
+    # Removes sentences that only restate figures from the context; the model
+    # sees those numbers there anyway. Questions are kept because a bare "yes"
+    # from the user refers to them.
+    facts = set(facts)
+    if not facts:
+        return text
+    kept = []
+    for sentence in _SENTENCE_RE.split(text.strip()):
+        found = {_normalize_fact(fact) for fact in _FACT_RE.findall(sentence)}
+        if found and found <= facts and not sentence.rstrip().endswith("?"):
+            continue
+        kept.append(sentence)
+    return " ".join(kept)
+
+
+def clip_tokens(text: str, budget: int, keep_end: bool = False) -> str:
+    if estimate_tokens(text) <= budget:
+        return text
+    words = text.split()
+    low, high = 0, len(words)
+    # Longest run of words that fits, counting the ellipsis.
+    while low < high:
+        middle = (low + high + 1) // 2
+        part = words[-middle:] if keep_end else words[:middle]
+        if estimate_tokens(" ".join(part)) + 1 <= budget:
+            low = middle
+        else:
+            high = middle - 1
+    if not low:
+        return ""
+    return "..." + " ".join(words[-low:]) if keep_end else " ".join(words[:low]) + "..."
+
+
+def _lines(chat_history: List[Dict[str, str]], facts: set) -> List[str]:
+    lines = []
+    for message in chat_history:
+        content = str(message.get("content", "")).strip()
+        if message.get("role") == "assistant":
+            content = drop_known_facts(content, facts)
+        if content:
+            lines.append(f"{'User' if message.get('role') == 'user' else 'Assistant'}: {content}")
+        else:
+            # Keep positions aligned with chat_history for the covered count.
+            lines.append("")
+    return lines
+
+
+def extractive_summary(previous: str, transcript: str, budget: int = LLM_HISTORY_SUMMARY_TOKENS) -> str:
+    # Summary without a model call: what the user asked or said, newest kept
+    # when it runs over budget.
+    points = [previous] if previous else []
+    for line in transcript.splitlines():
+        if line.startswith("User: "):
+            points.append(_SENTENCE_RE.split(line[6:].strip())[0])
+    return clip_tokens(" ".join(point for point in points if point), budget, keep_end=True)
+
+
+def _fold(state: Dict[str, Any], transcript: str, summarize: Summarizer | None) -> None:
+    summary = ""
+    if summarize is not None:
+        try:
+            summary = (summarize(state["summary"], transcript) or "").strip()
+        except Exception:
+            summary = ""
+    if not summary:
+        summary = extractive_summary(state["summary"], transcript)
+    state["summary"] = clip_tokens(summary, LLM_HISTORY_SUMMARY_TOKENS, keep_end=True)
+
+
+def build_history_window(
+    chat_history: List[Dict[str, str]],
+    state: Dict[str, Any],
+    context: Dict[str, Any] | None = None,
+    summarize: Summarizer | None = None,
+    budget: int = LLM_HISTORY_TOKENS,
+) -> str:
+    if not chat_history:
+        state.update(new_history_state())
+        return ""
+    if budget <= 0:
+        lines = _lines(chat_history[-LLM_HISTORY_MAX_MESSAGES:], set())
+        return "\n".join(line for line in lines if line)
+    if state.get("covered", 0) > len(chat_history):
+        # The chat was cleared or replaced under us.
+        state.update(new_history_state())
+
+    lines = _lines(chat_history, context_facts(context or {}))
+    covered = state["covered"]
+    start = _window_start(lines, covered, budget - (LLM_HISTORY_SUMMARY_TOKENS if covered else 0))
+    if start > covered:
+        # Older messages no longer fit: fold them, plus a few more so the next
+        # turns do not need another fold, into the rolling summary.
+        start = _window_start(lines, covered, budget - LLM_HISTORY_SUMMARY_TOKENS)
+        start = max(covered, min(max(start, covered + LLM_HISTORY_FOLD_BATCH), len(lines) - LLM_HISTORY_MIN_RECENT))
+        transcript = "\n".join(line for line in lines[covered:start] if line)
+        if transcript:
+            _fold(state, transcript, summarize)
+        state["covered"] = start
+
+    recent = [line for line in lines[start:] if line]
+    room = budget - estimate_tokens(state["summary"])
+    if recent and sum(estimate_tokens(line) for line in recent) > room:
+        # Only the newest messages are left and they are still too long.
+        share = max(1, room // len(recent))
+        recent = [clip_tokens(line, share) for line in recent]
+    parts = [f"Earlier in this conversation: {state['summary']}"] if state["summary"] else []
+    return "\n".join(parts + recent)
+
+
+def _window_start(lines: List[str], floor: int, budget: int) -> int:
+    # Earliest index (not before floor) from which the newest messages fit the
+    # budget, always keeping LLM_HISTORY_MIN_RECENT of them.
+    used = 0
+    kept = 0
+    start = len(lines)
+    for index in range(len(lines) - 1, floor - 1, -1):
+        cost = estimate_tokens(lines[index])
+        if kept >= LLM_HISTORY_MIN_RECENT and used + cost > budget:
+            break
+        used += cost
+        start = index
+        if lines[index]:
+            kept += 1
+    return start
@@ -0,0 +1,131 @@
+import asyncio
+import json
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict
+
+from .metrics import metrics_entrypoint
+from .pipeline import prepare_analysis, summarize_analysis_async
+
+LIVE_SUMMARY_DEBOUNCE_S = max(0.0, float(os.getenv("LIVE_SUMMARY_DEBOUNCE_S", "0.75")))
+
+SendJson = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+def _merge_payload(base: Dict[str, Any], delta: Dict[str, Any]) -> Dict[str, Any]:
+    merged = dict(base)
+    for key in ("profile", "scenario"):
+        if isinstance(delta.get(key), dict):
+            merged[key] = {**(merged.get(key) or {}), **delta[key]}
+    for key in ("subscriptions", "news_event"):
+        if key in delta:
+            merged[key] = delta[key]
+    return merged
+
+
+# One per WebSocket connection: holds the client's Profile + Scenario, answers
+# every edit with fresh metrics and only asks the model once edits settle.
+class LiveScenarioSession:
+    def __init__(self, send_json: SendJson, debounce_s: float = LIVE_SUMMARY_DEBOUNCE_S) -> None:
+        self._send_json = send_json
+        self._send_lock = asyncio.Lock()
+        self.debounce_s = debounce_s
+        self.payload: Dict[str, Any] = {}
+        self.revision = 0
+        self._summary_task: asyncio.Task | None = None
+        # The task whose model call is running, if any. A running call cannot
+        # be interrupted, so it is left to finish rather than cancelled.
+        self._inflight_task: asyncio.Task | None = None
+
+    async def _send(self, message: Dict[str, Any]) -> None:
+        async with self._send_lock:
+            await self._send_json(message)
+
+    async def handle_text(self, raw: str) -> None:
+        try:
+            message = json.loads(raw)
+        except ValueError:
+            await self._send({"type": "error", "detail": "Messages must be JSON objects."})
+            return
+        if not isinstance(message, dict):
+            await self._send({"type": "error", "detail": "Messages must be JSON objects."})
+            return
+        await self.handle(message)
+
+    async def handle(self, message: Dict[str, Any]) -> None:
+        kind = message.get("type", "delta")
+        if kind == "init":
+            candidate = {key: value for key, value in message.items() if key != "type"}
+        elif kind == "delta":
+            if not self.payload:
+                await self._send({"type": "error", "detail": "Send an init message before deltas."})
+                return
+            candidate = _merge_payload(self.payload, message)
+        else:
+            await self._send({"type": "error", "detail": f"Unknown message type: {kind}"})
+            return
+
+        started = time.perf_counter()
+        try:
+            with metrics_entrypoint("ws"):
+                prepared = prepare_analysis(candidate)
+        except Exception as exc:
+            # Keep the last valid state so one bad slider value does not reset the session.
+            await self._send({"type": "error", "revision": self.revision, "detail": str(exc)})
+            return
+        compute_ms = (time.perf_counter() - started) * 1000.0
+
+        self.payload = candidate
+        self.revision += 1
+        await self._send(
+            {
+                "type": "metrics",
+                "revision": self.revision,
+                "metrics": prepared["metrics"],
+                "timeline": prepared["timeline"],
+                "savings_total": prepared["savings_total"],
+                "alert": prepared["alert"],
+                "compute_ms": round(compute_ms, 3),
+            }
+        )
+        self._schedule_summary(prepared, self.revision)
+
+    def _schedule_summary(self, prepared: Dict[str, Any], revision: int) -> None:
+        previous = self._summary_task
+        if previous is not None and not previous.done() and previous is not self._inflight_task:
+            previous.cancel()
+        self._summary_task = asyncio.create_task(self._summarize_after_debounce(prepared, revision))
+
+    async def _summarize_after_debounce(self, prepared: Dict[str, Any], revision: int) -> None:
+        await asyncio.sleep(self.debounce_s)
+        inflight = self._inflight_task
+        if inflight is not None and not inflight.done():
+            # One model call per session at a time: wait for the stale one
+            # instead of stacking another behind it in the LLM executor.
+            await asyncio.wait({inflight})
+        if revision != self.revision:
+            return
+        self._inflight_task = asyncio.current_task()
+        try:
+            with metrics_entrypoint("ws"):
+                result = await summarize_analysis_async(prepared, call_site="ws.scenario")
+        finally:
+            self._inflight_task = None
+        if revision != self.revision:
+            return
+        try:
+            await self._send(
+                {
+                    "type": "summary",
+                    "revision": revision,
+                    "summary": result.summary,
+                    "degraded": result.degraded,
+                }
+            )
+        except Exception:
+            # The client went away while the summary was being generated.
+            return
+
+    def close(self) -> None:
+        if self._summary_task is not None and not self._summary_task.done():
+            self._summary_task.cancel()
@@ -0,0 +1,118 @@
+import contextvars
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Tuple
+
+from .metrics import REGISTRY
+
+# Defaults to the admission limit (LLM_MAX_INFLIGHT) but can be set separately.
+LLM_EXECUTOR_WORKERS = max(1, int(os.getenv("LLM_EXECUTOR_WORKERS", os.getenv("LLM_MAX_INFLIGHT", "4"))))
+LLM_RUN_EWMA_ALPHA = 0.2
+
+
+# Model calls run on their own pool so slow completions never occupy the
+# request threadpool that serves cheap endpoints.
+class LLMExecutor:
+    def __init__(self, max_workers: int) -> None:
+        self.max_workers = max(1, int(max_workers))
+        self._lock = threading.Lock()
+        self._pool: ThreadPoolExecutor | None = None
+        self._queued = 0
+        self._active = 0
+        self._completed_total = 0
+        self._failed_total = 0
+        self._queue_wait_total_s = 0.0
+        self._run_total_s = 0.0
+        self._run_ewma_s: float | None = None
+
+    def _get_pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="llm")
+            return self._pool
+
+    def start(self) -> None:
+        self._get_pool()
+
+    def submit(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Future:
+        submitted = time.monotonic()
+        with self._lock:
+            self._queued += 1
+
+        def run() -> Any:
+            started = time.monotonic()
+            with self._lock:
+                self._queued -= 1
+                self._active += 1
+                self._queue_wait_total_s += started - submitted
+            ok = False
+            try:
+                result = fn(*args, **kwargs)
+                ok = True
+                return result
+            finally:
+                run_s = time.monotonic() - started
+                with self._lock:
+                    self._active -= 1
+                    self._run_total_s += run_s
+                    if self._run_ewma_s is None:
+                        self._run_ewma_s = run_s
+                    else:
+                        self._run_ewma_s += LLM_RUN_EWMA_ALPHA * (run_s - self._run_ewma_s)
+                    if ok:
+                        self._completed_total += 1
+                    else:
+                        self._failed_total += 1
+
+        # Carry the caller's context so per-request timings recorded on the worker
+        # thread land on the right request.
+        future = self._get_pool().submit(contextvars.copy_context().run, run)
+        future.add_done_callback(self._dequeue_cancelled)
+        return future
+
+    def _dequeue_cancelled(self, future: Future) -> None:
+        # A call cancelled while still queued never reaches run().
+        if future.cancelled():
+            with self._lock:
+                self._queued -= 1
+
+    def load(self) -> Tuple[int, int]:
+        # (queued, active): calls waiting for a worker and calls running.
+        with self._lock:
+            return self._queued, self._active
+
+    def run_time_ewma(self) -> float | None:
+        # How long calls take once a worker picks them up; queue wait excluded.
+        with self._lock:
+            return self._run_ewma_s
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            finished = self._completed_total + self._failed_total
+            return {
+                "workers": float(self.max_workers),
+                "queued": float(self._queued),
+                "active": float(self._active),
+                "completed_total": float(self._completed_total),
+                "failed_total": float(self._failed_total),
+                "queue_wait_seconds_total": self._queue_wait_total_s,
+                "run_seconds_total": self._run_total_s,
+                "avg_queue_wait_s": self._queue_wait_total_s / finished if finished else 0.0,
+                "run_ewma_s": float(self._run_ewma_s or 0.0),
+            }
+
+    def shutdown(self) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+LLM_EXECUTOR = LLMExecutor(LLM_EXECUTOR_WORKERS)
+REGISTRY.gauge_callback(
+    "risearc_llm_executor",
+    "Dedicated LLM executor queue and worker state.",
+    LLM_EXECUTOR.snapshot,
+)
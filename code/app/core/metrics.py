@@ -0,0 +1,326 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, List, Sequence, Set, Tuple
+
+LATENCY_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    25.0,
+    60.0,
+)
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape_label(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Dict[str, str] | None = None) -> str:
+    pairs = list(zip(names, values)) + list((extra or {}).items())
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape_label(value)}"' for name, value in pairs) + "}"
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[LabelValues, float] = {}
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + float(amount)
+
+    def value(self, **labels: str) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> None:
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(float(b) for b in buckets))
+        self._lock = threading.Lock()
+        # Per label set: [bucket counts..., +Inf count], sum
+        self._values: Dict[LabelValues, Tuple[List[int], float]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, float(value))
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * (len(self.buckets) + 1), 0.0))
+            counts[index] += 1
+            self._values[key] = (counts, total + float(value))
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((key, (list(counts), total)) for key, (counts, total) in self._values.items())
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, {"le": _format_value(bound)})
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            plain = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{plain} {_format_value(total)}")
+            lines.append(f"{self.name}_count{plain} {cumulative}")
+        return lines
+
+
+class CallbackGauge:
+    # Sampled at scrape time, so hot paths never pay for gauge bookkeeping.
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        callback: Callable[[], Dict[str, float]],
+        labelname: str,
+    ) -> None:
+        self.name = name
+        self.help_text = help_text
+        self.callback = callback
+        self.labelname = labelname
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} gauge"]
+        try:
+            values = self.callback()
+        except Exception:
+            values = {}
+        for label, value in sorted(values.items()):
+            lines.append(f"{self.name}{_format_labels((self.labelname,), (label,))} {_format_value(value)}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, Counter | Histogram | CallbackGauge] = {}
+
+    def _register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, help_text, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, help_text, labelnames, buckets))
+
+    def gauge_callback(
+        self,
+        name: str,
+        help_text: str,
+        callback: Callable[[], Dict[str, float]],
+        labelname: str = "field",
+    ) -> CallbackGauge:
+        return self._register(CallbackGauge(name, help_text, callback, labelname))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = [self._metrics[name] for name in sorted(self._metrics)]
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+ANALYZE_STAGE_SECONDS = REGISTRY.histogram(
+    "risearc_analyze_stage_seconds",
+    "Latency of each analysis pipeline stage, by entrypoint (analyze or ws).",
+    ("stage", "entrypoint"),
+)
+ANALYZE_REQUESTS = REGISTRY.counter(
+    "risearc_analyze_requests_total",
+    "Analyses completed, by summary source (llm or fallback) and entrypoint.",
+    ("source", "entrypoint"),
+)
+ANALYZE_FALLBACKS = REGISTRY.counter(
+    "risearc_analyze_fallbacks_total",
+    "Analyses answered with the deterministic summary, by reason and entrypoint.",
+    ("reason", "entrypoint"),
+)
+LLM_TOKENS = REGISTRY.counter(
+    "risearc_llm_tokens_total",
+    "Tokens reported by the model endpoint.",
+    ("kind",),
+)
+LLM_ERRORS = REGISTRY.counter(
+    "risearc_llm_errors_total",
+    "Failed model calls, by kind (timeout or error).",
+    ("kind",),
+)
+
+
+# Server-Timing metric name -> pipeline stages folded into it.
+SERVER_TIMING_GROUPS = {
+    "compute": ("validation", "simulation", "clamping"),
+    "prompt": ("prompt_build",),
+    "llm_ttft": ("llm_ttft",),
+    "llm": ("query_nemotron",),
+    "guardrail": ("extract_text", "fallback_summary"),
+}
+
+
+class RequestTimings:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._started = time.perf_counter()
+        self._stages: Dict[str, float] = {}
+        self._unavailable: Set[str] = set()
+
+    def record(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            self._stages[stage] = self._stages.get(stage, 0.0) + float(seconds)
+
+    def mark_unavailable(self, stage: str) -> None:
+        with self._lock:
+            self._unavailable.add(stage)
+
+    def breakdown(self) -> Dict[str, float]:
+        with self._lock:
+            stages = dict(self._stages)
+        result: Dict[str, float] = {}
+        for group, members in SERVER_TIMING_GROUPS.items():
+            present = [stages[name] for name in members if name in stages]
+            if present:
+                result[f"{group}_ms"] = round(sum(present) * 1000.0, 3)
+        for name, seconds in stages.items():
+            result[f"stage_{name}_ms"] = round(seconds * 1000.0, 3)
+        result["total_ms"] = round((time.perf_counter() - self._started) * 1000.0, 3)
+        return result
+
+    def server_timing(self) -> str:
+        breakdown = self.breakdown()
+        with self._lock:
+            unavailable = set(self._unavailable)
+        entries = []
+        for group, members in SERVER_TIMING_GROUPS.items():
+            if f"{group}_ms" in breakdown:
+                entries.append(f"{group};dur={breakdown[f'{group}_ms']}")
+            elif unavailable.intersection(members):
+                # Listed without a duration so dashboards see why it is missing.
+                entries.append(f'{group};desc="unavailable"')
+        entries.append(f"total;dur={breakdown['total_ms']}")
+        return ", ".join(entries)
+
+
+_REQUEST_TIMINGS: ContextVar[RequestTimings | None] = ContextVar("risearc_request_timings", default=None)
+# Which entrypoint the pipeline is serving, so WebSocket scenario edits do not
+# show up as /analyze traffic.
+_ENTRYPOINT: ContextVar[str] = ContextVar("risearc_entrypoint", default="analyze")
+
+
+@contextmanager
+def metrics_entrypoint(name: str) -> Iterator[None]:
+    token = _ENTRYPOINT.set(name)
+    try:
+        yield
+    finally:
+        _ENTRYPOINT.reset(token)
+
+
+def current_entrypoint() -> str:
+    return _ENTRYPOINT.get()
+
+
+@contextmanager
+def request_timings() -> Iterator[RequestTimings]:
+    timings = RequestTimings()
+    token = _REQUEST_TIMINGS.set(timings)
+    try:
+        yield timings
+    finally:
+        _REQUEST_TIMINGS.reset(token)
+
+
+def record_stage(stage: str, seconds: float) -> None:
+    ANALYZE_STAGE_SECONDS.observe(seconds, stage=stage, entrypoint=_ENTRYPOINT.get())
+    timings = _REQUEST_TIMINGS.get()
+    if timings is not None:
+        timings.record(stage, seconds)
+
+
+def record_stage_unavailable(stage: str) -> None:
+    # For stages this request cannot measure, e.g. TTFT of a non-streamed call.
+    timings = _REQUEST_TIMINGS.get()
+    if timings is not None:
+        timings.mark_unavailable(stage)
+
+
+@contextmanager
+def stage_timer(stage: str) -> Iterator[None]:
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(stage, time.perf_counter() - started)
@@ -1,4 +1,4 @@
-from typing import List, Optional, Literal
+from typing import Dict, List, Optional, Literal
 
 from pydantic import BaseModel, Field
 
@@ -68,3 +68,40 @@ class AnalyzeResponse(BaseModel):
     savings_total: float
     alert: str
     summary: str
+    degraded: bool = False
+    timings: Optional[Dict[str, float]] = None
+
+
+# Shapes the model is asked to produce. Their JSON schemas are sent for
+# guided decoding, and replies are validated straight into them.
+class StructuredSummary(BaseModel):
+    summary: str
+    key_facts: List[str] = Field(max_length=8)
+    meaning: str
+    actions: List[str] = Field(max_length=6)
+    warnings: List[str] = Field(max_length=6)
+    followup: str
+
+
+class ScenarioExtraction(BaseModel):
+    months_unemployed: Optional[int] = Field(default=None, ge=0, le=36)
+    expense_cut_pct: Optional[float] = Field(default=None, ge=0, le=70)
+    expense_increase_pct: Optional[float] = Field(default=None, ge=0, le=200)
+    severance: Optional[float] = None
+    unemployment_benefit_monthly: Optional[float] = None
+    other_income_monthly: Optional[float] = None
+    income_start_month: Optional[int] = Field(default=None, ge=0, le=60)
+    income_start_amount: Optional[float] = None
+    income_change_monthly: Optional[float] = None
+    extra_monthly_expenses: Optional[float] = None
+    debt_payment_monthly: Optional[float] = None
+    healthcare_monthly: Optional[float] = None
+    dependent_care_monthly: Optional[float] = None
+    job_search_monthly: Optional[float] = None
+    one_time_expense: Optional[float] = None
+    one_time_income: Optional[float] = None
+    relocation_cost: Optional[float] = None
+    override_savings: Optional[float] = None
+    override_debt: Optional[float] = None
+    override_income_monthly: Optional[float] = None
+    override_expenses_monthly: Optional[float] = None
@@ -1,7 +1,25 @@
-from typing import Dict, List
+import asyncio
+import os
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Dict, List, Tuple
 
+from .admission import LLM_ADMISSION
+from .llm_executor import LLM_EXECUTOR
+from .metrics import (
+    ANALYZE_FALLBACKS,
+    ANALYZE_REQUESTS,
+    LLM_ERRORS,
+    LLM_TOKENS,
+    REGISTRY,
+    current_entrypoint,
+    record_stage,
+    record_stage_unavailable,
+    stage_timer,
+)
 from .models import AnalyzeRequest, AnalyzeResponse, Metrics
-from .prompts import build_summary_prompt
+from .prompts import PromptParts, build_summary_prompt
+from .quantize import LLM_QUANTIZE, quantize_llm_inputs
 from .tools import (
     clamp_llm_metrics,
     clamp_llm_profile,
@@ -18,7 +36,36 @@ from .tools import (
 )
 
 TIMELINE_HORIZON_MONTHS = 60
-from app.ai.nemotron_client import extract_text, query_nemotron
+# Streaming lets the API record time-to-first-token for Server-Timing and /metrics.
+ANALYZE_STREAM_LLM = os.getenv("ANALYZE_STREAM_LLM", "").lower() in {"1", "true", "yes"}
+# Budget for the model part of /analyze (queueing, retries and generation); 0 disables it.
+ANALYZE_LLM_DEADLINE_S = max(0.0, float(os.getenv("ANALYZE_LLM_DEADLINE_S", "12")))
+# Slack for the worker to notice the deadline before the caller stops waiting.
+_DEADLINE_GRACE_S = 0.25
+_SUMMARY_WAIT_S = ANALYZE_LLM_DEADLINE_S + _DEADLINE_GRACE_S if ANALYZE_LLM_DEADLINE_S else None
+from app.ai.circuit_breaker import NEMOTRON_BREAKER, CircuitOpenError
+from app.ai.compact import LLM_COMPACT_CONTEXT
+from app.ai.deadline import deadline
+from app.ai.hedging import NEMOTRON_HEDGE_POLICY
+from app.ai.nemotron_client import extract_text, query_nemotron, stream_nemotron
+from app.ai.nemotron_client import warmup as warmup_nemotron_client
+from app.ai.response_cache import RESPONSE_CACHE
+
+REGISTRY.gauge_callback(
+    "risearc_nemotron_breaker",
+    "Nemotron circuit breaker (state: 0 closed, 1 half-open, 2 open).",
+    NEMOTRON_BREAKER.snapshot,
+)
+REGISTRY.gauge_callback(
+    "risearc_nemotron_cache",
+    "Persistent Nemotron response cache (entries, hits, misses, hit_rate, evictions).",
+    RESPONSE_CACHE.stats,
+)
+REGISTRY.gauge_callback(
+    "risearc_nemotron_hedge",
+    "Hedged Nemotron requests (delay_s is the current hedge trigger).",
+    NEMOTRON_HEDGE_POLICY.snapshot,
+)
 
 
 def _money(value: float) -> str:
@@ -89,7 +136,13 @@ def _deterministic_summary(
     return "\n".join(lines).strip()
 
 
-def run_analysis(payload: AnalyzeRequest) -> AnalyzeResponse:
+def _validate_payload(payload: AnalyzeRequest | Dict[str, Any]) -> AnalyzeRequest:
+    if isinstance(payload, AnalyzeRequest):
+        return payload
+    return AnalyzeRequest(**payload)
+
+
+def simulate(payload: AnalyzeRequest) -> Dict[str, Any]:
     profile = payload.profile
     scenario = payload.scenario
 
@@ -192,8 +245,20 @@ def run_analysis(payload: AnalyzeRequest) -> AnalyzeResponse:
         "risk_score": risk_score,
         "adjusted_risk_score": adjusted_risk,
     }
+    return {
+        "metrics": metrics,
+        "timeline": timeline,
+        "timeline_stats": timeline_stats,
+        "savings_total": savings_total,
+        "alert": alert,
+    }
+
 
-    llm_metrics = clamp_llm_metrics(metrics)
+def _clamp_llm_inputs(payload: AnalyzeRequest, simulated: Dict[str, Any]) -> Dict[str, Any]:
+    profile = payload.profile
+    scenario = payload.scenario
+    profile_debt_payment = float(getattr(profile, "debt_payment_monthly", 0.0))
+    llm_metrics = clamp_llm_metrics(simulated["metrics"])
     llm_profile = clamp_llm_profile(
         {
             "income_monthly": profile.income_monthly,
@@ -226,33 +291,181 @@ def run_analysis(payload: AnalyzeRequest) -> AnalyzeResponse:
             "relocation_cost": scenario.relocation_cost,
         }
     )
-    llm_timeline_stats = clamp_llm_timeline_stats(timeline_stats)
-    llm_savings_total = clamp_llm_savings_total(savings_total)
-    stability_label = job_stability_label(profile.job_stability)
-
-    prompt = build_summary_prompt(
-        llm_profile,
-        llm_scenario,
-        llm_metrics,
-        alert,
-        llm_savings_total,
-        llm_timeline_stats,
-        stability_label,
-    )
-    summary = ""
+    return {
+        "profile": llm_profile,
+        "scenario": llm_scenario,
+        "metrics": llm_metrics,
+        "timeline_stats": clamp_llm_timeline_stats(simulated["timeline_stats"]),
+        "savings_total": clamp_llm_savings_total(simulated["savings_total"]),
+        "stability_label": job_stability_label(profile.job_stability),
+    }
+
+
+def prepare_analysis(
+    payload: AnalyzeRequest | Dict[str, Any],
+    quantize: bool | None = None,
+    compact: bool | None = None,
+) -> Dict[str, Any]:
+    with stage_timer("validation"):
+        payload = _validate_payload(payload)
+    with stage_timer("simulation"):
+        simulated = simulate(payload)
+    with stage_timer("clamping"):
+        llm_inputs = _clamp_llm_inputs(payload, simulated)
+        if LLM_QUANTIZE if quantize is None else quantize:
+            llm_inputs = quantize_llm_inputs(llm_inputs)
+    with stage_timer("prompt_build"):
+        prompt = build_summary_prompt(
+            llm_inputs["profile"],
+            llm_inputs["scenario"],
+            llm_inputs["metrics"],
+            simulated["alert"],
+            llm_inputs["savings_total"],
+            llm_inputs["timeline_stats"],
+            llm_inputs["stability_label"],
+            compact=LLM_COMPACT_CONTEXT if compact is None else compact,
+        )
+    return {**simulated, "payload": payload, "prompt": prompt}
+
+
+def _is_timeout(exc: Exception) -> bool:
+    return isinstance(exc, TimeoutError) or "timeout" in type(exc).__name__.lower()
+
+
+def _record_usage(response: Dict[str, Any]) -> None:
+    usage = response.get("usage") if isinstance(response, dict) else None
+    # A cache hit replays the stored usage but spends no tokens.
+    if not isinstance(usage, dict) or response.get("cached"):
+        return
+    for kind in ("prompt_tokens", "completion_tokens"):
+        value = usage.get(kind)
+        if isinstance(value, (int, float)) and value > 0:
+            LLM_TOKENS.inc(value, kind=kind.replace("_tokens", ""))
+
+
+def _llm_summary(prompt: PromptParts, call_site: str = "api.analyze") -> Tuple[str, str]:
+    # Returns (summary, fallback_reason); the reason is empty when the model answered.
     try:
-        response = query_nemotron(prompt)
+        with stage_timer("query_nemotron"):
+            if ANALYZE_STREAM_LLM:
+                response = stream_nemotron(prompt, mode="scenario", call_site=call_site).consume().response()
+            else:
+                response = query_nemotron(prompt, mode="scenario", call_site=call_site)
+        # Streamed calls, and hedged ones (each attempt streams), carry the
+        # winning attempt's TTFT; a plain completion cannot tell when the
+        # first token arrived.
+        ttft_s = (response.get("timings") or {}).get("ttft_s")
+        if ttft_s is not None:
+            record_stage("llm_ttft", ttft_s)
+        else:
+            record_stage_unavailable("llm_ttft")
+    except CircuitOpenError:
+        return "", "circuit_open"
+    except Exception as exc:
+        kind = "timeout" if _is_timeout(exc) else "error"
+        LLM_ERRORS.inc(kind=kind)
+        return "", kind
+    _record_usage(response)
+    with stage_timer("extract_text"):
         summary = extract_text(response).strip()
-    except Exception:
-        summary = ""
+    return summary, "" if summary else "empty"
+
 
-    if not summary:
-        summary = _deterministic_summary(payload, metrics, alert, timeline)
+def _build_response(prepared: Dict[str, Any], summary: str, fallback_reason: str) -> AnalyzeResponse:
+    metrics = prepared["metrics"]
+    degraded = not summary
+    if degraded:
+        with stage_timer("fallback_summary"):
+            summary = _deterministic_summary(prepared["payload"], metrics, prepared["alert"], prepared["timeline"])
+        ANALYZE_FALLBACKS.inc(reason=fallback_reason or "empty", entrypoint=current_entrypoint())
+    ANALYZE_REQUESTS.inc(source="fallback" if degraded else "llm", entrypoint=current_entrypoint())
 
     return AnalyzeResponse(
         metrics=Metrics(**metrics),
-        timeline=timeline,
-        savings_total=savings_total,
-        alert=alert,
+        timeline=prepared["timeline"],
+        savings_total=prepared["savings_total"],
+        alert=prepared["alert"],
         summary=summary,
+        degraded=degraded,
     )
+
+
+def _submit_summary(prompt: PromptParts, call_site: str = "api.analyze") -> Future | None:
+    # Returns None when admission sheds the call. The deadline is set before
+    # submitting so queue time counts against it too; the executor carries it
+    # into the worker with the rest of the context.
+    def start() -> Future:
+        with deadline(ANALYZE_LLM_DEADLINE_S):
+            return LLM_EXECUTOR.submit(_llm_summary, prompt, call_site)
+
+    return LLM_ADMISSION.submit(start)
+
+
+def _deadline_fallback(future: Future) -> Tuple[str, str]:
+    # A running worker stops on its own shortly after and counts the timeout
+    # in LLM_ERRORS itself; a call cancelled while still queued never runs, so
+    # it is counted here. Either way the caller answers now.
+    if future.cancel():
+        LLM_ERRORS.inc(kind="timeout")
+    return "", "timeout"
+
+
+def run_analysis(payload: AnalyzeRequest | Dict[str, Any]) -> AnalyzeResponse:
+    prepared = prepare_analysis(payload)
+    summary, fallback_reason = "", "overload"
+    # Shed LLM work under load so the deterministic summary returns immediately
+    # instead of queueing behind slow completions.
+    future = _submit_summary(prepared["prompt"])
+    if future is not None:
+        try:
+            summary, fallback_reason = future.result(timeout=_SUMMARY_WAIT_S)
+        except FutureTimeoutError:
+            summary, fallback_reason = _deadline_fallback(future)
+    return _build_response(prepared, summary, fallback_reason)
+
+
+async def summarize_analysis_async(prepared: Dict[str, Any], call_site: str = "api.analyze") -> AnalyzeResponse:
+    summary, fallback_reason = "", "overload"
+    future = _submit_summary(prepared["prompt"], call_site)
+    if future is not None:
+        try:
+            summary, fallback_reason = await asyncio.wait_for(asyncio.wrap_future(future), _SUMMARY_WAIT_S)
+        except asyncio.TimeoutError:
+            summary, fallback_reason = _deadline_fallback(future)
+    return _build_response(prepared, summary, fallback_reason)
+
+
+async def run_analysis_async(payload: AnalyzeRequest | Dict[str, Any]) -> AnalyzeResponse:
+    # Deterministic work stays on the event loop (it takes milliseconds); only the
+    # model call is handed to the dedicated LLM executor.
+    prepared = prepare_analysis(payload)
+    return await summarize_analysis_async(prepared)
+
+
+def warmup() -> None:
+    # Run one deterministic analysis outside the stage timers so validators, the
+    # simulation and prompt formatting are hot before the first real request.
+    from .sample_payloads import SAMPLE_REQUEST
+
+    payload = _validate_payload(SAMPLE_REQUEST)
+    simulated = simulate(payload)
+    llm_inputs = _clamp_llm_inputs(payload, simulated)
+    build_summary_prompt(
+        llm_inputs["profile"],
+        llm_inputs["scenario"],
+        llm_inputs["metrics"],
+        simulated["alert"],
+        llm_inputs["savings_total"],
+        llm_inputs["timeline_stats"],
+        llm_inputs["stability_label"],
+    )
+    summary = _deterministic_summary(payload, simulated["metrics"], simulated["alert"], simulated["timeline"])
+    AnalyzeResponse(
+        metrics=Metrics(**simulated["metrics"]),
+        timeline=simulated["timeline"],
+        savings_total=simulated["savings_total"],
+        alert=simulated["alert"],
+        summary=summary,
+    ).model_dump_json()
+    LLM_EXECUTOR.start()
+    warmup_nemotron_client()
@@ -1,11 +1,220 @@
-from typing import Dict
+import json
+import os
+from typing import Any, Dict
 
+from app.ai.compact import COMPACT_NOTE, LLM_COMPACT_CONTEXT, compact_lines, encode_context
+from app.ai.prompt_layout import PromptParts
+
+# "single" (default) sends the original one-message prompts. "prefix" sends a
+# shared system message, then each template's fixed instructions, then the
+# request data, so the server's prefix cache can reuse everything up to the
+# data. It costs more prompt tokens (about 19% across the prefix_cache_ttft
+# benchmark sessions) and has only been measured against the mock NIM.
+LLM_PROMPT_LAYOUT = os.getenv("LLM_PROMPT_LAYOUT", "single").strip().lower()
+
+SYSTEM_PROMPT = """
+You are RiseArc, a financial assistant powered by Nemotron.
+Do NOT provide investment advice, stock picks, buy/sell/hold guidance, or promises of returns.
+Do NOT mention investing, investments, stocks, ETFs, crypto, portfolios, mutual funds, or bonds.
+Keep the tone supportive and practical, never alarmist.
+""".strip()
+
+SUMMARY_INSTRUCTIONS = """
+Generate a concise, practical summary based on the user's profile and scenario.
+Do NOT provide investment advice, stock picks, buy/sell/hold guidance, or promises of returns.
+Do NOT mention investing, investments, stocks, ETFs, crypto, portfolios, mutual funds, or bonds.
+Avoid language that sounds like a recommendation to invest. Focus on cash flow, runway, debt management, and risk reduction.
+Keep the tone supportive and solution-focused, never alarmist.
+If asked about market products, redirect to budgeting, debt, and emergency savings fundamentals.
+
+Return in this format:
+Summary:
+- ...
+- ...
+- ...
+Actions:
+- ...
+- ...
+- ...
+Warnings:
+- ...
+""".strip()
+
+STRUCTURED_INSTRUCTIONS = """
+Your job is to explain the user's finances clearly and helpfully based only on the provided data.
+Do NOT calculate new numbers. Use the formatted numbers exactly as provided.
+Do NOT invent missing values. If you need clarification, ask a follow-up question.
+Do NOT provide investment advice or stock recommendations.
+Do NOT mention investing, investments, stocks, ETFs, crypto, portfolios, mutual funds, or bonds.
+Keep the tone supportive and practical, never alarmist or discouraging.
+
+Return ONLY valid JSON with the following schema:
+{
+  "summary": "1-2 sentences",
+  "key_facts": ["short bullet", "..."],
+  "meaning": "1-3 sentences interpreting the facts",
+  "actions": ["prioritized action", "..."],
+  "warnings": ["short warning", "..."],
+  "followup": "one short clarifying question"
+}
+
+Rules:
+- Use only the values in DATA.
+- If MODE is "scenario", base your Summary/Meaning on the scenario metrics and do not claim current cash flow is negative unless the scenario shows that.
+- If MODE is "chat" and scenario metrics are present, clearly distinguish current vs scenario numbers.
+- If cash flow is positive, do not claim a negative cash flow.
+- If MODE is "scenario" or "overview", set "followup" to an empty string.
+- Use "You" to address the reader. Do not say "the user".
+- Prefix all money amounts with "$".
+- When stating net cash flow, use a compact label like "Net cash flow: +$1,800/mo" or "-$3,400/mo".
+- In scenario mode, use the exact net cash flow value from DATA and do not invent a different monthly burn/cash-flow number.
+- Keep "meaning" conversational. Start with "In simple terms:" only if the user explicitly asked for simple wording.
+- Avoid wording like "job stability in tech"; prefer "stable job in the tech industry".
+- In "actions", include at least one concrete numeric target (dollars per month or months of expenses) when data allows.
+- Keep recommendations focused on controllable steps in budgeting, debt management, income stability, and emergency reserves.
+- When risk is high, pair each warning with a clear next step.
+- If net cash flow is negative, prioritize actions in this order: cut expenses, secure income, then debt optimization.
+- Do not suggest "prioritize emergency savings" as the first action when income is already gone and cash flow is negative.
+- If runway is "Not constrained", say savings are growing.
+- Avoid placeholders like $income, $debt, or 'debt ratio is Debt'.
+- Do not repeat the same sentence in multiple sections.
+- Use plain language.
+""".strip()
+
+CHAT_INSTRUCTIONS = """
+Rules:
+- Answer the user's exact question first. If they asked for clarification, clarify the specific prior point.
+- Do not use fixed report sections like Summary/Key Facts unless the user explicitly asks for a structured report.
+- Keep the response concise and human (about 2-6 sentences).
+- If the user asks what to do next, give a prioritized 2-4 step plan with at least one concrete numeric target when data allows.
+- Use only the values in CONTEXT when citing numbers.
+- Prefix money amounts with "$".
+- If the user says "yes" without details after your follow-up question, ask one short clarifying question.
+- Keep tone supportive and solution-focused.
+- Do not provide investment advice.
+- Do not mention investing, investments, stocks, ETFs, crypto, portfolios, mutual funds, or bonds.
+""".strip()
+
+SMALL_TALK_INSTRUCTIONS = (
+    "Respond briefly and naturally "
+    "to the user's message in 1-2 sentences. Do not use headings or bullets. "
+    "Do not use a fixed template or repeated sentence; vary your wording. "
+    "If the user greets you, greet them back. If they ask how you are, answer politely "
+    "and then ask what they would like help with. Do not mention finances unless the "
+    "user does. Never mention investing, stocks, ETFs, crypto, or portfolios."
+)
+
+HISTORY_SUMMARY_INSTRUCTIONS = """
+Update the running summary of an earlier part of your conversation with the user.
+Keep the user's goals, decisions, constraints and any open question you asked them.
+Leave out figures from their profile or metrics; those are provided separately.
+Write at most 3 short sentences of plain text, no bullets or headings.
+""".strip()
 
 
 def format_currency(value: float) -> str:
     return f"${value:,.0f}"
 
 
+def _question_last(context: Dict[str, Any]) -> Dict[str, Any]:
+    # The question changes every turn; the rest of the context is stable for a
+    # session, so it goes first where the prefix cache can keep it.
+    if "question" not in context:
+        return context
+    reordered = {key: value for key, value in context.items() if key != "question"}
+    reordered["question"] = context["question"]
+    return reordered
+
+
+def _with_note(instructions: str, compact: bool) -> str:
+    return f"{instructions}\n{COMPACT_NOTE}" if compact else instructions
+
+
+def build_structured_prompt(
+    mode: str,
+    context: Dict[str, Any],
+    layout: str = LLM_PROMPT_LAYOUT,
+    compact: bool = LLM_COMPACT_CONTEXT,
+) -> PromptParts:
+    instructions = _with_note(STRUCTURED_INSTRUCTIONS, compact)
+    if layout == "single":
+        data_blob = encode_context(context, compact)
+        text = (
+            "You are RiseArc, a financial assistant powered by Nemotron.\n"
+            f"{instructions}\n\nMODE: {mode}\nDATA:\n{data_blob}"
+        )
+        return PromptParts("", text, "")
+    data_blob = encode_context(_question_last(context), compact)
+    return PromptParts(SYSTEM_PROMPT, instructions, f"MODE: {mode}\nDATA:\n{data_blob}")
+
+
+def build_chat_prompt(
+    context: Dict[str, Any],
+    history_snippet: str,
+    question: str,
+    layout: str = LLM_PROMPT_LAYOUT,
+    compact: bool = LLM_COMPACT_CONTEXT,
+) -> PromptParts:
+    history = history_snippet or "(none)"
+    instructions = _with_note(CHAT_INSTRUCTIONS, compact)
+    if compact:
+        # USER QUESTION already carries it.
+        context = {key: value for key, value in context.items() if key != "question"}
+    if layout == "single":
+        text = (
+            "You are RiseArc, a financial assistant. Respond naturally in conversation.\n\n"
+            f"{instructions}\n\n"
+            f"RECENT CONVERSATION:\n{history}\n\n"
+            f"CONTEXT:\n{encode_context(context, compact)}\n\n"
+            f"USER QUESTION:\n{question}"
+        )
+        return PromptParts("", text, "")
+    # Context before history: the history window shifts every turn, the context does not.
+    suffix = (
+        f"CONTEXT:\n{encode_context(_question_last(context), compact)}\n\n"
+        f"RECENT CONVERSATION:\n{history}\n\n"
+        f"USER QUESTION:\n{question}"
+    )
+    return PromptParts(SYSTEM_PROMPT, f"Respond naturally in conversation.\n\n{instructions}", suffix)
+
+
+def build_extraction_prompt(
+    schema: Dict[str, str],
+    user_text: str,
+    layout: str = LLM_PROMPT_LAYOUT,
+    compact: bool = LLM_COMPACT_CONTEXT,
+) -> PromptParts:
+    schema_blob = json.dumps(schema, separators=(",", ":")) if compact else json.dumps(schema)
+    instructions = (
+        "You extract scenario details from user text for a financial simulator.\n"
+        "Return ONLY a JSON object. Do not include any extra text.\n"
+        "If a field is unknown, omit it.\n"
+        f"Schema: {schema_blob}"
+    )
+    request = f"User request: {user_text}"
+    if layout == "single":
+        return PromptParts("", f"{instructions}\n\n{request}", "")
+    return PromptParts(SYSTEM_PROMPT, instructions, request)
+
+
+def build_small_talk_prompt(message: str, layout: str = LLM_PROMPT_LAYOUT) -> PromptParts:
+    if layout == "single":
+        text = (
+            f"You are RiseArc, a friendly financial assistant. {SMALL_TALK_INSTRUCTIONS}"
+            f"\nUser: {message}\nAssistant:"
+        )
+        return PromptParts("", text, "")
+    return PromptParts(SYSTEM_PROMPT, SMALL_TALK_INSTRUCTIONS, f"User: {message}\nAssistant:")
+
+
+def build_history_summary_prompt(previous: str, transcript: str) -> PromptParts:
+    return PromptParts(
+        SYSTEM_PROMPT,
+        HISTORY_SUMMARY_INSTRUCTIONS,
+        f"SUMMARY SO FAR:\n{previous or '(none)'}\n\nNEW MESSAGES:\n{transcript}",
+    )
+
+
 def build_summary_prompt(
     profile: Dict[str, float],
     scenario: Dict[str, float],
@@ -14,7 +223,9 @@ def build_summary_prompt(
     savings_total: float,
     timeline_stats: Dict[str, float],
     job_stability_value: str,
-) -> str:
+    layout: str = LLM_PROMPT_LAYOUT,
+    compact: bool = LLM_COMPACT_CONTEXT,
+) -> PromptParts:
     profile_debt_payment = float(profile.get("debt_payment_monthly", 0.0))
     total_required_outflow = float(profile.get("expenses_monthly", 0.0)) + profile_debt_payment
     monthly_addons_total = (
@@ -25,27 +236,7 @@ def build_summary_prompt(
         + scenario.get("job_search_monthly", 0.0)
     )
     one_time_total = scenario.get("one_time_expense", 0.0) + scenario.get("relocation_cost", 0.0)
-    return f"""
-You are RiseArc, a financial assistant powered by Nemotron-3-Nano.
-Generate a concise, practical summary based on the user's profile and scenario.
-Do NOT provide investment advice, stock picks, buy/sell/hold guidance, or promises of returns.
-Do NOT mention investing, investments, stocks, ETFs, crypto, portfolios, mutual funds, or bonds.
-Avoid language that sounds like a recommendation to invest. Focus on cash flow, runway, debt management, and risk reduction.
-Keep the tone supportive and solution-focused, never alarmist.
-If asked about market products, redirect to budgeting, debt, and emergency savings fundamentals.
-
-Return in this format:
-Summary:
-- ...
-- ...
-- ...
-Actions:
-- ...
-- ...
-- ...
-Warnings:
-- ...
-
+    data = f"""
 User Profile:
 - Monthly income: {format_currency(profile['income_monthly'])}
 - Monthly living expenses (excl. debt): {format_currency(profile['expenses_monthly'])}
@@ -90,3 +281,10 @@ Computed Metrics:
 Alert Context:
 {alert}
 """.strip()
+    instructions = _with_note(SUMMARY_INSTRUCTIONS, compact)
+    if compact:
+        data = compact_lines(data)
+    if layout == "single":
+        text = f"You are RiseArc, a financial assistant powered by Nemotron-3-Nano.\n{instructions}\n\n{data}"
+        return PromptParts("", text, "")
+    return PromptParts(SYSTEM_PROMPT, instructions, data)
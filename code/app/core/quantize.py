@@ -0,0 +1,86 @@
+import math
+import os
+from typing import Any, Dict
+
+# Rounds LLM-bound numbers onto coarse buckets so near-identical inputs
+# ($3,401 vs $3,400) produce the same prompt and hit the response cache.
+# Only prompt inputs are quantized; the metrics returned to clients stay exact.
+LLM_QUANTIZE = os.getenv("LLM_QUANTIZE", "").lower() in {"1", "true", "yes"}
+LLM_QUANTIZE_MONEY_STEP = max(0.0, float(os.getenv("LLM_QUANTIZE_MONEY_STEP", "50")))
+LLM_QUANTIZE_MONEY_SIG_FIGS = max(1, int(os.getenv("LLM_QUANTIZE_MONEY_SIG_FIGS", "3")))
+LLM_QUANTIZE_MONTHS_STEP = max(0.0, float(os.getenv("LLM_QUANTIZE_MONTHS_STEP", "0.5")))
+LLM_QUANTIZE_RATIO_STEP = max(0.0, float(os.getenv("LLM_QUANTIZE_RATIO_STEP", "0.01")))
+LLM_QUANTIZE_SCORE_STEP = max(0.0, float(os.getenv("LLM_QUANTIZE_SCORE_STEP", "1")))
+
+# Fields that are counts or already discrete keep their values.
+EXACT_FIELDS = {"dependents", "months_unemployed", "income_start_month"}
+
+
+def quantize_step(value: float, step: float) -> float:
+    if step <= 0:
+        return float(value)
+    # Round half away from zero so +x and -x land in mirrored buckets.
+    buckets = math.floor(abs(value) / step + 0.5)
+    return math.copysign(buckets * step, value) + 0.0
+
+
+def quantize_money(
+    value: float,
+    step: float = LLM_QUANTIZE_MONEY_STEP,
+    sig_figs: int = LLM_QUANTIZE_MONEY_SIG_FIGS,
+) -> float:
+    # Whichever is coarser: the fixed step or the significant-figure bucket,
+    # so $3,401 -> $3,400 and $1,234,567 -> $1,230,000.
+    if value == 0:
+        return 0.0
+    magnitude = math.floor(math.log10(abs(value)))
+    relative_step = 10.0 ** (magnitude - sig_figs + 1)
+    return quantize_step(value, max(step, relative_step))
+
+
+def quantize_months(value: float, step: float = LLM_QUANTIZE_MONTHS_STEP) -> float:
+    return quantize_step(value, step)
+
+
+def _field_kind(name: str) -> str:
+    if name in EXACT_FIELDS:
+        return "exact"
+    if "month" in name and not name.endswith("_monthly") and "monthly_" not in name:
+        return "months"
+    if "ratio" in name:
+        return "ratio"
+    if "risk" in name or name.endswith("_pct"):
+        return "score"
+    return "money"
+
+
+def quantize_value(name: str, value: Any) -> Any:
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return value
+    kind = _field_kind(name)
+    if kind == "months":
+        return quantize_months(value)
+    if kind == "ratio":
+        return quantize_step(value, LLM_QUANTIZE_RATIO_STEP)
+    if kind == "score":
+        return quantize_step(value, LLM_QUANTIZE_SCORE_STEP)
+    if kind == "money":
+        return quantize_money(value)
+    return value
+
+
+def quantize_fields(values: Dict[str, Any] | None) -> Dict[str, Any] | None:
+    if values is None:
+        return None
+    return {name: quantize_value(name, value) for name, value in values.items()}
+
+
+def quantize_llm_inputs(llm_inputs: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        **llm_inputs,
+        "profile": quantize_fields(llm_inputs["profile"]),
+        "scenario": quantize_fields(llm_inputs["scenario"]),
+        "metrics": quantize_fields(llm_inputs["metrics"]),
+        "timeline_stats": quantize_fields(llm_inputs["timeline_stats"]),
+        "savings_total": quantize_money(llm_inputs["savings_total"]),
+    }
@@ -1,9 +1,37 @@
-from fastapi import FastAPI
+import asyncio
+import os
+import threading
+from contextlib import asynccontextmanager
 
+from fastapi import FastAPI, Response, WebSocket, WebSocketDisconnect
+from fastapi.responses import PlainTextResponse
+
+from app.ai.budgets import LLM_BUDGETS
+from app.ai.nemotron_client import NEMOTRON_ROUTER
+from app.ai.telemetry import LLM_TELEMETRY
+from app.core.live import LiveScenarioSession
+from app.core.metrics import PROMETHEUS_CONTENT_TYPE, REGISTRY, request_timings
 from app.core.models import AnalyzeRequest, AnalyzeResponse
-from app.core.pipeline import run_analysis
+from app.core.llm_executor import LLM_EXECUTOR
+from app.core.pipeline import run_analysis_async, warmup
+
+ANALYZE_DEBUG_TIMINGS = os.getenv("ANALYZE_DEBUG_TIMINGS", "").lower() in {"1", "true", "yes"}
+# "background" serves /health immediately while clients and caches warm up,
+# "blocking" delays readiness until warmup finishes, "off" skips it.
+APP_WARMUP = os.getenv("APP_WARMUP", "background").lower()
+
 
-app = FastAPI(title="RiseArc Core API")
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    if APP_WARMUP == "blocking":
+        await asyncio.get_running_loop().run_in_executor(None, warmup)
+    elif APP_WARMUP != "off":
+        threading.Thread(target=warmup, name="risearc-warmup", daemon=True).start()
+    yield
+    LLM_EXECUTOR.shutdown()
+
+
+app = FastAPI(title="RiseArc Core API", lifespan=lifespan)
 
 
 @app.get("/health")
@@ -11,6 +39,37 @@ def health():
     return {"status": "ok"}
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    return PlainTextResponse(REGISTRY.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+
+@app.get("/llm/telemetry")
+def llm_telemetry(limit: int = 50):
+    snapshot = LLM_TELEMETRY.snapshot(limit=max(0, min(limit, LLM_TELEMETRY.capacity)))
+    snapshot["budgets"] = LLM_BUDGETS.snapshot()
+    snapshot["routes"] = NEMOTRON_ROUTER.snapshot()
+    return snapshot
+
+
 @app.post("/analyze", response_model=AnalyzeResponse)
-def analyze(payload: AnalyzeRequest):
-    return run_analysis(payload)
+async def analyze(payload: AnalyzeRequest, response: Response, debug: bool = False):
+    with request_timings() as timings:
+        result = await run_analysis_async(payload)
+    response.headers["Server-Timing"] = timings.server_timing()
+    if debug or ANALYZE_DEBUG_TIMINGS:
+        result.timings = timings.breakdown()
+    return result
+
+
+@app.websocket("/ws/scenario")
+async def scenario_socket(websocket: WebSocket):
+    await websocket.accept()
+    session = LiveScenarioSession(websocket.send_json)
+    try:
+        while True:
+            await session.handle_text(await websocket.receive_text())
+    except WebSocketDisconnect:
+        pass
+    finally:
+        session.close()
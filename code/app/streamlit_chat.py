@@ -1,3 +1,4 @@
+import contextlib
 import html
 import json
 import os
@@ -6,7 +7,7 @@ import sys
 import time
 import unicodedata
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Callable, Dict, List
 
 import streamlit as st
 import streamlit.components.v1 as components
@@ -36,8 +37,48 @@ try:
         adjust_risk_for_scenario,
         total_savings_leaks,
     )
-    from app.ai.nemotron_client import check_nemotron_online, extract_text, query_nemotron
+    from app.core.quantize import LLM_QUANTIZE, quantize_fields
+    from app.ai.deadline import deadline as llm_deadline
+    from app.ai.best_of import LLM_BEST_OF_N, LLM_BEST_OF_STATS, best_of
+    from app.ai.budgets import LLM_BUDGETS
+    from app.ai.continuation import query_with_continuation, salvage_json
+    from app.ai.structured import json_schema as model_json_schema, parse_model
+    from app.core.models import ScenarioExtraction, StructuredSummary
+    from app.core.history import LLM_HISTORY_SUMMARY_TOKENS, build_history_window, new_history_state
+    from app.core.prompts import (
+        PromptParts,
+        build_chat_prompt,
+        build_extraction_prompt,
+        build_history_summary_prompt,
+        build_small_talk_prompt,
+        build_structured_prompt,
+    )
+    from app.ai.telemetry import LLM_TELEMETRY
+    from app.ai.nemotron_client import check_nemotron_online, extract_text, query_nemotron, stream_nemotron
 except Exception:
+    LLM_QUANTIZE = False
+    quantize_fields = None
+    llm_deadline = None
+    LLM_TELEMETRY = None
+    LLM_BUDGETS = None
+    LLM_BEST_OF_N = 1
+    LLM_BEST_OF_STATS = None
+    best_of = None
+    query_with_continuation = None
+    salvage_json = None
+    model_json_schema = None
+    parse_model = None
+    ScenarioExtraction = None
+    StructuredSummary = None
+    LLM_HISTORY_SUMMARY_TOKENS = 0
+    build_history_window = None
+    new_history_state = None
+    PromptParts = None
+    build_chat_prompt = None
+    build_extraction_prompt = None
+    build_history_summary_prompt = None
+    build_small_talk_prompt = None
+    build_structured_prompt = None
     clamp = None
     compute_debt_ratio = None
     compute_risk_score = None
@@ -47,6 +88,7 @@ except Exception:
     total_savings_leaks = None
     extract_text = None
     query_nemotron = None
+    stream_nemotron = None
     check_nemotron_online = None
 
 
@@ -59,6 +101,9 @@ JOB_STABILITY_LABELS = {value: label for label, value in JOB_STABILITY_OPTIONS.i
 BASELINE_SUMMARY_VERSION = "v4-currency-locked"
 CHAT_HISTORY_CURRENCY_VERSION = "v9-markdown-strip-fix"
 TIMELINE_HORIZON_MONTHS = 60
+STREAM_RENDER_INTERVAL_S = 0.08
+# Whole chat turn, retries included; past it the user gets the fallback text.
+CHAT_TURN_DEADLINE_S = max(0.0, float(os.getenv("CHAT_TURN_DEADLINE_S", "8")))
 INVESTMENT_TERMS_PATTERN = re.compile(
     r"\b("
     r"invest|investing|investment|invested|"
@@ -2035,6 +2080,11 @@ def strip_markdown_artifacts(text: str) -> str:
     return cleaned.strip()
 
 
+def passes_readability_guardrail(text: str) -> bool:
+    candidate = clean_text_block(text or "")
+    return bool(candidate) and not has_corrupted_spacing(candidate) and not has_garbled_sequences(candidate)
+
+
 def enforce_readability_guardrail(text: str, fallback: str = "") -> str:
     prepped = html.unescape(str(text or ""))
     prepped = unicodedata.normalize("NFKC", prepped)
@@ -2337,13 +2387,15 @@ def parse_json_response(raw: str) -> Dict[str, Any] | None:
         return None
     start = raw.find("{")
     end = raw.rfind("}")
-    if start == -1 or end == -1 or end <= start:
-        return None
-    snippet = raw[start : end + 1]
-    try:
-        data = json.loads(snippet)
-    except Exception:
-        return None
+    data: Any = None
+    if start != -1 and end > start:
+        try:
+            data = json.loads(raw[start : end + 1])
+        except Exception:
+            data = None
+    if not isinstance(data, dict) and salvage_json:
+        # Truncated or damaged output: keep whichever fields did complete.
+        data = salvage_json(raw)
     if not isinstance(data, dict):
         return None
     return data
@@ -2538,53 +2590,8 @@ def format_structured_markdown(text: str) -> str:
     return text.strip()
 
 
-def build_nemotron_prompt(mode: str, context: Dict[str, Any]) -> str:
-    data_blob = json.dumps(context, indent=2)
-    return f"""
-You are RiseArc, a financial assistant powered by Nemotron.
-Your job is to explain the user's finances clearly and helpfully based only on the provided data.
-Do NOT calculate new numbers. Use the formatted numbers exactly as provided.
-Do NOT invent missing values. If you need clarification, ask a follow-up question.
-Do NOT provide investment advice or stock recommendations.
-Do NOT mention investing, investments, stocks, ETFs, crypto, portfolios, mutual funds, or bonds.
-Keep the tone supportive and practical, never alarmist or discouraging.
-
-Return ONLY valid JSON with the following schema:
-{{
-  "summary": "1-2 sentences",
-  "key_facts": ["short bullet", "..."],
-  "meaning": "1-3 sentences interpreting the facts",
-  "actions": ["prioritized action", "..."],
-  "warnings": ["short warning", "..."],
-  "followup": "one short clarifying question"
-}}
-
-Rules:
-- Use only the values in DATA.
-- If MODE is "scenario", base your Summary/Meaning on the scenario metrics and do not claim current cash flow is negative unless the scenario shows that.
-- If MODE is "chat" and scenario metrics are present, clearly distinguish current vs scenario numbers.
-- If cash flow is positive, do not claim a negative cash flow.
-- If MODE is "scenario" or "overview", set "followup" to an empty string.
-- Use "You" to address the reader. Do not say "the user".
-- Prefix all money amounts with "$".
-- When stating net cash flow, use a compact label like "Net cash flow: +$1,800/mo" or "-$3,400/mo".
-- In scenario mode, use the exact net cash flow value from DATA and do not invent a different monthly burn/cash-flow number.
-- Keep "meaning" conversational. Start with "In simple terms:" only if the user explicitly asked for simple wording.
-- Avoid wording like "job stability in tech"; prefer "stable job in the tech industry".
-- In "actions", include at least one concrete numeric target (dollars per month or months of expenses) when data allows.
-- Keep recommendations focused on controllable steps in budgeting, debt management, income stability, and emergency reserves.
-- When risk is high, pair each warning with a clear next step.
-- If net cash flow is negative, prioritize actions in this order: cut expenses, secure income, then debt optimization.
-- Do not suggest "prioritize emergency savings" as the first action when income is already gone and cash flow is negative.
-- If runway is "Not constrained", say savings are growing.
-- Avoid placeholders like $income, $debt, or 'debt ratio is Debt'.
-- Do not repeat the same sentence in multiple sections.
-- Use plain language.
-
-MODE: {mode}
-DATA:
-{data_blob}
-""".strip()
+def build_nemotron_prompt(mode: str, context: Dict[str, Any]) -> "str | PromptParts":
+    return build_structured_prompt(mode, context)
 
 
 def build_nemotron_context(
@@ -2596,6 +2603,13 @@ def build_nemotron_context(
     question: str | None = None,
     mode: str = "chat",
 ) -> Dict[str, Any]:
+    if LLM_QUANTIZE and quantize_fields:
+        # Same buckets as the API prompt so repeated chat turns reuse cached answers.
+        profile = quantize_fields(profile)
+        metrics = quantize_fields(metrics)
+        scenario = quantize_fields(scenario)
+        scenario_metrics = quantize_fields(scenario_metrics)
+        timeline_stats = quantize_fields(timeline_stats)
     income = float(profile.get("income_monthly", 0.0))
     living_expenses = float(profile.get("expenses_monthly", 0.0))
     baseline_debt_payment = profile_monthly_debt_payment(profile)
@@ -2688,6 +2702,56 @@ def format_chat_history_snippet(chat_history: List[Dict[str, str]], max_messages
     return "\n".join(lines).strip()
 
 
+def summarize_chat_history(previous: str, transcript: str) -> str:
+    return query_nemotron_text(
+        build_history_summary_prompt(previous, transcript),
+        max_tokens=LLM_HISTORY_SUMMARY_TOKENS,
+        temperature=0.2,
+        mode="history_summary",
+        call_site="streamlit.history_summary",
+    )
+
+
+def chat_turn_deadline() -> Any:
+    if llm_deadline is None:
+        return contextlib.nullcontext()
+    return llm_deadline(CHAT_TURN_DEADLINE_S)
+
+
+def query_nemotron_text(
+    prompt: "str | PromptParts",
+    max_tokens: int | None = None,
+    temperature: float | None = None,
+    on_partial: Callable[[str], None] | None = None,
+    use_cache: bool = True,
+    mode: str = "chat",
+    call_site: str = "streamlit.chat",
+    accept: Callable[[str], bool] | None = None,
+) -> str:
+    options = {"max_tokens": max_tokens, "temperature": temperature, "use_cache": use_cache, "accept": accept}
+    labels = {"mode": mode, "call_site": call_site}
+    if on_partial is None or not stream_nemotron:
+        return extract_text(query_nemotron(prompt, **options, **labels)).strip()
+    stream = stream_nemotron(prompt, **options, **labels)
+    for _ in stream:
+        on_partial(stream.text)
+    return extract_text(stream.response()).strip()
+
+
+def make_stream_renderer(placeholder: Any) -> Callable[[str], None]:
+    # Throttle redraws: Streamlit re-sends the element on every update.
+    last_render = [0.0]
+
+    def render(partial: str) -> None:
+        now = time.monotonic()
+        if now - last_render[0] < STREAM_RENDER_INTERVAL_S:
+            return
+        last_render[0] = now
+        placeholder.markdown(render_plain_chat_text(strip_markdown_artifacts(partial)), unsafe_allow_html=True)
+
+    return render
+
+
 def nemotron_generate_conversational(
     profile: Dict[str, Any],
     metrics: Dict[str, float],
@@ -2695,6 +2759,8 @@ def nemotron_generate_conversational(
     chat_history: List[Dict[str, str]],
     scenario: Dict[str, Any] | None = None,
     scenario_metrics: Dict[str, float] | None = None,
+    on_partial: Callable[[str], None] | None = None,
+    history_state: Dict[str, Any] | None = None,
 ) -> str:
     if not query_nemotron or not extract_text:
         return "Nemotron is unavailable right now. Please start the server and try again."
@@ -2714,36 +2780,36 @@ def nemotron_generate_conversational(
         question=question,
         mode="chat",
     )
-    history_snippet = format_chat_history_snippet(chat_history)
-    context_blob = json.dumps(context, indent=2)
-
-    prompt = f"""
-You are RiseArc, a financial assistant. Respond naturally in conversation.
-
-Rules:
-- Answer the user's exact question first. If they asked for clarification, clarify the specific prior point.
-- Do not use fixed report sections like Summary/Key Facts unless the user explicitly asks for a structured report.
-- Keep the response concise and human (about 2-6 sentences).
-- If the user asks what to do next, give a prioritized 2-4 step plan with at least one concrete numeric target when data allows.
-- Use only the values in CONTEXT when citing numbers.
-- Prefix money amounts with "$".
-- If the user says "yes" without details after your follow-up question, ask one short clarifying question.
-- Keep tone supportive and solution-focused.
-- Do not provide investment advice.
-- Do not mention investing, investments, stocks, ETFs, crypto, portfolios, mutual funds, or bonds.
-
-RECENT CONVERSATION:
-{history_snippet or "(none)"}
-
-CONTEXT:
-{context_blob}
-
-USER QUESTION:
-{question}
-""".strip()
+    if build_history_window and history_state is not None:
+        # Recent turns verbatim, older ones as a rolling summary kept in session state.
+        history_snippet = build_history_window(
+            chat_history,
+            history_state,
+            context=context,
+            summarize=summarize_chat_history,
+        )
+    else:
+        history_snippet = format_chat_history_snippet(chat_history)
+    prompt = build_chat_prompt(context, history_snippet, question)
+    use_best_of = bool(best_of) and LLM_BEST_OF_N > 1
+
+    def generate(temperature: float, primary: bool) -> str:
+        return query_nemotron_text(
+            prompt,
+            max_tokens=420,
+            temperature=temperature,
+            # A streamed answer cannot be taken back if a spare replaces it.
+            on_partial=None if use_best_of else on_partial,
+            call_site="streamlit.chat" if primary else "streamlit.chat.best_of",
+            accept=passes_readability_guardrail,
+        )
 
     try:
-        raw = extract_text(query_nemotron(prompt, max_tokens=420, temperature=0.35)).strip()
+        if use_best_of:
+            # Spares at higher temperatures replace an answer the guardrail would throw away.
+            raw, _ = best_of(generate, passes_readability_guardrail, temperature=0.35)
+        else:
+            raw = generate(0.35, True)
         record_nemotron_status(True)
     except Exception as exc:
         record_nemotron_status(False)
@@ -2862,8 +2928,55 @@ def nemotron_generate_structured(
         mode=mode,
     )
     prompt = build_nemotron_prompt(mode, context)
+    schema = model_json_schema(StructuredSummary) if model_json_schema else None
+
+    def generate(temperature: float, primary: bool) -> str:
+        call_site = "streamlit.structured" if primary else "streamlit.structured.best_of"
+        if query_with_continuation:
+            text, _ = query_with_continuation(
+                prompt,
+                temperature=temperature,
+                mode=mode,
+                call_site=call_site,
+                json_schema=schema,
+                accept=accepted,
+            )
+            return text
+        return extract_text(
+            query_nemotron(prompt, temperature=temperature, mode=mode, call_site=call_site, accept=accepted)
+        )
+
+    def render_raw(raw: str) -> str:
+        typed = parse_model(raw, StructuredSummary) if parse_model else None
+        parsed = typed.model_dump() if typed is not None else parse_json_response(raw)
+        if not parsed or not any(
+            [
+                parsed.get("summary"),
+                parsed.get("key_facts"),
+                parsed.get("meaning"),
+                parsed.get("actions"),
+                parsed.get("warnings"),
+            ]
+        ):
+            return ""
+        parsed = apply_structured_guardrails(parsed, mode, profile, scenario_metrics or metrics, scenario)
+        text = render_structured_response(
+            parsed,
+            include_followup=include_followup,
+            force_simple_terms=simple_terms_requested,
+        )
+        if not text or has_placeholder_artifacts(text) or has_corrupted_spacing(text):
+            return ""
+        return text
+
+    def accepted(raw: str) -> bool:
+        return passes_readability_guardrail(render_raw(raw))
+
     try:
-        raw = extract_text(query_nemotron(prompt))
+        if best_of and LLM_BEST_OF_N > 1:
+            raw, _ = best_of(generate, accepted, temperature=0.2)
+        else:
+            raw = generate(0.2, True)
         record_nemotron_status(True)
     except Exception as exc:
         record_nemotron_status(False)
@@ -2872,29 +2985,10 @@ def nemotron_generate_structured(
             return finalize_output(fallback, fallback=fallback)
         return finalize_output(format_nemotron_error(str(exc), mode))
 
-    parsed = parse_json_response(raw)
-    if not parsed or not any(
-        [
-            parsed.get("summary"),
-            parsed.get("key_facts"),
-            parsed.get("meaning"),
-            parsed.get("actions"),
-            parsed.get("warnings"),
-        ]
-    ):
-        fallback = deterministic_fallback()
-        return finalize_output(fallback, fallback=fallback)
-
-    parsed = apply_structured_guardrails(parsed, mode, profile, scenario_metrics or metrics, scenario)
-    text = render_structured_response(
-        parsed,
-        include_followup=include_followup,
-        force_simple_terms=simple_terms_requested,
-    )
-    if not text or has_placeholder_artifacts(text) or has_corrupted_spacing(text):
-        fallback = deterministic_fallback()
-        return finalize_output(fallback, fallback=fallback)
+    text = render_raw(raw)
     fallback = deterministic_fallback()
+    if not text:
+        return finalize_output(fallback, fallback=fallback)
     return finalize_output(text, fallback=fallback)
 
 
@@ -2916,24 +3010,18 @@ def render_plain_chat_text(text: str) -> str:
 
 
 def get_nemotron_status() -> bool:
-    last_ok = st.session_state.get("nemotron_last_ok")
-    last_checked = st.session_state.get("nemotron_last_checked", 0.0)
-    if last_ok is not None and time.time() - last_checked < 60:
-        return bool(last_ok)
+    # Reads the process-wide circuit breaker, which every session's real calls
+    # feed; only a half-open breaker costs a single probe request.
     if not check_nemotron_online:
         return False
     try:
-        status = bool(check_nemotron_online())
-        st.session_state.nemotron_last_ok = status
-        st.session_state.nemotron_last_checked = time.time()
-        return status
+        return bool(check_nemotron_online())
     except Exception:
         return False
 
 
 def record_nemotron_status(is_online: bool) -> None:
     st.session_state.nemotron_last_ok = bool(is_online)
-    st.session_state.nemotron_last_checked = time.time()
 
 
 def safe_json_from_text(text: str) -> Dict[str, Any]:
@@ -2941,8 +3029,12 @@ def safe_json_from_text(text: str) -> Dict[str, Any]:
         return {}
     start = text.find("{")
     end = text.rfind("}")
-    if start == -1 or end == -1 or end <= start:
+    if start == -1:
         return {}
+    if end <= start:
+        # No closing brace: the completion was cut off.
+        payload = salvage_json(text) if salvage_json else None
+        return payload if isinstance(payload, dict) else {}
     snippet = text[start : end + 1]
     try:
         payload = json.loads(snippet)
@@ -2950,7 +3042,7 @@ def safe_json_from_text(text: str) -> Dict[str, Any]:
         try:
             payload = json.loads(sanitize_llm_output(snippet))
         except Exception:
-            return {}
+            payload = salvage_json(text) if salvage_json else None
     return payload if isinstance(payload, dict) else {}
 
 
@@ -3197,23 +3289,35 @@ def extract_scenario_from_text(user_text: str, use_model: bool = False) -> Dict[
         "override_expenses_monthly": "float",
     }
 
-    prompt = f"""
-You extract scenario details from user text for a financial simulator.
-Return ONLY a JSON object. Do not include any extra text.
-If a field is unknown, omit it.
-Schema: {json.dumps(schema)}
-
-User request: {user_text}
-""".strip()
+    prompt = build_extraction_prompt(schema, user_text)
 
     try:
-        raw = extract_text(query_nemotron(prompt, max_tokens=420, temperature=0.15))
+        if query_with_continuation:
+            raw, _ = query_with_continuation(
+                prompt,
+                max_tokens=420,
+                temperature=0.15,
+                mode="extraction",
+                call_site="streamlit.extract_scenario",
+                json_schema=model_json_schema(ScenarioExtraction) if model_json_schema else None,
+            )
+        else:
+            raw = extract_text(
+                query_nemotron(
+                    prompt,
+                    max_tokens=420,
+                    temperature=0.15,
+                    mode="extraction",
+                    call_site="streamlit.extract_scenario",
+                )
+            )
         record_nemotron_status(True)
     except Exception:
         record_nemotron_status(False)
         return regex_extract_scenario(user_text)
 
-    parsed = safe_json_from_text(raw)
+    typed = parse_model(raw, ScenarioExtraction) if parse_model else None
+    parsed = typed.model_dump(exclude_none=True) if typed is not None else safe_json_from_text(raw)
     if not parsed:
         return regex_extract_scenario(user_text)
     fallback = regex_extract_scenario(user_text)
@@ -3621,7 +3725,7 @@ def render_sidebar() -> None:
         st.markdown('<div class="sidebar-brand">RiseArc</div>', unsafe_allow_html=True)
         st.caption("Financial intelligence console")
 
-        options = ["Introduction", "Scenario Builder", "Survival Timeline", "Chat"]
+        options = ["Introduction", "Scenario Builder", "Survival Timeline", "Chat", "Diagnostics"]
         st.markdown("Navigation")
         for option in options:
             is_active = st.session_state.active_view == option
@@ -3684,6 +3788,8 @@ def init_state() -> None:
         if changed:
             st.session_state.chat_history = migrated
         st.session_state.chat_history_currency_version = CHAT_HISTORY_CURRENCY_VERSION
+    if "history_state" not in st.session_state:
+        st.session_state.history_state = new_history_state() if new_history_state else {}
     if "quick_prompt_used" not in st.session_state:
         st.session_state.quick_prompt_used = False
     if "pending_prompt" not in st.session_state:
@@ -3692,8 +3798,6 @@ def init_state() -> None:
         st.session_state.result = None
     if "nemotron_last_ok" not in st.session_state:
         st.session_state.nemotron_last_ok = None
-    if "nemotron_last_checked" not in st.session_state:
-        st.session_state.nemotron_last_checked = 0.0
     if "baseline_summary" not in st.session_state:
         st.session_state.baseline_summary = None
     if "baseline_profile_sig" not in st.session_state:
@@ -4428,6 +4532,76 @@ def render_scenario_builder() -> None:
             st.markdown(format_structured_markdown(summary_text))
 
 
+def render_diagnostics() -> None:
+    if LLM_TELEMETRY is None:
+        st.info("LLM telemetry is unavailable in this session.")
+        return
+    snapshot = LLM_TELEMETRY.snapshot(limit=50)
+    summary = snapshot["summary"]
+    st.caption(
+        f"Last {snapshot['buffered']} of {snapshot['recorded_total']} Nemotron calls made by this app process "
+        "(the API keeps its own buffer at /llm/telemetry)."
+    )
+    if not summary:
+        st.info("No Nemotron calls recorded yet.")
+        return
+
+    metric_cols = st.columns(4)
+    metric_cols[0].metric("Calls", sum(row["calls"] for row in summary))
+    metric_cols[1].metric("Prompt tokens", f"{sum(row['prompt_tokens'] for row in summary):,}")
+    metric_cols[2].metric("Completion tokens", f"{sum(row['completion_tokens'] for row in summary):,}")
+    metric_cols[3].metric("Truncated", sum(row["truncated"] for row in summary))
+
+    st.subheader("By mode and call site")
+    st.dataframe(
+        [
+            {
+                "mode": row["mode"],
+                "call site": row["call_site"],
+                "calls": row["calls"],
+                "errors": row["errors"],
+                "cached": row["cached"],
+                "truncated": row["truncated"],
+                "prompt tokens": row["prompt_tokens"],
+                "completion tokens": row["completion_tokens"],
+                "avg completion": row["avg_completion_tokens"],
+                "p50 s": row["latency_s"]["p50"],
+                "p95 s": row["latency_s"]["p95"],
+                "p99 s": row["latency_s"]["p99"],
+                "ttft p50 s": row["ttft_s"]["p50"],
+                "total s": row["total_latency_s"],
+            }
+            for row in summary
+        ],
+        use_container_width=True,
+    )
+
+    best_of_stats = LLM_BEST_OF_STATS.snapshot() if LLM_BEST_OF_STATS is not None else {}
+    if best_of_stats.get("calls"):
+        st.subheader("Best-of-N")
+        st.dataframe([best_of_stats], use_container_width=True)
+
+    budgets = LLM_BUDGETS.snapshot() if LLM_BUDGETS is not None else {}
+    if budgets:
+        st.subheader("Token budgets")
+        st.dataframe(
+            [stats for _, stats in sorted(budgets.items())],
+            use_container_width=True,
+        )
+
+    st.subheader("Recent calls")
+    st.dataframe(
+        [
+            {**record, "ts": time.strftime("%H:%M:%S", time.localtime(record["ts"]))}
+            for record in snapshot["recent"]
+        ],
+        use_container_width=True,
+    )
+    if st.button("Clear telemetry"):
+        LLM_TELEMETRY.clear()
+        st.rerun()
+
+
 def render_survival_timeline() -> None:
     if not st.session_state.profile:
         st.info("Please complete your profile to unlock the full experience.")
@@ -4615,6 +4789,7 @@ def render_chat() -> None:
     with header_cols[1]:
         if st.button("Clear chat"):
             st.session_state.chat_history = []
+            st.session_state.history_state = new_history_state() if new_history_state else {}
 
     if not st.session_state.profile:
         st.info("Complete your profile to unlock the assistant.")
@@ -4694,41 +4869,42 @@ def render_chat() -> None:
                 unsafe_allow_html=True,
             )
             try:
-                if not nemotron_online:
-                    response = format_nemotron_error("connection", "chat response")
-                elif is_small:
-                    smalltalk_prompt = (
-                        "You are RiseArc, a friendly financial assistant. Respond briefly and naturally "
-                        "to the user's message in 1-2 sentences. Do not use headings or bullets. "
-                        "Do not use a fixed template or repeated sentence; vary your wording. "
-                        "If the user greets you, greet them back. If they ask how you are, answer politely "
-                        "and then ask what they would like help with. Do not mention finances unless the "
-                        "user does. Never mention investing, stocks, ETFs, crypto, or portfolios."
-                        f"\nUser: {pending_prompt}\nAssistant:"
-                    )
-                    response = extract_text(query_nemotron(smalltalk_prompt)).strip()
-                    record_nemotron_status(True)
-                    response = clean_text_block(response)
-                elif use_structured:
-                    response = nemotron_generate_structured(
-                        mode="chat",
-                        profile=profile,
-                        metrics=metrics,
-                        scenario=scenario_payload,
-                        scenario_metrics=scenario_metrics,
-                        timeline_stats=None,
-                        question=pending_prompt,
-                        include_followup=True,
-                    )
-                else:
-                    response = nemotron_generate_conversational(
-                        profile=profile,
-                        metrics=metrics,
-                        scenario=scenario_payload,
-                        scenario_metrics=scenario_metrics,
-                        question=pending_prompt,
-                        chat_history=st.session_state.chat_history,
-                    )
+                with chat_turn_deadline():
+                    if not nemotron_online:
+                        response = format_nemotron_error("connection", "chat response")
+                    elif is_small:
+                        smalltalk_prompt = build_small_talk_prompt(pending_prompt)
+                        response = query_nemotron_text(
+                            smalltalk_prompt,
+                            on_partial=make_stream_renderer(typing_placeholder),
+                            use_cache=False,
+                            mode="small_talk",
+                            call_site="streamlit.small_talk",
+                        )
+                        record_nemotron_status(True)
+                        response = clean_text_block(response)
+                    elif use_structured:
+                        response = nemotron_generate_structured(
+                            mode="chat",
+                            profile=profile,
+                            metrics=metrics,
+                            scenario=scenario_payload,
+                            scenario_metrics=scenario_metrics,
+                            timeline_stats=None,
+                            question=pending_prompt,
+                            include_followup=True,
+                        )
+                    else:
+                        response = nemotron_generate_conversational(
+                            profile=profile,
+                            metrics=metrics,
+                            scenario=scenario_payload,
+                            scenario_metrics=scenario_metrics,
+                            question=pending_prompt,
+                            chat_history=st.session_state.chat_history,
+                            on_partial=make_stream_renderer(typing_placeholder),
+                            history_state=st.session_state.history_state,
+                        )
             except Exception as exc:
                 record_nemotron_status(False)
                 response = format_nemotron_error(str(exc), "chat response")
@@ -4776,6 +4952,8 @@ def main() -> None:
         render_scenario_builder()
     elif st.session_state.active_view == "Survival Timeline":
         render_survival_timeline()
+    elif st.session_state.active_view == "Diagnostics":
+        render_diagnostics()
     else:
         render_chat()
 
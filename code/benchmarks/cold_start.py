@@ -0,0 +1,117 @@
+"""Cold-start benchmark for the RiseArc API.
+
+Spawns a fresh uvicorn process per run and measures the time from process
+start to the first successful /health and the first /analyze response.
+
+Run from the ``code/`` directory:
+
+    python -m benchmarks.cold_start --runs 5
+"""
+
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+from typing import Dict, List
+
+CODE_DIR = Path(__file__).resolve().parents[1]
+if str(CODE_DIR) not in sys.path:
+    sys.path.append(str(CODE_DIR))
+
+from app.core.sample_payloads import SAMPLE_REQUEST  # noqa: E402
+
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _request(url: str, body: Dict | None = None, timeout: float = 60.0) -> int:
+    data = json.dumps(body).encode() if body is not None else None
+    headers = {"Content-Type": "application/json"} if body is not None else {}
+    req = urllib.request.Request(url, data=data, headers=headers)
+    with urllib.request.urlopen(req, timeout=timeout) as resp:
+        resp.read()
+        return resp.status
+
+
+def measure_import_ms() -> float:
+    code = "import time; t = time.perf_counter(); import app.main; print((time.perf_counter() - t) * 1000)"
+    out = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=CODE_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def measure_once(env: Dict[str, str], startup_timeout: float) -> Dict[str, float]:
+    port = _free_port()
+    base = f"http://127.0.0.1:{port}"
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=CODE_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        health_s = None
+        while time.perf_counter() - started < startup_timeout:
+            try:
+                if _request(f"{base}/health", timeout=1.0) == 200:
+                    health_s = time.perf_counter() - started
+                    break
+            except (urllib.error.URLError, ConnectionError, OSError):
+                time.sleep(0.01)
+        if health_s is None:
+            raise RuntimeError(f"API did not become healthy within {startup_timeout:.0f}s")
+        _request(f"{base}/analyze", SAMPLE_REQUEST)
+        analyze_s = time.perf_counter() - started
+        return {"first_health_ms": health_s * 1000.0, "first_analyze_ms": analyze_s * 1000.0}
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+def _summarize(values: List[float]) -> str:
+    return f"median={statistics.median(values):8.1f} ms  min={min(values):8.1f} ms  max={max(values):8.1f} ms"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--warmup", choices=["background", "blocking", "off"], default=None)
+    parser.add_argument("--base-url", default=None, help="Override NIM_BASE_URL (e.g. a local stand-in server).")
+    parser.add_argument("--startup-timeout", type=float, default=60.0)
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    if args.warmup:
+        env["APP_WARMUP"] = args.warmup
+    if args.base_url:
+        env["NIM_BASE_URL"] = args.base_url
+
+    imports = [measure_import_ms() for _ in range(args.runs)]
+    runs = [measure_once(env, args.startup_timeout) for _ in range(args.runs)]
+    print(f"import app.main   {_summarize(imports)}")
+    print(f"first /health     {_summarize([r['first_health_ms'] for r in runs])}")
+    print(f"first /analyze    {_summarize([r['first_analyze_ms'] for r in runs])}")
+
+
+if __name__ == "__main__":
+    main()
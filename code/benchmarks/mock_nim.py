@@ -0,0 +1,430 @@
+"""Local OpenAI-compatible stand-in for the NVIDIA NIM endpoint.
+
+Serves ``/v1/models`` and ``/v1/chat/completions`` (plain and SSE streaming)
+with configurable latency, token rate, error/timeout injection and canned or
+garbled outputs, so /analyze, the chat flow and the guardrails can be
+benchmarked reproducibly without touching the real endpoint.
+
+Answers are picked from the prompt: JSON prompts get JSON (the structured
+chat schema or the scenario extraction schema), the /analyze prompt gets a
+Summary/Actions/Warnings block and anything else a short conversational reply.
+
+Run from the ``code/`` directory and point the app at it:
+
+    python -m benchmarks.mock_nim --port 8010 --latency-ms 400 --tokens-per-s 60
+    NIM_BASE_URL=http://127.0.0.1:8010/v1 NVIDIA_API_KEY=mock uvicorn app.main:app
+
+Heavy tail plus faults:
+
+    python -m benchmarks.mock_nim --latency-dist lognormal --latency-ms 300 \\
+        --tail-prob 0.05 --tail-ms 8000 --error-rate 0.02 --timeout-rate 0.01 --garble-rate 0.1
+
+Prefill cost and a server-side prefix (KV) cache, as in vLLM/NIM: every
+uncached prompt token adds --prefill-ms-per-token to time to first token,
+and --prefix-cache skips prefill for leading blocks of the prompt seen before
+(reported as usage.prompt_tokens_details.cached_tokens):
+
+    python -m benchmarks.mock_nim --prefill-ms-per-token 0.5 --prefix-cache
+
+GET /_mock/stats returns request, error, timeout and prompt/cached token counts.
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import random
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+SUMMARY_TEXT = """Summary:
+- Your savings cover the gap for several months, but the scenario turns monthly cash flow negative.
+- Net burn is manageable if the planned expense cuts hold.
+- Debt payments remain the largest fixed cost after living expenses.
+Actions:
+- Cut discretionary spending by at least $300/mo before the job loss starts.
+- Apply for unemployment benefits in the first week to shorten the gap.
+- Keep at least 3 months of expenses in cash before paying down debt faster.
+Warnings:
+- If the job search runs past the planned months, runway shrinks quickly; review the budget monthly."""
+
+CHAT_TEXT = (
+    "Your cash flow is positive right now, so the main goal is protecting that cushion. "
+    "Start by setting aside a fixed amount each month, then review your largest expenses. "
+    "Do you want to focus on runway or on debt first?"
+)
+
+STRUCTURED_RESPONSE = {
+    "summary": "You have a steady surplus and several months of savings.",
+    "key_facts": ["Net cash flow: +$1,480/mo", "Savings: $12,000", "Risk score: 32/100"],
+    "meaning": "Your budget can absorb a short disruption without new debt.",
+    "actions": ["Move $400/mo into emergency savings", "Trim subscriptions you no longer use"],
+    "warnings": ["A long job search would draw savings down; set a monthly check-in."],
+    "followup": "",
+}
+
+EXTRACTION_RESPONSE = {"months_unemployed": 6, "expense_cut_pct": 15, "severance": 3000}
+
+_WORD_RE = re.compile(r"\S+\s*")
+_CHARS_PER_TOKEN = 4
+
+
+class MockConfig:
+    def __init__(self, **options: Any) -> None:
+        self.latency_dist = options.get("latency_dist", "fixed")
+        self.latency_ms = float(options.get("latency_ms", 200.0))
+        self.latency_sigma = float(options.get("latency_sigma", 0.5))
+        self.tail_prob = float(options.get("tail_prob", 0.0))
+        self.tail_ms = float(options.get("tail_ms", 5000.0))
+        self.tokens_per_s = float(options.get("tokens_per_s", 80.0))
+        self.error_rate = float(options.get("error_rate", 0.0))
+        self.error_statuses = [int(code) for code in options.get("error_statuses", (500, 503, 429))]
+        self.timeout_rate = float(options.get("timeout_rate", 0.0))
+        self.hang_s = float(options.get("hang_s", 60.0))
+        self.garble_rate = float(options.get("garble_rate", 0.0))
+        self.canned = options.get("canned")
+        self.model = options.get("model", "nvidia/nemotron-3-nano-30b-a3b")
+        self.prefill_ms_per_token = float(options.get("prefill_ms_per_token", 0.0))
+        self.prefix_cache = bool(options.get("prefix_cache", False))
+        self.prefix_block_tokens = max(1, int(options.get("prefix_block_tokens", 16)))
+        self.prefix_cache_blocks = max(1, int(options.get("prefix_cache_blocks", 4096)))
+        self.rng = random.Random(options.get("seed", 1234))
+        self.lock = threading.Lock()
+        self._blocks: "OrderedDict[str, None]" = OrderedDict()
+        self.stats = {
+            "requests": 0,
+            "streams": 0,
+            "errors": 0,
+            "timeouts": 0,
+            "garbled": 0,
+            "truncated": 0,
+            "prompt_tokens": 0,
+            "cached_tokens": 0,
+        }
+
+    def roll(self) -> float:
+        with self.lock:
+            return self.rng.random()
+
+    def count(self, name: str) -> None:
+        with self.lock:
+            self.stats[name] += 1
+
+    def latency_s(self) -> float:
+        # Time to first token. The base distribution plus an optional heavy tail.
+        with self.lock:
+            rng = self.rng
+            if self.latency_dist == "uniform":
+                value = rng.uniform(0.5 * self.latency_ms, 1.5 * self.latency_ms)
+            elif self.latency_dist == "lognormal":
+                value = rng.lognormvariate(math.log(max(self.latency_ms, 1e-3)), self.latency_sigma)
+            elif self.latency_dist == "pareto":
+                value = self.latency_ms * rng.paretovariate(1.0 / max(self.latency_sigma, 1e-3))
+            else:
+                value = self.latency_ms
+            if self.tail_prob and rng.random() < self.tail_prob:
+                value += self.tail_ms
+        return max(0.0, value) / 1000.0
+
+    def prefill(self, body: Dict[str, Any]) -> Tuple[int, int]:
+        # Returns (prompt_tokens, cached_tokens). Blocks are hashed as a chain,
+        # like vLLM's automatic prefix caching: a block only hits when every
+        # block before it matched too, so one changed token invalidates the rest.
+        text = _rendered_prompt(body)
+        prompt_tokens = max(1, len(text) // _CHARS_PER_TOKEN)
+        block_chars = self.prefix_block_tokens * _CHARS_PER_TOKEN
+        cached_blocks = 0
+        if self.prefix_cache:
+            digest = ""
+            hits = True
+            with self.lock:
+                for start in range(0, len(text) - block_chars + 1, block_chars):
+                    digest = hashlib.sha1((digest + text[start : start + block_chars]).encode("utf-8")).hexdigest()
+                    if hits and digest in self._blocks:
+                        cached_blocks += 1
+                        self._blocks.move_to_end(digest)
+                        continue
+                    hits = False
+                    self._blocks[digest] = None
+                while len(self._blocks) > self.prefix_cache_blocks:
+                    self._blocks.popitem(last=False)
+        cached_tokens = min(prompt_tokens, cached_blocks * self.prefix_block_tokens)
+        with self.lock:
+            self.stats["prompt_tokens"] += prompt_tokens
+            self.stats["cached_tokens"] += cached_tokens
+        return prompt_tokens, cached_tokens
+
+    def clear_prefix_cache(self) -> None:
+        with self.lock:
+            self._blocks.clear()
+
+
+def _rendered_prompt(body: Dict[str, Any]) -> str:
+    # Roughly what the server's chat template feeds the model.
+    parts = []
+    for message in body.get("messages") or []:
+        content = message.get("content")
+        if isinstance(content, str):
+            parts.append(f"<|{message.get('role', 'user')}|>\n{content}\n")
+    return "".join(parts)
+
+
+def _prompt_text(body: Dict[str, Any]) -> str:
+    parts = []
+    for message in body.get("messages") or []:
+        content = message.get("content")
+        if isinstance(content, str):
+            parts.append(content)
+    return "\n".join(parts)
+
+
+def pick_output(config: MockConfig, prompt: str) -> str:
+    if config.canned is not None:
+        return config.canned
+    if "JSON" in prompt:
+        if "Schema:" in prompt and "months_unemployed" in prompt:
+            return json.dumps(EXTRACTION_RESPONSE)
+        return json.dumps(STRUCTURED_RESPONSE, indent=2)
+    if "Summary:" in prompt and "Actions:" in prompt:
+        return SUMMARY_TEXT
+    return CHAT_TEXT
+
+
+def garble(text: str, rng: random.Random) -> str:
+    # Reproduces the failure modes the guardrails look for: glued words and
+    # numbers fused to words.
+    words = text.split(" ")
+    if len(words) < 8:
+        return text.replace(" ", "")
+    start = rng.randrange(0, len(words) - 6)
+    glued = "".join(words[start : start + 6])
+    words[start : start + 6] = [glued]
+    garbled = " ".join(words)
+    return re.sub(r"(\$\d{1,3}(?:,\d{3})+)\s+([A-Za-z]{4,})", r"\1\2", garbled, count=1)
+
+
+def split_tokens(text: str) -> List[str]:
+    # One word (with its trailing space) stands in for one token.
+    return _WORD_RE.findall(text) or [text]
+
+
+def build_completion(config: MockConfig, body: Dict[str, Any]) -> Tuple[List[str], str, Dict[str, Any]]:
+    prompt = _prompt_text(body)
+    text = pick_output(config, prompt)
+    if config.garble_rate and config.roll() < config.garble_rate:
+        with config.lock:
+            text = garble(text, config.rng)
+        config.count("garbled")
+    tokens = split_tokens(text)
+    finish_reason = "stop"
+    max_tokens = body.get("max_tokens")
+    if isinstance(max_tokens, int) and 0 < max_tokens < len(tokens):
+        tokens = tokens[:max_tokens]
+        finish_reason = "length"
+        config.count("truncated")
+    prompt_tokens = max(1, len(prompt) // _CHARS_PER_TOKEN)
+    usage: Dict[str, Any] = {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": len(tokens),
+        "total_tokens": prompt_tokens + len(tokens),
+    }
+    return tokens, finish_reason, usage
+
+
+class MockNIMHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    config: MockConfig = MockConfig()
+
+    def log_message(self, *args: Any) -> None:
+        return
+
+    def _send_json(self, status: int, payload: Dict[str, Any]) -> None:
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self) -> None:
+        path = self.path.split("?", 1)[0].rstrip("/")
+        if path in {"/v1/models", "/models"}:
+            self._send_json(200, {"object": "list", "data": [{"id": self.config.model, "object": "model"}]})
+        elif path in {"/health", "/v1/health"}:
+            self._send_json(200, {"status": "ok"})
+        elif path == "/_mock/stats":
+            with self.config.lock:
+                self._send_json(200, dict(self.config.stats))
+        else:
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+
+    def do_POST(self) -> None:
+        path = self.path.split("?", 1)[0].rstrip("/")
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            self._send_json(400, {"error": {"message": "Body must be JSON."}})
+            return
+        if path not in {"/v1/chat/completions", "/chat/completions"}:
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+            return
+
+        config = self.config
+        config.count("requests")
+        if config.timeout_rate and config.roll() < config.timeout_rate:
+            config.count("timeouts")
+            time.sleep(config.hang_s)
+            self.close_connection = True
+            return
+        if config.error_rate and config.roll() < config.error_rate:
+            config.count("errors")
+            with config.lock:
+                status = config.rng.choice(config.error_statuses)
+            self._send_json(status, {"error": {"message": "Injected failure from mock NIM.", "code": status}})
+            return
+
+        tokens, finish_reason, usage = build_completion(config, body)
+        prompt_tokens, cached_tokens = config.prefill(body)
+        if config.prefix_cache:
+            usage["prompt_tokens_details"] = {"cached_tokens": cached_tokens}
+        time.sleep(config.latency_s() + (prompt_tokens - cached_tokens) * config.prefill_ms_per_token / 1000.0)
+        if body.get("stream"):
+            config.count("streams")
+            include_usage = bool((body.get("stream_options") or {}).get("include_usage"))
+            self._stream(body, tokens, finish_reason, usage if include_usage else None)
+            return
+        if config.tokens_per_s > 0:
+            time.sleep(len(tokens) / config.tokens_per_s)
+        self._send_json(
+            200,
+            {
+                "id": "chatcmpl-mock",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": body.get("model") or config.model,
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {"role": "assistant", "content": "".join(tokens)},
+                        "finish_reason": finish_reason,
+                    }
+                ],
+                "usage": usage,
+            },
+        )
+
+    def _write_chunk(self, data: bytes) -> None:
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def _event(self, payload: Dict[str, Any]) -> None:
+        self._write_chunk(b"data: " + json.dumps(payload).encode() + b"\n\n")
+
+    def _stream(self, body: Dict[str, Any], tokens: List[str], finish_reason: str, usage: Dict[str, Any] | None) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        model = body.get("model") or self.config.model
+        base = {"id": "chatcmpl-mock", "object": "chat.completion.chunk", "created": int(time.time()), "model": model}
+        interval = 1.0 / self.config.tokens_per_s if self.config.tokens_per_s > 0 else 0.0
+        try:
+            for index, token in enumerate(tokens):
+                if index and interval:
+                    time.sleep(interval)
+                delta = {"role": "assistant", "content": token} if index == 0 else {"content": token}
+                self._event({**base, "choices": [{"index": 0, "delta": delta, "finish_reason": None}]})
+            self._event({**base, "choices": [{"index": 0, "delta": {}, "finish_reason": finish_reason}]})
+            if usage is not None:
+                self._event({**base, "choices": [], "usage": usage})
+            self._write_chunk(b"data: [DONE]\n\n")
+            self.wfile.write(b"0\r\n\r\n")
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            # The client hung up (cancelled hedge, deadline); nothing left to send.
+            self.close_connection = True
+
+
+class MockNIMServer(ThreadingHTTPServer):
+    # Load tests open hundreds of connections at once; the default backlog of 5
+    # makes the kernel drop SYNs and adds seconds of client-side retry delay.
+    request_queue_size = 1024
+    daemon_threads = True
+
+    def handle_error(self, request: Any, client_address: Any) -> None:
+        # Clients that hang up mid-response (cancelled hedges, timed-out
+        # callers) are expected here, not worth a traceback.
+        if isinstance(sys.exc_info()[1], (ConnectionError, TimeoutError)):
+            return
+        super().handle_error(request, client_address)
+
+
+def start(config: MockConfig | None = None, host: str = "127.0.0.1", port: int = 0) -> MockNIMServer:
+    # For in-process benchmarks: returns a running server; base URL is
+    # f"http://{host}:{server.server_address[1]}/v1".
+    handler = type("ConfiguredMockNIMHandler", (MockNIMHandler,), {"config": config or MockConfig()})
+    server = MockNIMServer((host, port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True, name="mock-nim").start()
+    return server
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8010)
+    parser.add_argument("--latency-dist", choices=["fixed", "uniform", "lognormal", "pareto"], default="fixed")
+    parser.add_argument("--latency-ms", type=float, default=200.0, help="Time to first token (median for lognormal).")
+    parser.add_argument("--latency-sigma", type=float, default=0.5, help="Spread for lognormal/pareto.")
+    parser.add_argument("--tail-prob", type=float, default=0.0, help="Probability of adding --tail-ms to a call.")
+    parser.add_argument("--tail-ms", type=float, default=5000.0)
+    parser.add_argument("--tokens-per-s", type=float, default=80.0, help="Generation rate; 0 sends everything at once.")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-statuses", default="500,503,429")
+    parser.add_argument("--timeout-rate", type=float, default=0.0, help="Probability of hanging for --hang-s.")
+    parser.add_argument("--hang-s", type=float, default=60.0)
+    parser.add_argument("--garble-rate", type=float, default=0.0, help="Probability of a guardrail-breaking answer.")
+    parser.add_argument("--canned-file", type=Path, default=None, help="Always answer with this file's text.")
+    parser.add_argument("--prefill-ms-per-token", type=float, default=0.0, help="Added to TTFT per uncached prompt token.")
+    parser.add_argument("--prefix-cache", action="store_true", help="Simulate server-side prefix (KV) caching.")
+    parser.add_argument("--prefix-block-tokens", type=int, default=16)
+    parser.add_argument("--prefix-cache-blocks", type=int, default=4096, help="LRU capacity in blocks.")
+    parser.add_argument("--seed", type=int, default=1234)
+    args = parser.parse_args()
+
+    config = MockConfig(
+        latency_dist=args.latency_dist,
+        latency_ms=args.latency_ms,
+        latency_sigma=args.latency_sigma,
+        tail_prob=args.tail_prob,
+        tail_ms=args.tail_ms,
+        tokens_per_s=args.tokens_per_s,
+        error_rate=args.error_rate,
+        error_statuses=[code for code in args.error_statuses.split(",") if code.strip()],
+        timeout_rate=args.timeout_rate,
+        hang_s=args.hang_s,
+        garble_rate=args.garble_rate,
+        canned=args.canned_file.read_text() if args.canned_file else None,
+        prefill_ms_per_token=args.prefill_ms_per_token,
+        prefix_cache=args.prefix_cache,
+        prefix_block_tokens=args.prefix_block_tokens,
+        prefix_cache_blocks=args.prefix_cache_blocks,
+        seed=args.seed,
+    )
+    server = start(config, args.host, args.port)
+    print(f"mock NIM listening on http://{args.host}:{server.server_address[1]}/v1")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""Time-to-first-token under server-side prefix caching, per prompt layout.
+
+Replays synthetic chat sessions (several chat turns with a growing history,
+one structured summary, one scenario extraction and one small-talk reply per
+session) against the local mock NIM with its prefix (KV) cache and per-token
+prefill cost switched on, once with the original single-message prompts
+(LLM_PROMPT_LAYOUT=single) and once with the shared-system-message layout
+(prefix). Reports TTFT and the share of prompt tokens served from the cache.
+
+Run from the ``code/`` directory:
+
+    python -m benchmarks.prefix_cache_ttft --sessions 8 --turns 4 --prefill-ms-per-token 0.4
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+CODE_DIR = Path(__file__).resolve().parents[1]
+if str(CODE_DIR) not in sys.path:
+    sys.path.append(str(CODE_DIR))
+
+from app.ai.telemetry import percentile  # noqa: E402
+from benchmarks.mock_nim import MockConfig, start  # noqa: E402
+
+QUESTIONS = [
+    "How long would my savings last if I lost my job?",
+    "What should I cut first?",
+    "Can you explain the debt ratio?",
+    "Is my emergency fund big enough?",
+    "What happens if I take a lower paying job?",
+    "Should I pay down debt or save more?",
+]
+
+SMALL_TALK = ["hi there", "thanks!", "how are you?", "good morning"]
+
+# Same fields the Streamlit scenario extractor sends.
+EXTRACTION_SCHEMA = {
+    "months_unemployed": "int (0-36)",
+    "expense_cut_pct": "float (0-70)",
+    "severance": "float",
+    "unemployment_benefit_monthly": "float",
+    "other_income_monthly": "float",
+    "income_start_month": "int (0-60)",
+    "income_start_amount": "float (monthly)",
+    "extra_monthly_expenses": "float",
+    "debt_payment_monthly": "float",
+    "healthcare_monthly": "float",
+    "one_time_expense": "float",
+    "relocation_cost": "float",
+}
+
+
+def _money(value: float) -> str:
+    return f"${value:,.0f}"
+
+
+def session_context(rng: random.Random) -> Dict[str, Any]:
+    # Shaped like streamlit_chat.build_nemotron_context: the question sits
+    # near the top, ahead of everything that stays fixed for the session.
+    income = rng.randrange(3000, 12000, 100)
+    expenses = rng.randrange(2000, 9000, 100)
+    savings = rng.randrange(2000, 60000, 500)
+    debt = rng.randrange(0, 40000, 500)
+    net = income - expenses
+    return {
+        "mode": "chat",
+        "question": "",
+        "profile": {
+            "monthly_income": _money(income),
+            "monthly_expenses": _money(expenses),
+            "savings": _money(savings),
+            "debt": _money(debt),
+            "industry": rng.choice(["Tech", "Healthcare", "Retail", "Education"]),
+            "job_stability": rng.choice(["stable", "medium", "unstable"]),
+            "dependents": rng.randrange(0, 4),
+        },
+        "current_metrics": {
+            "monthly_net": ("+" if net >= 0 else "-") + _money(abs(net)),
+            "cash_flow_label": "surplus" if net >= 0 else "deficit",
+            "debt_ratio": f"{debt / max(income * 12, 1):.2f}",
+            "risk_score": f"{rng.randrange(10, 90)}/100",
+        },
+    }
+
+
+def session_calls(rng: random.Random, turns: int, layout: str) -> List[Tuple[str, Any]]:
+    from app.core.prompts import (
+        build_chat_prompt,
+        build_extraction_prompt,
+        build_small_talk_prompt,
+        build_structured_prompt,
+    )
+
+    context = session_context(rng)
+    calls: List[Tuple[str, Any]] = [("structured", build_structured_prompt("overview", context, layout))]
+    history: List[str] = []
+    for _ in range(turns):
+        question = rng.choice(QUESTIONS)
+        turn_context = {**context, "question": question}
+        calls.append(("chat", build_chat_prompt(turn_context, "\n".join(history[-6:]), question, layout)))
+        history += [f"User: {question}", "Assistant: Your cash flow is positive, so protect that cushion first."]
+    calls.append(("extraction", build_extraction_prompt(EXTRACTION_SCHEMA, "I lose my job for 6 months", layout)))
+    calls.append(("small_talk", build_small_talk_prompt(rng.choice(SMALL_TALK), layout)))
+    return calls
+
+
+def run_layout(config: MockConfig, layout: str, sessions: int, turns: int, seed: int) -> Dict[str, Any]:
+    from app.ai.nemotron_client import stream_nemotron
+
+    config.clear_prefix_cache()
+    rng = random.Random(seed)
+    plans = [session_calls(rng, turns, layout) for _ in range(sessions)]
+    # Sessions interleave the way concurrent users would.
+    ttfts: Dict[str, List[float]] = {}
+    prompt_tokens = cached_tokens = 0
+    for step in range(max(len(plan) for plan in plans)):
+        for plan in plans:
+            if step >= len(plan):
+                continue
+            mode, prompt = plan[step]
+            stream = stream_nemotron(prompt, max_tokens=64, use_cache=False, mode=mode, call_site="bench.prefix").consume()
+            usage = stream.usage or {}
+            prompt_tokens += int(usage.get("prompt_tokens") or 0)
+            cached_tokens += int((usage.get("prompt_tokens_details") or {}).get("cached_tokens") or 0)
+            ttfts.setdefault(mode, []).append((stream.ttft_s or 0.0) * 1000.0)
+    return {"ttft_ms": ttfts, "prompt_tokens": prompt_tokens, "cached_tokens": cached_tokens}
+
+
+def _row(label: str, values: List[float]) -> str:
+    return (
+        f"  {label:<11} n={len(values):3d}  mean={statistics.mean(values):7.1f} ms  "
+        f"p50={percentile(values, 0.5):7.1f} ms  p95={percentile(values, 0.95):7.1f} ms"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=8)
+    parser.add_argument("--turns", type=int, default=4, help="Chat turns per session.")
+    parser.add_argument("--latency-ms", type=float, default=30.0, help="Fixed mock overhead before prefill.")
+    parser.add_argument("--prefill-ms-per-token", type=float, default=0.4)
+    parser.add_argument("--block-tokens", type=int, default=16)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    config = MockConfig(
+        latency_ms=args.latency_ms,
+        tokens_per_s=0,
+        prefill_ms_per_token=args.prefill_ms_per_token,
+        prefix_cache=True,
+        prefix_block_tokens=args.block_tokens,
+    )
+    server = start(config)
+    # The client reads its endpoint at import time.
+    os.environ["NIM_BASE_URL"] = f"http://127.0.0.1:{server.server_address[1]}/v1"
+    os.environ["NVIDIA_API_KEY"] = "mock"
+    os.environ["NEMOTRON_CACHE"] = "0"
+    os.environ["LLM_BACKEND"] = "nim"
+
+    try:
+        for layout in ("single", "prefix"):
+            result = run_layout(config, layout, args.sessions, args.turns, args.seed)
+            everything = [value for values in result["ttft_ms"].values() for value in values]
+            share = result["cached_tokens"] / max(result["prompt_tokens"], 1)
+            print(f"layout={layout}  cached prompt tokens {result['cached_tokens']}/{result['prompt_tokens']} ({share:.0%})")
+            print(_row("all", everything))
+            for mode, values in result["ttft_ms"].items():
+                print(_row(mode, values))
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
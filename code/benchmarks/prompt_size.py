@@ -0,0 +1,132 @@
+"""Prompt size per mode, verbose vs compact context encoding.
+
+Builds every prompt the app sends (the /analyze summary, the structured chat
+summary in overview and scenario mode, a conversational chat turn, scenario
+extraction and small talk) with LLM_COMPACT_CONTEXT off and on, and prints
+characters and estimated input tokens for each. With --layout prefix the
+"variable" column is the part after the shared system message and template
+instructions, i.e. what the server's prefix cache cannot skip.
+
+Token counts come from app.ai.compact.estimate_tokens, a tokenizer-free
+approximation; use them to compare variants, not to bill.
+
+Run from the ``code/`` directory:
+
+    python -m benchmarks.prompt_size
+    python -m benchmarks.prompt_size --layout single
+"""
+
+import argparse
+import copy
+import sys
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+CODE_DIR = Path(__file__).resolve().parents[1]
+if str(CODE_DIR) not in sys.path:
+    sys.path.append(str(CODE_DIR))
+
+from app.ai.compact import estimate_tokens  # noqa: E402
+from app.ai.prompt_layout import PromptParts, prompt_text  # noqa: E402
+from app.core.pipeline import prepare_analysis  # noqa: E402
+from app.core.prompts import (  # noqa: E402
+    LLM_PROMPT_LAYOUT,
+    build_chat_prompt,
+    build_extraction_prompt,
+    build_small_talk_prompt,
+    build_structured_prompt,
+)
+from app.core.sample_payloads import SAMPLE_REQUEST  # noqa: E402
+from benchmarks.prefix_cache_ttft import EXTRACTION_SCHEMA  # noqa: E402
+
+# Shaped like streamlit_chat.build_nemotron_context for a profile with no
+# scenario add-ons filled in, the common case.
+CONTEXT: Dict[str, Any] = {
+    "mode": "overview",
+    "question": "",
+    "profile": {
+        "monthly_income": "$6,500",
+        "monthly_expenses": "$4,300",
+        "monthly_living_expenses": "$3,900",
+        "debt_payment_monthly": "$400",
+        "savings": "$18,000",
+        "debt": "$12,000",
+        "industry": "Tech",
+        "job_stability": "stable",
+        "dependents": 0,
+    },
+    "current_metrics": {
+        "monthly_net": "+$2,200",
+        "cash_flow_label": "surplus",
+        "debt_ratio": "0.15 (15% of annual income)",
+        "risk_score": "34/100",
+    },
+    "timeline": {"months_until_zero": "0 months", "max_drawdown": "$0", "trend_slope": "$2,200"},
+}
+
+SCENARIO = {
+    "monthly_support": "$0",
+    "monthly_expenses_after_cut": "$3,870",
+    "net_monthly_burn": "$3,870/mo",
+    "net_cash_flow": "-$3,870/mo",
+    "risk_score": "58/100",
+    "debt_ratio": "0.15 (15% of annual income)",
+    "months_unemployed": 6,
+    "expense_cut_pct": "10%",
+    "severance": "$0",
+    "scenario_runway": "4.7 months",
+}
+
+HISTORY = (
+    "User: How long would my savings last if I lost my job?\n"
+    "Assistant: About 4.7 months at -$3,870/mo, assuming your 10% expense cut holds.\n"
+    "User: What should I cut first?\n"
+    "Assistant: Start with dining out and subscriptions; together they free up about $350/mo."
+)
+
+
+def prompts(layout: str, compact: bool) -> List[Tuple[str, PromptParts]]:
+    overview = copy.deepcopy(CONTEXT)
+    scenario = {**copy.deepcopy(CONTEXT), "mode": "scenario", "scenario": dict(SCENARIO)}
+    scenario.pop("current_metrics")
+    chat = {**copy.deepcopy(CONTEXT), "mode": "chat", "question": "Can I afford a $500/mo car payment?"}
+    builders: List[Tuple[str, Callable[[], PromptParts]]] = [
+        ("summary", lambda: prepare_analysis(SAMPLE_REQUEST, compact=compact)["prompt"]),
+        ("overview", lambda: build_structured_prompt("overview", overview, layout, compact)),
+        ("scenario", lambda: build_structured_prompt("scenario", scenario, layout, compact)),
+        ("chat", lambda: build_chat_prompt(chat, HISTORY, chat["question"], layout, compact)),
+        (
+            "extraction",
+            lambda: build_extraction_prompt(EXTRACTION_SCHEMA, "I lose my job for 6 months", layout, compact),
+        ),
+        ("small_talk", lambda: build_small_talk_prompt("hi there", layout)),
+    ]
+    return [(mode, build()) for mode, build in builders]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--layout", choices=["prefix", "single"], default=LLM_PROMPT_LAYOUT)
+    args = parser.parse_args()
+    if args.layout != LLM_PROMPT_LAYOUT:
+        # The summary prompt takes its layout from the environment.
+        print(f"note: summary row uses LLM_PROMPT_LAYOUT={LLM_PROMPT_LAYOUT}")
+
+    verbose = dict(prompts(args.layout, compact=False))
+    compact = dict(prompts(args.layout, compact=True))
+    print(f"{'mode':<11} {'chars':>13} {'tokens':>13} {'variable':>13} {'saved':>6}")
+    totals = [0, 0]
+    for mode in verbose:
+        before, after = verbose[mode], compact[mode]
+        tokens = (estimate_tokens(prompt_text(before)), estimate_tokens(prompt_text(after)))
+        totals[0] += tokens[0]
+        totals[1] += tokens[1]
+        chars = f"{len(prompt_text(before))}->{len(prompt_text(after))}"
+        variable = f"{estimate_tokens(before.suffix)}->{estimate_tokens(after.suffix)}" if after.suffix else "-"
+        saved = 1 - tokens[1] / max(tokens[0], 1)
+        print(f"{mode:<11} {chars:>13} {f'{tokens[0]}->{tokens[1]}':>13} {variable:>13} {saved:>6.0%}")
+    print(f"{'total':<11} {'':>13} {f'{totals[0]}->{totals[1]}':>13} {'':>13} {1 - totals[1] / max(totals[0], 1):>6.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Offline report: how many distinct LLM prompts survive input quantization.
+
+Replays analysis requests through the /analyze prompt builder twice, once
+with exact inputs and once with LLM_QUANTIZE-style bucketing, and counts the
+distinct prompts each produces. Every prompt beyond the first in a group is a
+potential response-cache hit.
+
+Requests come from a JSONL file (one AnalyzeRequest body per line, or
+objects with a "payload" key). Without --input, small jittered variants of
+the sample request are generated instead.
+
+Run from the ``code/`` directory:
+
+    python -m benchmarks.quantization_report --input recorded_requests.jsonl
+    python -m benchmarks.quantization_report --synthetic 500 --jitter 0.02
+"""
+
+import argparse
+import copy
+import hashlib
+import json
+import random
+import sys
+from pathlib import Path
+from typing import Any, Dict, Iterable, List
+
+CODE_DIR = Path(__file__).resolve().parents[1]
+if str(CODE_DIR) not in sys.path:
+    sys.path.append(str(CODE_DIR))
+
+from app.ai.prompt_layout import PromptParts, prompt_text  # noqa: E402
+from app.core.pipeline import prepare_analysis  # noqa: E402
+from app.core.quantize import EXACT_FIELDS  # noqa: E402
+from app.core.sample_payloads import SAMPLE_REQUEST  # noqa: E402
+
+_JITTER_SECTIONS = ("profile", "scenario")
+
+
+def load_requests(path: Path) -> List[Dict[str, Any]]:
+    requests: List[Dict[str, Any]] = []
+    with path.open() as handle:
+        for line in handle:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            requests.append(record.get("payload", record) if isinstance(record, dict) else record)
+    return requests
+
+
+def synthetic_requests(count: int, jitter: float, seed: int) -> List[Dict[str, Any]]:
+    # Mimics slider edits: each request nudges one money field of the sample.
+    rng = random.Random(seed)
+    fields = [
+        (section, name)
+        for section in _JITTER_SECTIONS
+        for name, value in SAMPLE_REQUEST[section].items()
+        if name not in EXACT_FIELDS and isinstance(value, (int, float)) and not isinstance(value, bool) and value
+    ]
+    requests = []
+    for _ in range(count):
+        payload = copy.deepcopy(SAMPLE_REQUEST)
+        section, name = rng.choice(fields)
+        value = payload[section][name]
+        payload[section][name] = max(0.0, round(value * (1 + rng.uniform(-jitter, jitter)), 2))
+        requests.append(payload)
+    return requests
+
+
+def _prompt_hash(prompt: PromptParts) -> str:
+    return hashlib.sha256(prompt_text(prompt).encode("utf-8")).hexdigest()
+
+
+def distinct_prompts(requests: Iterable[Dict[str, Any]], quantize: bool) -> Dict[str, int]:
+    seen: Dict[str, int] = {}
+    for payload in requests:
+        key = _prompt_hash(prepare_analysis(payload, quantize=quantize)["prompt"])
+        seen[key] = seen.get(key, 0) + 1
+    return seen
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--input", type=Path, default=None, help="JSONL file of recorded /analyze request bodies.")
+    parser.add_argument("--synthetic", type=int, default=200, help="Generated requests when --input is not given.")
+    parser.add_argument(
+        "--jitter", type=float, default=0.01, help="Relative jitter applied to one money field per generated request."
+    )
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    if args.input is not None:
+        requests = load_requests(args.input)
+        source = str(args.input)
+    else:
+        requests = synthetic_requests(args.synthetic, args.jitter, args.seed)
+        source = f"synthetic (n={args.synthetic}, jitter={args.jitter:.1%})"
+    if not requests:
+        raise SystemExit("No requests to replay.")
+
+    total = len(requests)
+    exact = distinct_prompts(requests, quantize=False)
+    quantized = distinct_prompts(requests, quantize=True)
+    print(f"source              {source}")
+    print(f"requests            {total}")
+    for label, groups in (("exact", exact), ("quantized", quantized)):
+        distinct = len(groups)
+        hit_rate = 1 - distinct / total
+        print(f"{label:<10} distinct={distinct:6d}  max cache hit rate={hit_rate:6.1%}  largest group={max(groups.values())}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+from app.ai.budgets import BudgetManager
+
+
+def _manager(**overrides):
+    settings = dict(enabled=True, min_samples=5, percentile=0.95, headroom=1.0, min_tokens=32, latency_slo_s=0)
+    settings.update(overrides)
+    return BudgetManager(**settings)
+
+
+def test_call_sites_sharing_a_mode_get_their_own_budget():
+    budgets = _manager()
+    for _ in range(10):
+        budgets.observe("chat", 150, 1.0, finish_reason="stop", call_site="streamlit.chat")
+        budgets.observe("chat", 700, 4.0, finish_reason="stop", call_site="streamlit.structured")
+
+    prose, _ = budgets.plan("chat", 420, call_site="streamlit.chat")
+    structured, _ = budgets.plan("chat", 800, call_site="streamlit.structured")
+    assert prose == 160
+    assert structured == 704
+    # A call site with no history keeps the caller's ceiling.
+    assert budgets.plan("chat", 800, call_site="streamlit.other") == (800, None)
+
+
+def test_budget_waits_for_samples_and_never_exceeds_the_cap():
+    budgets = _manager()
+    for _ in range(4):
+        budgets.observe("scenario", 100, 1.0, call_site="analyze")
+    assert budgets.plan("scenario", 800, call_site="analyze")[0] == 800
+    budgets.observe("scenario", 100, 1.0, call_site="analyze")
+    assert budgets.plan("scenario", 800, call_site="analyze")[0] == 128
+    assert budgets.plan("scenario", 64, call_site="analyze")[0] == 64
+
+
+def test_truncation_grows_the_budget_and_cached_answers_are_ignored():
+    budgets = _manager()
+    for _ in range(5):
+        budgets.observe("chat", 200, 1.0, finish_reason="length", call_site="streamlit.chat")
+        budgets.observe("chat", 10, 0.01, cached=True, call_site="streamlit.chat")
+    assert budgets.plan("chat", 800, call_site="streamlit.chat")[0] == 416
+    stats = budgets.snapshot()["chat:streamlit.chat"]
+    assert stats["calls"] == 5 and stats["truncated_total"] == 5
+    assert stats["mode"] == "chat" and stats["call_site"] == "streamlit.chat"
+
+
+def test_reasoning_budget_follows_the_planned_tokens():
+    budgets = _manager(reasoning_share=0.5)
+    assert budgets.plan("chat", 400, reasoning_budget=0) == (400, 200)
+    assert budgets.plan("chat", 400, reasoning_budget=100) == (400, 100)
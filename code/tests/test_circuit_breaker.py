@@ -0,0 +1,74 @@
+import pytest
+
+from app.ai import circuit_breaker
+from app.ai.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(circuit_breaker.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_opens_after_consecutive_failures(clock):
+    breaker = CircuitBreaker(failure_threshold=3, slow_call_s=0, open_s=30)
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert not breaker.allow_request()
+    assert breaker.snapshot()["rejected_total"] == 1.0
+
+
+def test_success_resets_the_failure_count(clock):
+    breaker = CircuitBreaker(failure_threshold=2, slow_call_s=0, open_s=30)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+
+
+def test_slow_success_counts_as_failure(clock):
+    breaker = CircuitBreaker(failure_threshold=1, slow_call_s=5, open_s=30)
+    breaker.record_success(latency_s=6)
+    assert breaker.state == OPEN
+
+
+def test_half_open_lets_one_probe_through(clock):
+    breaker = CircuitBreaker(failure_threshold=1, slow_call_s=0, open_s=30)
+    breaker.record_failure()
+    clock[0] += 29
+    assert not breaker.allow_request()
+    clock[0] += 1
+    assert breaker.available()
+    assert breaker.allow_request()
+    assert breaker.state == HALF_OPEN
+    # Everyone else waits for the probe's outcome.
+    assert not breaker.allow_request()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    assert breaker.allow_request()
+
+
+def test_failed_probe_reopens(clock):
+    breaker = CircuitBreaker(failure_threshold=3, slow_call_s=0, open_s=30)
+    for _ in range(3):
+        breaker.record_failure()
+    clock[0] += 30
+    assert breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert breaker.snapshot()["opened_total"] == 2.0
+    assert not breaker.allow_request()
+
+
+def test_lost_probe_does_not_wedge_the_breaker(clock):
+    breaker = CircuitBreaker(failure_threshold=1, slow_call_s=0, open_s=30)
+    breaker.record_failure()
+    clock[0] += 30
+    assert breaker.allow_request()
+    # The probe never reports back.
+    clock[0] += 30
+    assert breaker.allow_request()
@@ -0,0 +1,45 @@
+from app.ai.continuation import is_truncated, join_continuation, salvage_json
+
+
+def test_salvage_keeps_complete_fields_of_a_cut_object():
+    text = '{"summary": "ok", "key_facts": ["a", "b"], "meaning": "cut off mid'
+    assert salvage_json(text) == {"summary": "ok", "key_facts": ["a", "b"]}
+
+
+def test_salvage_closes_nested_containers():
+    assert salvage_json('{"a": 1, "b": {"c": [1, 2') == {"a": 1, "b": {"c": [1]}}
+
+
+def test_salvage_drops_a_number_that_may_be_cut():
+    # "3" could have been "30"; only values followed by a separator are complete.
+    assert salvage_json('{"a": 12.5, "b": 3') == {"a": 12.5}
+
+
+def test_salvage_ignores_text_around_a_complete_object():
+    assert salvage_json('Here you go: {"a": "x"} hope that helps') == {"a": "x"}
+
+
+def test_salvage_keeps_escaped_quotes_inside_strings():
+    assert salvage_json('{"a": "say \\"hi\\"", "b": "cut') == {"a": 'say "hi"'}
+
+
+def test_salvage_gives_up_without_a_complete_field():
+    assert salvage_json("") is None
+    assert salvage_json("no json here") is None
+    assert salvage_json('{"a": tru') is None
+
+
+def test_join_drops_restated_overlap():
+    partial = "Cut dining out first, then review"
+    addition = "dining out first, then review subscriptions."
+    assert join_continuation(partial, addition) == "Cut dining out first, then review subscriptions."
+
+
+def test_join_keeps_short_coincidental_overlap():
+    assert join_continuation("a plan", "an option") == "a planan option"
+
+
+def test_is_truncated_reads_finish_reason():
+    assert is_truncated({"choices": [{"finish_reason": "length"}]})
+    assert not is_truncated({"choices": [{"finish_reason": "stop"}]})
+    assert not is_truncated(None)
@@ -0,0 +1,133 @@
+import time
+
+import pytest
+
+from app.ai import deadline as llm_deadline
+from app.ai import nemotron_client
+from app.ai.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+from app.ai.routing import ModelRoute
+from app.core.llm_executor import LLMExecutor
+
+
+def test_nested_deadline_only_tightens():
+    with llm_deadline.deadline(10):
+        with llm_deadline.deadline(60):
+            assert llm_deadline.remaining() <= 10
+        with llm_deadline.deadline(1):
+            assert llm_deadline.remaining() <= 1
+        assert llm_deadline.remaining() > 1
+    assert llm_deadline.remaining() is None
+
+
+def test_budget_is_capped_by_the_deadline():
+    assert llm_deadline.budget(25) == 25
+    with llm_deadline.deadline(2):
+        assert llm_deadline.budget(25) <= 2
+        assert llm_deadline.budget(1) == 1
+
+
+def test_check_raises_once_the_budget_is_spent():
+    with llm_deadline.deadline(0.01):
+        time.sleep(0.02)
+        with pytest.raises(llm_deadline.DeadlineExceeded):
+            llm_deadline.check()
+    # DeadlineExceeded is a TimeoutError, so callers count it as a timeout.
+    assert issubclass(llm_deadline.DeadlineExceeded, TimeoutError)
+
+
+def test_deadline_follows_work_into_the_llm_executor():
+    executor = LLMExecutor(max_workers=1)
+    try:
+        with llm_deadline.deadline(5):
+            future = executor.submit(llm_deadline.remaining)
+        left = future.result(timeout=5)
+    finally:
+        executor.shutdown()
+    assert left is not None and 0 < left <= 5
+
+
+class _Unavailable(Exception):
+    status_code = 503
+
+
+class _BadRequest(Exception):
+    status_code = 400
+
+
+def test_retries_stop_when_the_budget_cannot_cover_another_attempt(monkeypatch):
+    monkeypatch.setattr(nemotron_client, "NEMOTRON_MAX_RETRIES", 2)
+    monkeypatch.setattr(llm_deadline, "backoff_delay", lambda attempt: 0.3)
+    with llm_deadline.deadline(10):
+        assert nemotron_client._should_retry(_Unavailable(), 0) == 0.3
+        assert nemotron_client._should_retry(_Unavailable(), 2) is None
+        assert nemotron_client._should_retry(_BadRequest(), 0) is None
+    with llm_deadline.deadline(llm_deadline.NEMOTRON_MIN_ATTEMPT_S + 0.1):
+        assert nemotron_client._should_retry(_Unavailable(), 0) is None
+
+
+
+class APITimeoutError(Exception):
+    # Same shape as the openai client's: no status code.
+    pass
+
+
+def _route(**breaker):
+    settings = dict(failure_threshold=1, slow_call_s=20, open_s=0)
+    settings.update(breaker)
+    return ModelRoute("test", "model", "http://localhost", None, 30.0, 256, 1, breaker=CircuitBreaker(**settings))
+
+
+def _timeout(_):
+    raise APITimeoutError("Request timed out.")
+
+
+def test_timeout_from_the_callers_deadline_is_not_a_breaker_failure():
+    route = _route()
+    with llm_deadline.deadline(1):
+        with pytest.raises(APITimeoutError):
+            nemotron_client._call_with_retries(_timeout, route)
+    assert route.breaker.state == CLOSED
+
+    with pytest.raises(APITimeoutError):
+        nemotron_client._call_with_retries(_timeout, route)
+    assert route.breaker.state == OPEN
+
+
+def test_callers_timeout_hands_back_the_half_open_probe():
+    route = _route()
+    route.breaker.record_failure()
+    assert route.breaker.allow_request() and route.breaker.state == HALF_OPEN
+    route.breaker.release_probe()
+
+    with llm_deadline.deadline(1):
+        with pytest.raises(APITimeoutError):
+            nemotron_client._call_with_retries(_timeout, route)
+    assert route.breaker.state == HALF_OPEN
+    # The next caller becomes the probe instead of waiting for the stale one.
+    assert route.breaker.allow_request()
+
+
+def test_slow_calls_still_count_even_under_a_callers_deadline():
+    route = _route(slow_call_s=0.01)
+
+    def slow_timeout(_):
+        time.sleep(0.02)
+        raise APITimeoutError("Request timed out.")
+
+    with llm_deadline.deadline(1):
+        with pytest.raises(APITimeoutError):
+            nemotron_client._call_with_retries(slow_timeout, route)
+    assert route.breaker.state == OPEN
+
+
+def test_stream_stopped_by_the_callers_deadline_is_not_a_breaker_failure():
+    route = _route()
+
+    def chunks():
+        yield {"choices": [{"delta": {"content": "Runway"}}]}
+        raise llm_deadline.DeadlineExceeded("spent")
+
+    stream = nemotron_client.NemotronStream(chunks(), time.perf_counter(), deadline_s=5, route=route)
+    with pytest.raises(llm_deadline.DeadlineExceeded):
+        stream.consume()
+    assert route.breaker.state == CLOSED
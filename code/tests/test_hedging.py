@@ -0,0 +1,71 @@
+import threading
+
+from app.ai.hedging import HedgeAttempt, HedgePolicy, run_hedged
+
+
+def test_cancel_runs_abort_registered_before_or_after():
+    aborted = []
+    early = HedgeAttempt()
+    early.on_cancel(lambda: aborted.append("early"))
+    early.cancel()
+
+    late = HedgeAttempt()
+    late.cancel()
+    late.on_cancel(lambda: aborted.append("late"))
+
+    assert aborted == ["early", "late"]
+    assert early.cancelled() and late.cancelled()
+
+
+def test_disabled_policy_calls_once_without_an_attempt():
+    seen = []
+    policy = HedgePolicy(enabled=False)
+    assert run_hedged(lambda attempt: seen.append(attempt) or "ok", policy) == "ok"
+    assert seen == [None]
+    assert policy.snapshot()["calls_total"] == 0
+
+
+def test_slow_primary_is_hedged_and_the_loser_cancelled():
+    policy = HedgePolicy(enabled=True, min_delay_s=0.01, min_samples=1, max_rate=1.0)
+    policy.observe(0.01)
+    attempts = []
+    lock = threading.Lock()
+
+    def call(attempt):
+        with lock:
+            first = not attempts
+            attempts.append(attempt)
+        if first:
+            released = threading.Event()
+            attempt.on_cancel(released.set)
+            released.wait(timeout=5)
+            return "primary"
+        return "hedge"
+
+    assert run_hedged(call, policy) == "hedge"
+    primary, hedge = attempts
+    assert primary.cancelled() and not hedge.cancelled()
+    stats = policy.snapshot()
+    assert stats["hedges_issued_total"] == 1 and stats["hedges_won_total"] == 1
+
+
+def test_hedge_is_denied_over_the_rate_limit():
+    policy = HedgePolicy(enabled=True, min_delay_s=0.0, min_samples=1, max_rate=0.0)
+    policy.observe(0.0)
+    calls = []
+    assert run_hedged(lambda attempt: calls.append(attempt) or "only", policy) == "only"
+    assert len(calls) == 1
+
+
+def test_hedge_delay_is_a_nearest_rank_percentile():
+    policy = HedgePolicy(enabled=True, percentile=0.95, min_delay_s=0.0, min_samples=1)
+    for _ in range(19):
+        policy.observe(0.2)
+    # One slow outlier in twenty must not become the p95 hedge delay.
+    policy.observe(2.1)
+    assert policy.begin_call() == 0.2
+
+    median = HedgePolicy(enabled=True, percentile=0.5, min_delay_s=0.0, min_samples=1)
+    median.observe(0.1)
+    median.observe(2.1)
+    assert median.begin_call() == 0.1
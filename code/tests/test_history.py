@@ -0,0 +1,98 @@
+from app.ai.compact import estimate_tokens
+from app.core.history import (
+    LLM_HISTORY_MAX_MESSAGES,
+    build_history_window,
+    context_facts,
+    drop_known_facts,
+    new_history_state,
+)
+
+
+def _chat(turns):
+    history = []
+    for index in range(turns):
+        history.append({"role": "user", "content": f"Question {index}: how long would my savings last?"})
+        history.append({"role": "assistant", "content": f"Answer {index}: about 4.7 months if you cut dining first."})
+    return history
+
+
+def _counting_summarizer(calls):
+    def summarize(previous, transcript):
+        calls.append(transcript)
+        return f"{len(calls)} folds"
+
+    return summarize
+
+
+def test_short_history_is_kept_verbatim():
+    calls = []
+    state = new_history_state()
+    window = build_history_window(_chat(2), state, summarize=_counting_summarizer(calls), budget=300)
+    assert window.splitlines() == [
+        "User: Question 0: how long would my savings last?",
+        "Assistant: Answer 0: about 4.7 months if you cut dining first.",
+        "User: Question 1: how long would my savings last?",
+        "Assistant: Answer 1: about 4.7 months if you cut dining first.",
+    ]
+    assert calls == []
+    assert state == new_history_state()
+
+
+def test_long_history_folds_into_summary_within_budget():
+    calls = []
+    state = new_history_state()
+    history = _chat(20)
+    window = build_history_window(history, state, summarize=_counting_summarizer(calls), budget=300)
+    assert estimate_tokens(window) <= 300
+    assert window.startswith("Earlier in this conversation: 1 folds\n")
+    assert window.endswith(f"Assistant: {history[-1]['content']}")
+    assert state["covered"] > 0
+    assert calls and calls[0].startswith("User: Question 0:")
+
+
+def test_summarizer_runs_every_few_turns_not_every_turn():
+    calls = []
+    state = new_history_state()
+    history = _chat(20)
+    summarize = _counting_summarizer(calls)
+    for end in range(2, len(history) + 1, 2):
+        build_history_window(history[:end], state, summarize=summarize, budget=300)
+    folds_after_first = len(calls) - 1
+    turns_after_first = (len(history) - 20) // 2
+    assert 0 < folds_after_first < turns_after_first
+
+
+def test_failed_summarizer_falls_back_to_user_turns():
+    def broken(previous, transcript):
+        raise RuntimeError("model unavailable")
+
+    state = new_history_state()
+    history = _chat(20)
+    build_history_window(history, state, summarize=broken, budget=300)
+    # What the user asked, newest kept when it runs over the summary budget.
+    last_folded = history[state["covered"] - 2]["content"]
+    assert state["summary"].endswith(last_folded)
+    assert "Answer" not in state["summary"]
+
+
+def test_cleared_chat_resets_state():
+    state = {"summary": "old conversation", "covered": 12}
+    window = build_history_window(_chat(1), state, budget=300)
+    assert state == new_history_state()
+    assert "old conversation" not in window
+    build_history_window([], state, budget=300)
+    assert state == new_history_state()
+
+
+def test_zero_budget_keeps_last_messages_verbatim():
+    history = _chat(10)
+    window = build_history_window(history, new_history_state(), budget=0)
+    assert len(window.splitlines()) == LLM_HISTORY_MAX_MESSAGES
+    assert window.endswith(history[-1]["content"])
+
+
+def test_assistant_restating_context_figures_is_dropped():
+    facts = context_facts({"current_metrics": {"monthly_net": "+$2,200"}, "profile": {"savings": "$18,000"}})
+    text = "Your net is +$2,200 a month. You hold $18,000 in savings. Should we plan for 6 months?"
+    assert drop_known_facts(text, facts) == "Should we plan for 6 months?"
+    assert drop_known_facts("Runway is 4.7 months.", facts) == "Runway is 4.7 months."
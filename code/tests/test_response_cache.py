@@ -0,0 +1,83 @@
+from app.ai import response_cache
+from app.ai.nemotron_client import _cacheable
+from app.ai.response_cache import ResponseCache, cache_key
+
+_KWARGS = {
+    "model": "nemotron",
+    "messages": [{"role": "user", "content": "How long is my runway?"}],
+    "temperature": 0.2,
+    "max_tokens": 256,
+    "extra_body": {"chat_template_kwargs": {"thinking": False}, "top_k": 20},
+}
+
+
+def _response(text, finish_reason="stop"):
+    return {"choices": [{"message": {"content": text}, "finish_reason": finish_reason}]}
+
+
+def test_cache_key_ignores_ordering_and_transport_options():
+    reordered = {
+        "extra_body": {"top_k": 20, "chat_template_kwargs": {"thinking": False}},
+        "max_tokens": 256,
+        "temperature": 0.2,
+        "messages": _KWARGS["messages"],
+        "model": "nemotron",
+        "timeout": 30.0,
+        "stream": True,
+    }
+    assert cache_key(reordered) == cache_key(_KWARGS)
+
+
+def test_cache_key_changes_with_the_completion_settings():
+    key = cache_key(_KWARGS)
+    assert cache_key({**_KWARGS, "temperature": 0.7}) != key
+    assert cache_key({**_KWARGS, "max_tokens": 512}) != key
+    assert cache_key({**_KWARGS, "messages": [{"role": "user", "content": "Other"}]}) != key
+
+
+def test_round_trip_and_disabled_cache(tmp_path):
+    cache = ResponseCache(path=str(tmp_path / "cache.sqlite3"), enabled=True)
+    key = cache_key(_KWARGS)
+    assert cache.get(key) is None
+    cache.put(key, _response("About eight months."))
+    assert cache.get(key) == _response("About eight months.")
+    stats = cache.stats()
+    assert stats["entries"] == 1 and stats["hits"] == 1 and stats["misses"] == 1
+
+    disabled = ResponseCache(path=str(tmp_path / "off.sqlite3"), enabled=False)
+    disabled.put(key, _response("About eight months."))
+    assert disabled.get(key) is None
+    assert not (tmp_path / "off.sqlite3").exists()
+
+
+def test_expired_entries_are_evicted(tmp_path):
+    expired = ResponseCache(path=str(tmp_path / "ttl.sqlite3"), ttl_s=-1, enabled=True)
+    expired.put("a", _response("old"))
+    assert expired.get("a") is None
+
+
+
+def test_only_complete_accepted_answers_are_cacheable():
+    assert _cacheable(_response("Fine."))
+    assert not _cacheable(_response(""))
+    assert not _cacheable(_response("Cut", finish_reason="length"))
+    assert not _cacheable(_response("As an AI model..."), accept=lambda text: "AI" not in text)
+    assert _cacheable(_response("Fine."), accept=lambda text: "AI" not in text)
+
+
+def test_least_recently_used_entry_is_evicted(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(response_cache.time, "time", lambda: now[0])
+    cache = ResponseCache(path=str(tmp_path / "lru.sqlite3"), max_entries=2, enabled=True)
+    cache.put("a", _response("a"))
+    now[0] += 1
+    cache.put("b", _response("b"))
+    now[0] += 1
+    # Reading "a" makes "b" the least recently used, though "a" was written first.
+    assert cache.get("a") is not None
+    now[0] += 1
+    cache.put("c", _response("c"))
+    assert cache.stats()["entries"] == 2
+    assert cache.get("b") is None
+    assert cache.get("a") == _response("a")
+    assert cache.get("c") == _response("c")
@@ -0,0 +1,28 @@
+from app.core import pipeline
+from app.core.metrics import request_timings
+from app.core.prompts import PromptParts
+
+_PROMPT = PromptParts("", "Summarize my runway.", "")
+
+
+def _answer(timings=None):
+    response = {"choices": [{"message": {"content": "Summary:\n- Fine."}, "finish_reason": "stop"}]}
+    if timings is not None:
+        response["timings"] = timings
+    return response
+
+
+def test_hedged_call_reports_the_winning_attempts_ttft(monkeypatch):
+    monkeypatch.setattr(pipeline, "query_nemotron", lambda *args, **kwargs: _answer({"ttft_s": 0.25}))
+    with request_timings() as timings:
+        assert pipeline._llm_summary(_PROMPT) == ("Summary:\n- Fine.", "")
+    assert timings.breakdown()["llm_ttft_ms"] == 250.0
+    assert timings.server_timing().startswith("llm_ttft;dur=250.0, llm;dur=")
+
+
+def test_plain_completion_marks_ttft_unavailable(monkeypatch):
+    monkeypatch.setattr(pipeline, "query_nemotron", lambda *args, **kwargs: _answer())
+    with request_timings() as timings:
+        pipeline._llm_summary(_PROMPT)
+    assert "llm_ttft_ms" not in timings.breakdown()
+    assert timings.server_timing().startswith('llm_ttft;desc="unavailable", llm;dur=')